@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from datetime import date, datetime, time, timedelta
-import calendar
-import json
+from datetime import date, datetime, time
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from ..db.fulltext import fulltext_match
+from ..db.keyset import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, seek_before
 from ..db.session import get_db
 from ..models.finance_asset import FinanceAsset
 from ..models.finance_budget import FinanceCategoryBudget, FinanceMonthlyBudget
@@ -16,16 +17,20 @@ from ..models.finance_liability import FinanceLiability
 from ..models.finance_recurring import FinanceRecurringOccurrence, FinanceRecurringRule
 from ..models.finance_transaction import FinanceTransaction
 from ..models.finance_audit_log import FinanceAuditLog
+from ..services import finance_audit, finance_cashflow, net_worth, recurring
 from ..schemas.finance import (
     FinanceAssetCreate,
     FinanceAssetOut,
     FinanceAssetUpdate,
     FinanceAuditLogOut,
+    FinanceAuditStateOut,
+    FinanceAuditTimelineEntryOut,
     FinanceCashflowPointOut,
     FinanceCategoryBudgetCreate,
     FinanceCategoryBudgetOut,
     FinanceCategorySpendOut,
     FinanceDashboardOut,
+    FinanceDueRuleOut,
     FinanceGoalAllocationCreate,
     FinanceGoalAllocationOut,
     FinanceGoalCreate,
@@ -36,8 +41,10 @@ from ..schemas.finance import (
     FinanceLiabilityUpdate,
     FinanceMonthlyBudgetCreate,
     FinanceMonthlyBudgetOut,
+    FinanceNetWorthPointOut,
     FinanceOccurrenceOut,
     FinanceOccurrenceDetailedOut,
+    FinancePostDueOut,
     FinanceRecurringCreate,
     FinanceRecurringUpdate,
     FinanceRecurringOut,
@@ -49,74 +56,11 @@ from ..schemas.finance import (
 router = APIRouter(prefix="/expense", tags=["expense"])
 
 
-def _next_due_date(rule: FinanceRecurringRule, from_date: date) -> date:
-    if rule.schedule == "daily":
-        return from_date + timedelta(days=1)
-    if rule.schedule == "weekly":
-        return from_date + timedelta(days=7)
-    if rule.schedule == "monthly":
-        year = from_date.year
-        month = from_date.month + 1
-        if month == 13:
-            month = 1
-            year += 1
-        day = rule.day_of_month or from_date.day
-        last_day = calendar.monthrange(year, month)[1]
-        day = min(max(1, int(day)), last_day)
-        return date(year, month, day)
-    # Should never happen (validated by schema)
-    return from_date
-
-
-def _json_dumps(v) -> str:
-    return json.dumps(v, default=str, ensure_ascii=False)
-
-
-def _model_dict(obj, fields: list[str]) -> dict:
-    return {k: getattr(obj, k) for k in fields}
-
-
-def _audit(
-    db: Session,
-    *,
-    entity_type: str,
-    entity_id: int | None,
-    action: str,
-    before_json: str | None,
-    after_json: str | None,
-) -> None:
-    row = FinanceAuditLog(
-        entity_type=entity_type,
-        entity_id=entity_id,
-        action=action,
-        before_json=before_json,
-        after_json=after_json,
-    )
-    db.add(row)
+def _commit(db: Session) -> None:
+    finance_audit.flush(db)
     db.commit()
 
 
-def _txn_audit_dict(txn: FinanceTransaction) -> dict:
-    return _model_dict(
-        txn,
-        [
-            "id",
-            "txn_type",
-            "amount",
-            "category",
-            "payment_mode",
-            "description",
-            "transacted_at",
-            "from_asset_id",
-            "to_asset_id",
-            "liability_id",
-            "recurring_id",
-            "created_at",
-            "updated_at",
-        ],
-    )
-
-
 def _apply_transaction_effect(
     db: Session,
     *,
@@ -125,9 +69,11 @@ def _apply_transaction_effect(
     from_asset_id: int | None,
     to_asset_id: int | None,
     liability_id: int | None,
+    transacted_at: datetime,
     direction: int,
 ) -> None:
     # direction: +1 apply, -1 reverse
+    to_asset = from_asset = liab = None
     if txn_type == "income":
         if to_asset_id is None:
             raise HTTPException(status_code=400, detail="Income requires to_asset_id")
@@ -171,12 +117,20 @@ def _apply_transaction_effect(
     else:
         raise HTTPException(status_code=400, detail="Invalid txn_type")
 
+    # Audit the moved balances, and shift stored daily net worth rows from that day on
+    for entity_type, obj in (("asset", to_asset), ("asset", from_asset), ("liability", liab)):
+        if obj is not None:
+            finance_audit.touched(db, entity_type, obj, {"balance": obj.balance, "updated_at": obj.updated_at})
+    net_worth.adjust_transaction(db, txn_type, amount, transacted_at, direction)
+
 
 def _set_primary_asset(db: Session, new_primary_id: int) -> None:
-    db.execute(select(FinanceAsset).where(FinanceAsset.is_primary == True))
-    db.execute(
-        FinanceAsset.__table__.update().values(is_primary=False).where(FinanceAsset.is_primary == True)
-    )
+    # The demoted asset changes outside its own endpoint: audit it here
+    for other in db.execute(
+        select(FinanceAsset).where(FinanceAsset.is_primary == True, FinanceAsset.id != new_primary_id)
+    ).scalars():
+        other.is_primary = False
+        finance_audit.touched(db, "asset", other, {"is_primary": False})
     db.execute(FinanceAsset.__table__.update().values(is_primary=True).where(FinanceAsset.id == new_primary_id))
 
 
@@ -195,27 +149,19 @@ def create_asset(payload: FinanceAssetCreate, db: Session = Depends(get_db)):
         asset_subtype=payload.asset_subtype,
         currency=payload.currency,
         balance=payload.balance,
+        opening_balance=payload.balance,
         is_primary=payload.is_primary,
         notes=payload.notes,
     )
     db.add(asset)
-    db.commit()
-    db.refresh(asset)
+    db.flush()
 
     if payload.is_primary:
         _set_primary_asset(db, asset.id)
-        db.commit()
-        db.refresh(asset)
-
-    _audit(
-        db,
-        entity_type="asset",
-        entity_id=asset.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(asset, ["id", "name", "asset_type", "asset_subtype", "currency", "balance", "is_primary", "notes", "created_at", "updated_at"])),
-    )
 
+    finance_audit.created(db, "asset", asset)
+    _commit(db)
+    db.refresh(asset)
     return asset
 
 
@@ -225,31 +171,23 @@ def update_asset(asset_id: int, payload: FinanceAssetUpdate, db: Session = Depen
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    before = _json_dumps(_model_dict(asset, ["id", "name", "asset_type", "asset_subtype", "currency", "balance", "is_primary", "notes", "created_at", "updated_at"]))
-
     data = payload.model_dump(exclude_unset=True)
+    if data.get("balance") is not None:
+        # A manual balance edit is a correction, not a transaction
+        asset.opening_balance = (asset.opening_balance or 0) + data["balance"] - (asset.balance or 0)
     for k, v in data.items():
         setattr(asset, k, v)
     asset.updated_at = datetime.utcnow()
+    finance_audit.updated(db, "asset", asset)
 
     db.add(asset)
-    db.commit()
-    db.refresh(asset)
+    db.flush()
 
     if payload.is_primary:
         _set_primary_asset(db, asset.id)
-        db.commit()
-        db.refresh(asset)
-
-    _audit(
-        db,
-        entity_type="asset",
-        entity_id=asset.id,
-        action="updated",
-        before_json=before,
-        after_json=_json_dumps(_model_dict(asset, ["id", "name", "asset_type", "asset_subtype", "currency", "balance", "is_primary", "notes", "created_at", "updated_at"])),
-    )
 
+    _commit(db)
+    db.refresh(asset)
     return asset
 
 
@@ -262,19 +200,13 @@ def list_liabilities(db: Session = Depends(get_db)):
 
 @router.post("/liabilities", response_model=FinanceLiabilityOut, status_code=201)
 def create_liability(payload: FinanceLiabilityCreate, db: Session = Depends(get_db)):
-    liab = FinanceLiability(**payload.model_dump())
+    liab = FinanceLiability(**payload.model_dump(), opening_balance=payload.balance)
     db.add(liab)
-    db.commit()
-    db.refresh(liab)
+    db.flush()
 
-    _audit(
-        db,
-        entity_type="liability",
-        entity_id=liab.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(liab, ["id", "name", "liability_type", "balance", "credit_limit", "due_day", "minimum_payment", "emi_amount", "interest_rate", "tenure_months_left", "notes", "created_at", "updated_at"])),
-    )
+    finance_audit.created(db, "liability", liab)
+    _commit(db)
+    db.refresh(liab)
     return liab
 
 
@@ -284,25 +216,17 @@ def update_liability(liability_id: int, payload: FinanceLiabilityUpdate, db: Ses
     if not liab:
         raise HTTPException(status_code=404, detail="Liability not found")
 
-    before = _json_dumps(_model_dict(liab, ["id", "name", "liability_type", "balance", "credit_limit", "due_day", "minimum_payment", "emi_amount", "interest_rate", "tenure_months_left", "notes", "created_at", "updated_at"]))
-
     data = payload.model_dump(exclude_unset=True)
+    if data.get("balance") is not None:
+        liab.opening_balance = (liab.opening_balance or 0) + data["balance"] - (liab.balance or 0)
     for k, v in data.items():
         setattr(liab, k, v)
     liab.updated_at = datetime.utcnow()
+    finance_audit.updated(db, "liability", liab)
 
     db.add(liab)
-    db.commit()
+    _commit(db)
     db.refresh(liab)
-
-    _audit(
-        db,
-        entity_type="liability",
-        entity_id=liab.id,
-        action="updated",
-        before_json=before,
-        after_json=_json_dumps(_model_dict(liab, ["id", "name", "liability_type", "balance", "credit_limit", "due_day", "minimum_payment", "emi_amount", "interest_rate", "tenure_months_left", "notes", "created_at", "updated_at"])),
-    )
     return liab
 
 
@@ -322,9 +246,9 @@ def _ensure_primary_asset(db: Session) -> FinanceAsset:
     if any_asset:
         any_asset.is_primary = True
         any_asset.updated_at = datetime.utcnow()
+        finance_audit.touched(db, "asset", any_asset, {"is_primary": True, "updated_at": any_asset.updated_at})
         db.add(any_asset)
-        db.commit()
-        db.refresh(any_asset)
+        db.flush()
         return any_asset
 
     # First-time setup: create a sensible default account so transactions can work.
@@ -338,8 +262,8 @@ def _ensure_primary_asset(db: Session) -> FinanceAsset:
         notes=None,
     )
     db.add(created)
-    db.commit()
-    db.refresh(created)
+    db.flush()
+    finance_audit.created(db, "asset", created)
     return created
 
 
@@ -352,12 +276,20 @@ def _require_asset(db: Session, asset_id: int, label: str) -> FinanceAsset:
 
 @router.get("/transactions", response_model=list[FinanceTransactionOut])
 def list_transactions(
+    response: Response,
     start_date: date | None = None,
     end_date: date | None = None,
     txn_type: str | None = None,
     category: str | None = None,
+    search: str | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
+    # Newest first, one page at a time; the next page starts after the
+    # X-Next-Cursor header value (keyset seek on transacted_at, id).
+    limit = max(1, min(500, limit))
+
     stmt = select(FinanceTransaction)
 
     if start_date:
@@ -368,13 +300,33 @@ def list_transactions(
         stmt = stmt.where(FinanceTransaction.txn_type == txn_type)
     if category:
         stmt = stmt.where(FinanceTransaction.category == category)
-
-    stmt = stmt.order_by(FinanceTransaction.transacted_at.desc(), FinanceTransaction.id.desc())
-    return db.execute(stmt).scalars().all()
+    if search:
+        stmt = stmt.where(fulltext_match(db, [FinanceTransaction.description], search)[0])
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(seek_before(FinanceTransaction.transacted_at, FinanceTransaction.id, after))
+
+    stmt = stmt.order_by(FinanceTransaction.transacted_at.desc(), FinanceTransaction.id.desc()).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].transacted_at, rows[-1].id)
+    return rows
 
 
 @router.post("/transactions", response_model=FinanceTransactionOut, status_code=201)
 def create_transaction(payload: FinanceTransactionCreate, db: Session = Depends(get_db)):
+    txn = _create_transaction(db, payload)
+    _commit(db)
+    db.refresh(txn)
+    return txn
+
+
+def _create_transaction(db: Session, payload: FinanceTransactionCreate) -> FinanceTransaction:
+    """Insert a transaction, apply its balance effects and stage its audit entry. Caller commits."""
     # Validate + resolve defaults
     txn_type = payload.txn_type
     amount = payload.amount
@@ -412,6 +364,7 @@ def create_transaction(payload: FinanceTransactionCreate, db: Session = Depends(
         from_asset_id=from_asset_id,
         to_asset_id=to_asset_id,
         liability_id=payload.liability_id,
+        transacted_at=payload.transacted_at,
         direction=1,
     )
 
@@ -429,17 +382,9 @@ def create_transaction(payload: FinanceTransactionCreate, db: Session = Depends(
     )
 
     db.add(txn)
-    db.commit()
-    db.refresh(txn)
+    db.flush()
 
-    _audit(
-        db,
-        entity_type="transaction",
-        entity_id=txn.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_txn_audit_dict(txn)),
-    )
+    finance_audit.created(db, "transaction", txn)
     return txn
 
 
@@ -449,8 +394,6 @@ def update_transaction(txn_id: int, payload: FinanceTransactionUpdate, db: Sessi
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    before = _json_dumps(_txn_audit_dict(txn))
-
     # Reverse old effects
     _apply_transaction_effect(
         db,
@@ -459,6 +402,7 @@ def update_transaction(txn_id: int, payload: FinanceTransactionUpdate, db: Sessi
         from_asset_id=txn.from_asset_id,
         to_asset_id=txn.to_asset_id,
         liability_id=txn.liability_id,
+        transacted_at=txn.transacted_at,
         direction=-1,
     )
 
@@ -506,6 +450,7 @@ def update_transaction(txn_id: int, payload: FinanceTransactionUpdate, db: Sessi
         from_asset_id=new_from_asset_id,
         to_asset_id=new_to_asset_id,
         liability_id=new_liability_id,
+        transacted_at=new_transacted_at,
         direction=1,
     )
 
@@ -520,20 +465,11 @@ def update_transaction(txn_id: int, payload: FinanceTransactionUpdate, db: Sessi
     txn.liability_id = new_liability_id
     txn.recurring_id = new_recurring_id
     txn.updated_at = datetime.utcnow()
+    finance_audit.updated(db, "transaction", txn)
 
     db.add(txn)
-    db.commit()
+    _commit(db)
     db.refresh(txn)
-
-    _audit(
-        db,
-        entity_type="transaction",
-        entity_id=txn.id,
-        action="updated",
-        before_json=before,
-        after_json=_json_dumps(_txn_audit_dict(txn)),
-    )
-
     return txn
 
 
@@ -543,7 +479,7 @@ def delete_transaction(txn_id: int, db: Session = Depends(get_db)):
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    before = _json_dumps(_txn_audit_dict(txn))
+    finance_audit.deleted(db, "transaction", txn)
 
     _apply_transaction_effect(
         db,
@@ -552,21 +488,12 @@ def delete_transaction(txn_id: int, db: Session = Depends(get_db)):
         from_asset_id=txn.from_asset_id,
         to_asset_id=txn.to_asset_id,
         liability_id=txn.liability_id,
+        transacted_at=txn.transacted_at,
         direction=-1,
     )
 
     db.delete(txn)
-    db.commit()
-
-    _audit(
-        db,
-        entity_type="transaction",
-        entity_id=txn_id,
-        action="deleted",
-        before_json=before,
-        after_json=None,
-    )
-
+    _commit(db)
     return None
 
 
@@ -581,23 +508,15 @@ def list_recurring(db: Session = Depends(get_db)):
 def create_recurring(payload: FinanceRecurringCreate, db: Session = Depends(get_db)):
     rule = FinanceRecurringRule(**payload.model_dump())
     db.add(rule)
-    db.commit()
-    db.refresh(rule)
+    db.flush()
 
     # Create initial occurrence
     occ = FinanceRecurringOccurrence(recurring_id=rule.id, due_date=rule.next_due_date, status="pending")
     db.add(occ)
-    db.commit()
-
-    _audit(
-        db,
-        entity_type="recurring_rule",
-        entity_id=rule.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(rule, ["id", "name", "txn_type", "amount", "category", "description", "schedule", "day_of_month", "day_of_week", "next_due_date", "auto_create", "is_active", "asset_id", "liability_id", "created_at", "updated_at"])),
-    )
 
+    finance_audit.created(db, "recurring_rule", rule)
+    _commit(db)
+    db.refresh(rule)
     return rule
 
 
@@ -607,30 +526,6 @@ def update_recurring(rule_id: int, payload: FinanceRecurringUpdate, db: Session
     if not rule:
         raise HTTPException(status_code=404, detail="Recurring rule not found")
 
-    before = _json_dumps(
-        _model_dict(
-            rule,
-            [
-                "id",
-                "name",
-                "txn_type",
-                "amount",
-                "category",
-                "description",
-                "schedule",
-                "day_of_month",
-                "day_of_week",
-                "next_due_date",
-                "auto_create",
-                "is_active",
-                "asset_id",
-                "liability_id",
-                "created_at",
-                "updated_at",
-            ],
-        )
-    )
-
     data = payload.model_dump(exclude_unset=True)
     for k, v in data.items():
         setattr(rule, k, v)
@@ -645,9 +540,8 @@ def update_recurring(rule_id: int, payload: FinanceRecurringUpdate, db: Session
         rule.day_of_week = None
 
     rule.updated_at = datetime.utcnow()
+    finance_audit.updated(db, "recurring_rule", rule)
     db.add(rule)
-    db.commit()
-    db.refresh(rule)
 
     # Keep the next pending occurrence due_date aligned with rule.next_due_date.
     pending = (
@@ -663,39 +557,9 @@ def update_recurring(rule_id: int, payload: FinanceRecurringUpdate, db: Session
     if pending:
         pending.due_date = rule.next_due_date
         db.add(pending)
-        db.commit()
-
-    _audit(
-        db,
-        entity_type="recurring_rule",
-        entity_id=rule.id,
-        action="updated",
-        before_json=before,
-        after_json=_json_dumps(
-            _model_dict(
-                rule,
-                [
-                    "id",
-                    "name",
-                    "txn_type",
-                    "amount",
-                    "category",
-                    "description",
-                    "schedule",
-                    "day_of_month",
-                    "day_of_week",
-                    "next_due_date",
-                    "auto_create",
-                    "is_active",
-                    "asset_id",
-                    "liability_id",
-                    "created_at",
-                    "updated_at",
-                ],
-            )
-        ),
-    )
 
+    _commit(db)
+    db.refresh(rule)
     return rule
 
 
@@ -729,6 +593,61 @@ def list_occurrences(status: str | None = None, db: Session = Depends(get_db)):
     return out
 
 
+@router.get("/occurrences/due", response_model=list[FinanceDueRuleOut])
+def list_due_occurrences(until: date | None = None, db: Session = Depends(get_db)):
+    # Every unposted period of the active rules up to `until` (default today), missed ones included.
+    until = until or date.today()
+    rules = recurring.due_rules(db, until, auto_only=False)
+    if not rules:
+        return []
+    posted = set(
+        db.execute(
+            select(FinanceRecurringOccurrence.recurring_id, FinanceRecurringOccurrence.due_date).where(
+                FinanceRecurringOccurrence.recurring_id.in_([r.id for r in rules]),
+                FinanceRecurringOccurrence.status != "pending",
+                FinanceRecurringOccurrence.due_date >= min(r.next_due_date for r in rules),
+                FinanceRecurringOccurrence.due_date <= until,
+            )
+        ).all()
+    )
+    return [
+        FinanceDueRuleOut(
+            recurring_id=rule.id,
+            name=rule.name,
+            txn_type=rule.txn_type,
+            amount=rule.amount,
+            category=rule.category,
+            due_dates=[d for d in recurring.due_dates(rule, until) if (rule.id, d) not in posted],
+        )
+        for rule in rules
+    ]
+
+
+@router.post("/occurrences/post-due", response_model=FinancePostDueOut)
+def post_due_occurrences(
+    until: date | None = None,
+    rule_id: list[int] | None = Query(None),
+    db: Session = Depends(get_db),
+):
+    # Catch-up: post every due period up to `until` (default today) of the active
+    # rules, or of the given ones, in one transaction (see services/recurring.py).
+    until = until or date.today()
+    try:
+        rules = recurring.due_rules(db, until, auto_only=False, rule_ids=rule_id, for_update=True)
+        result = recurring.post_due(db, rules, until)
+        still_due = sum(1 for r in rules if r.next_due_date <= until)
+        _commit(db)
+    except (IntegrityError, recurring.AlreadyPosted):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these occurrences were posted concurrently; retry")
+    return FinancePostDueOut(
+        until=until,
+        transaction_ids=result.transaction_ids,
+        still_due=still_due,
+        **result.as_dict(),
+    )
+
+
 @router.post("/occurrences/{occurrence_id}/post", response_model=FinanceTransactionOut, status_code=201)
 def post_occurrence(occurrence_id: int, db: Session = Depends(get_db)):
     occ = db.get(FinanceRecurringOccurrence, occurrence_id)
@@ -746,6 +665,12 @@ def post_occurrence(occurrence_id: int, db: Session = Depends(get_db)):
     if rule.txn_type == "transfer":
         raise HTTPException(status_code=400, detail="Posting transfer occurrences is not supported")
 
+    # Claim it first: a concurrent post (another request, bulk post-due or autopost)
+    # has then either already flipped the status or waits for this commit.
+    if not recurring.claim_occurrence(db, occ.id):
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Occurrence already posted")
+
     # Create the underlying transaction
     transacted_at = datetime.combine(occ.due_date, time.min)
     payload = FinanceTransactionCreate(
@@ -761,33 +686,31 @@ def post_occurrence(occurrence_id: int, db: Session = Depends(get_db)):
         recurring_id=rule.id,
     )
 
-    txn = create_transaction(payload, db)
+    txn = _create_transaction(db, payload)
 
     # Mark occurrence as posted
-    before_occ = _json_dumps(_model_dict(occ, ["id", "recurring_id", "due_date", "status", "transaction_id", "created_at"]))
     occ.transaction_id = txn.id
     occ.status = "posted"
+    finance_audit.updated(db, "occurrence", occ, action="posted")
     db.add(occ)
 
     # Roll forward next occurrence
-    next_due = _next_due_date(rule, occ.due_date)
+    next_due = recurring.next_due_date(rule, occ.due_date)
     rule.next_due_date = next_due
     rule.updated_at = datetime.utcnow()
     db.add(rule)
 
-    next_occ = FinanceRecurringOccurrence(recurring_id=rule.id, due_date=next_due, status="pending")
-    db.add(next_occ)
-    db.commit()
-
-    _audit(
-        db,
-        entity_type="occurrence",
-        entity_id=occ.id,
-        action="posted",
-        before_json=before_occ,
-        after_json=_json_dumps(_model_dict(occ, ["id", "recurring_id", "due_date", "status", "transaction_id", "created_at"]))
-    )
+    exists = db.execute(
+        select(FinanceRecurringOccurrence.id).where(
+            FinanceRecurringOccurrence.recurring_id == rule.id,
+            FinanceRecurringOccurrence.due_date == next_due,
+        )
+    ).first()
+    if not exists:
+        db.add(FinanceRecurringOccurrence(recurring_id=rule.id, due_date=next_due, status="pending"))
 
+    _commit(db)
+    db.refresh(txn)
     return txn
 
 
@@ -806,37 +729,22 @@ def upsert_monthly_budget(payload: FinanceMonthlyBudgetCreate, db: Session = Dep
     )
     existing = db.execute(stmt).scalars().first()
     if existing:
-        before = _json_dumps(_model_dict(existing, ["id", "year", "month", "total_budget", "rollover_unused", "created_at", "updated_at"]))
         existing.total_budget = payload.total_budget
         existing.rollover_unused = payload.rollover_unused
         existing.updated_at = datetime.utcnow()
+        finance_audit.updated(db, "monthly_budget", existing)
         db.add(existing)
-        db.commit()
+        _commit(db)
         db.refresh(existing)
-
-        _audit(
-            db,
-            entity_type="monthly_budget",
-            entity_id=existing.id,
-            action="updated",
-            before_json=before,
-            after_json=_json_dumps(_model_dict(existing, ["id", "year", "month", "total_budget", "rollover_unused", "created_at", "updated_at"])),
-        )
         return existing
 
     row = FinanceMonthlyBudget(**payload.model_dump())
     db.add(row)
-    db.commit()
-    db.refresh(row)
+    db.flush()
 
-    _audit(
-        db,
-        entity_type="monthly_budget",
-        entity_id=row.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(row, ["id", "year", "month", "total_budget", "rollover_unused", "created_at", "updated_at"])),
-    )
+    finance_audit.created(db, "monthly_budget", row)
+    _commit(db)
+    db.refresh(row)
     return row
 
 
@@ -860,37 +768,22 @@ def upsert_category_budget(payload: FinanceCategoryBudgetCreate, db: Session = D
     )
     existing = db.execute(stmt).scalars().first()
     if existing:
-        before = _json_dumps(_model_dict(existing, ["id", "year", "month", "category", "limit_amount", "rollover_unused", "created_at", "updated_at"]))
         existing.limit_amount = payload.limit_amount
         existing.rollover_unused = payload.rollover_unused
         existing.updated_at = datetime.utcnow()
+        finance_audit.updated(db, "category_budget", existing)
         db.add(existing)
-        db.commit()
+        _commit(db)
         db.refresh(existing)
-
-        _audit(
-            db,
-            entity_type="category_budget",
-            entity_id=existing.id,
-            action="updated",
-            before_json=before,
-            after_json=_json_dumps(_model_dict(existing, ["id", "year", "month", "category", "limit_amount", "rollover_unused", "created_at", "updated_at"])),
-        )
         return existing
 
     row = FinanceCategoryBudget(**payload.model_dump())
     db.add(row)
-    db.commit()
-    db.refresh(row)
+    db.flush()
 
-    _audit(
-        db,
-        entity_type="category_budget",
-        entity_id=row.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(row, ["id", "year", "month", "category", "limit_amount", "rollover_unused", "created_at", "updated_at"])),
-    )
+    finance_audit.created(db, "category_budget", row)
+    _commit(db)
+    db.refresh(row)
     return row
 
 
@@ -916,17 +809,11 @@ def create_goal(payload: FinanceGoalCreate, db: Session = Depends(get_db)):
         is_active=payload.is_active,
     )
     db.add(goal)
-    db.commit()
-    db.refresh(goal)
+    db.flush()
 
-    _audit(
-        db,
-        entity_type="goal",
-        entity_id=goal.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(goal, ["id", "name", "description", "target_amount", "current_amount", "category", "target_date", "is_active", "created_at", "updated_at"])),
-    )
+    finance_audit.created(db, "goal", goal)
+    _commit(db)
+    db.refresh(goal)
     return goal
 
 
@@ -936,25 +823,15 @@ def update_goal(goal_id: int, payload: FinanceGoalUpdate, db: Session = Depends(
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    before = _json_dumps(_model_dict(goal, ["id", "name", "description", "target_amount", "current_amount", "category", "target_date", "is_active", "created_at", "updated_at"]))
-
     data = payload.model_dump(exclude_unset=True)
     for k, v in data.items():
         setattr(goal, k, v)
     goal.updated_at = datetime.utcnow()
+    finance_audit.updated(db, "goal", goal)
 
     db.add(goal)
-    db.commit()
+    _commit(db)
     db.refresh(goal)
-
-    _audit(
-        db,
-        entity_type="goal",
-        entity_id=goal.id,
-        action="updated",
-        before_json=before,
-        after_json=_json_dumps(_model_dict(goal, ["id", "name", "description", "target_amount", "current_amount", "category", "target_date", "is_active", "created_at", "updated_at"])),
-    )
     return goal
 
 
@@ -964,21 +841,12 @@ def delete_goal(goal_id: int, db: Session = Depends(get_db)):
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
 
-    before = _json_dumps(_model_dict(goal, ["id", "name", "description", "target_amount", "current_amount", "category", "target_date", "is_active", "created_at", "updated_at"]))
+    finance_audit.deleted(db, "goal", goal)
 
     # Clean up allocations first to avoid FK constraint issues.
     db.execute(delete(FinanceGoalAllocation).where(FinanceGoalAllocation.goal_id == goal_id))
     db.delete(goal)
-    db.commit()
-
-    _audit(
-        db,
-        entity_type="goal",
-        entity_id=goal_id,
-        action="deleted",
-        before_json=before,
-        after_json=None,
-    )
+    _commit(db)
     return None
 
 
@@ -998,58 +866,112 @@ def upsert_goal_allocation(payload: FinanceGoalAllocationCreate, db: Session = D
     )
     existing = db.execute(stmt).scalars().first()
     if existing:
-        before = _json_dumps(_model_dict(existing, ["id", "goal_id", "asset_id", "allocated_amount", "created_at", "updated_at"]))
         existing.allocated_amount = payload.allocated_amount
         existing.updated_at = datetime.utcnow()
+        finance_audit.updated(db, "goal_allocation", existing)
         db.add(existing)
-        db.commit()
+        _commit(db)
         db.refresh(existing)
-
-        _audit(
-            db,
-            entity_type="goal_allocation",
-            entity_id=existing.id,
-            action="updated",
-            before_json=before,
-            after_json=_json_dumps(_model_dict(existing, ["id", "goal_id", "asset_id", "allocated_amount", "created_at", "updated_at"])),
-        )
         return existing
 
     row = FinanceGoalAllocation(**payload.model_dump())
     db.add(row)
-    db.commit()
-    db.refresh(row)
+    db.flush()
 
-    _audit(
-        db,
-        entity_type="goal_allocation",
-        entity_id=row.id,
-        action="created",
-        before_json=None,
-        after_json=_json_dumps(_model_dict(row, ["id", "goal_id", "asset_id", "allocated_amount", "created_at", "updated_at"])),
-    )
+    finance_audit.created(db, "goal_allocation", row)
+    _commit(db)
+    db.refresh(row)
     return row
 
 
+def _history_page(
+    db: Session,
+    response: Response,
+    stmt,
+    *,
+    action: list[str] | None,
+    start_date: date | None,
+    end_date: date | None,
+    limit: int,
+    cursor: str | None,
+) -> list[FinanceAuditLog]:
+    # Newest first, keyset-paged like /transactions (X-Next-Cursor header).
+    if action:
+        stmt = stmt.where(FinanceAuditLog.action.in_(action))
+    if start_date:
+        stmt = stmt.where(FinanceAuditLog.created_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        stmt = stmt.where(FinanceAuditLog.created_at <= datetime.combine(end_date, datetime.max.time()))
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(seek_before(FinanceAuditLog.created_at, FinanceAuditLog.id, after))
+
+    limit = max(1, min(200, limit))
+    stmt = stmt.order_by(FinanceAuditLog.created_at.desc(), FinanceAuditLog.id.desc()).limit(limit + 1)
+    rows = db.execute(stmt).scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
+
+
 @router.get("/history", response_model=list[FinanceAuditLogOut])
 def list_finance_history(
+    response: Response,
     entity_type: str | None = None,
     entity_id: int | None = None,
+    action: list[str] | None = Query(None),
+    start_date: date | None = None,
+    end_date: date | None = None,
     limit: int = 100,
-    offset: int = 0,
+    cursor: str | None = None,
     db: Session = Depends(get_db),
 ):
-    limit = max(1, min(200, limit))
-    offset = max(0, offset)
-
     stmt = select(FinanceAuditLog)
     if entity_type:
         stmt = stmt.where(FinanceAuditLog.entity_type == entity_type)
     if entity_id is not None:
         stmt = stmt.where(FinanceAuditLog.entity_id == entity_id)
+    return _history_page(
+        db, response, stmt,
+        action=action, start_date=start_date, end_date=end_date, limit=limit, cursor=cursor,
+    )
 
-    stmt = stmt.order_by(FinanceAuditLog.created_at.desc(), FinanceAuditLog.id.desc()).limit(limit).offset(offset)
-    return db.execute(stmt).scalars().all()
+
+@router.get("/history/{entity_type}/{entity_id}", response_model=list[FinanceAuditTimelineEntryOut])
+def finance_entity_timeline(
+    entity_type: str,
+    entity_id: int,
+    response: Response,
+    action: list[str] | None = Query(None),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    # One entity's changes, newest first, each with the old and new value of every column it changed.
+    stmt = select(FinanceAuditLog).where(
+        FinanceAuditLog.entity_type == entity_type,
+        FinanceAuditLog.entity_id == entity_id,
+    )
+    rows = _history_page(
+        db, response, stmt,
+        action=action, start_date=start_date, end_date=end_date, limit=limit, cursor=cursor,
+    )
+    return [FinanceAuditTimelineEntryOut(**vars(e)) for e in finance_audit.timeline(db, entity_type, entity_id, rows)]
+
+
+@router.get("/history/{entity_type}/{entity_id}/state", response_model=FinanceAuditStateOut)
+def finance_entity_state(entity_type: str, entity_id: int, at: datetime | None = None, db: Session = Depends(get_db)):
+    # The entity as recorded by the audit log at `at` (default: latest entry).
+    found = finance_audit.state_at(db, entity_type, entity_id, at)
+    if found is None:
+        raise HTTPException(status_code=404, detail="No history for this entity at that time")
+    return FinanceAuditStateOut(entity_type=entity_type, entity_id=entity_id, **vars(found))
 
 
 # --- Dashboard / analytics ---
@@ -1121,66 +1043,40 @@ def category_spend(year: int, month: int, db: Session = Depends(get_db)):
 
 
 @router.get("/analytics/cashflow", response_model=list[FinanceCashflowPointOut])
-def cashflow(last_n_months: int | None = None, db: Session = Depends(get_db)):
-    # Monthly rollup based on UTC timestamps.
-    # Default: start from the first transaction month (avoids empty past months).
-    now = datetime.utcnow()
-
-    first_txn_at = db.execute(select(func.min(FinanceTransaction.transacted_at))).scalar()
-    if not first_txn_at:
-        return []
-
-    start_year = first_txn_at.year
-    start_month = first_txn_at.month
-
-    if last_n_months is not None:
-        last_n_months = max(1, min(240, last_n_months))
-        window_year = now.year
-        window_month = now.month - (last_n_months - 1)
-        while window_month <= 0:
-            window_month += 12
-            window_year -= 1
-
-        # Use whichever is later: first transaction month OR requested window.
-        if (window_year, window_month) > (start_year, start_month):
-            start_year, start_month = window_year, window_month
-
-    start = datetime(start_year, start_month, 1)
-
-    ym = func.date_format(FinanceTransaction.transacted_at, "%Y-%m")
-
-    income_stmt = (
-        select(ym.label("month"), func.coalesce(func.sum(FinanceTransaction.amount), 0).label("income"))
-        .where(FinanceTransaction.txn_type == "income", FinanceTransaction.transacted_at >= start)
-        .group_by(ym)
-    )
-
-    expense_stmt = (
-        select(ym.label("month"), func.coalesce(func.sum(FinanceTransaction.amount), 0).label("expense"))
-        .where(
-            FinanceTransaction.txn_type.in_(["expense", "liability_payment"]),
-            FinanceTransaction.transacted_at >= start,
+def cashflow(
+    granularity: str = Query("month", pattern="^(week|month|quarter)$"),
+    last_n: int | None = Query(None, ge=1),
+    last_n_months: int | None = Query(None, ge=1),
+    db: Session = Depends(get_db),
+):
+    # Income / expense / savings per period (UTC), from the first transaction's period
+    # (or the last `last_n`) through the current one. `last_n_months` is the older
+    # name of `last_n` for monthly buckets.
+    points = finance_cashflow.series(db, granularity, last_n if last_n is not None else last_n_months)
+    return [
+        FinanceCashflowPointOut(month=p.period, period=p.period, income=p.income, expense=p.expense, savings=p.savings)
+        for p in points
+    ]
+
+
+@router.get("/net-worth/history", response_model=list[FinanceNetWorthPointOut])
+def net_worth_history(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    granularity: str | None = Query(None, pattern="^(day|week|month|quarter)$"),
+    max_points: int | None = Query(None, ge=2),
+    db: Session = Depends(get_db),
+):
+    # Daily closing totals from net_worth_snapshots (from the first stored day when
+    # start_date is omitted) plus today's live value. `granularity` keeps each period's
+    # closing day only; without it, `max_points` picks the finest one that fits.
+    points = net_worth.history(db, start_date, end_date, granularity, max_points)
+    return [
+        FinanceNetWorthPointOut(
+            date=p.date,
+            total_assets=p.total_assets,
+            total_liabilities=p.total_liabilities,
+            net_worth=p.net_worth,
         )
-        .group_by(ym)
-    )
-
-    income_rows = {r.month: r.income for r in db.execute(income_stmt).all()}
-    expense_rows = {r.month: r.expense for r in db.execute(expense_stmt).all()}
-
-    # build continuous months from start to current month (inclusive)
-    out: list[FinanceCashflowPointOut] = []
-    months = (now.year - start_year) * 12 + (now.month - start_month) + 1
-    months = max(1, min(240, months))
-
-    y, m = start_year, start_month
-    for _ in range(months):
-        key = f"{y:04d}-{m:02d}"
-        inc = income_rows.get(key, 0)
-        exp = expense_rows.get(key, 0)
-        out.append(FinanceCashflowPointOut(month=key, income=inc, expense=exp, savings=inc - exp))
-        m += 1
-        if m == 13:
-            m = 1
-            y += 1
-
-    return out
+        for p in points
+    ]
@@ -4,22 +4,29 @@ Routes: /api/finance/*
 """
 from __future__ import annotations
 
+import io
 from datetime import date, datetime, timedelta
 from typing import Any, Optional
 from collections import defaultdict
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import func, text
+from sqlalchemy import case, func, select, text
 from sqlalchemy.orm import Session
 
+from ..db.fulltext import fulltext_match
+from ..db.keyset import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, seek_before
 from ..db.session import get_db
 from ..models.fin_account import FinAccount
 from ..models.fin_budget import FinBudget
 from ..models.fin_category import FinCategory
 from ..models.fin_goal import FinGoal
+from ..models.fin_monthly_total import FinMonthlyTotal
 from ..models.fin_subscription import FinSubscription
 from ..models.fin_transaction import FinTransaction
+from ..services import autopost, fin_balance, fin_budgets, fin_cache, fin_category_tree, fin_export, fin_forecast, fin_import, fin_insights, fin_ledger, fin_rollup, fin_spend_stats, fin_subscriptions, reconcile
+from ..services.fin_cache import RefData, refdata
 
 router = APIRouter(prefix="/finance", tags=["finance-new"])
 
@@ -69,7 +76,10 @@ def seed_categories(db: Session = Depends(get_db)):
         c = FinCategory(name=name, cat_type=cat_type, color=color, icon=icon, sort_order=sort_order, is_default=True)
         db.add(c)
         cats.append(c)
+    db.flush()
+    fin_category_tree.rebuild(db)
     db.commit()
+    fin_cache.bump(fin_cache.REFDATA)
     return {"seeded": len(cats)}
 
 
@@ -99,8 +109,9 @@ def list_accounts(db: Session = Depends(get_db)):
 def create_account(payload: AccountIn, db: Session = Depends(get_db)):
     if payload.is_default:
         db.query(FinAccount).update({"is_default": False})
-    acc = FinAccount(**payload.model_dump())
+    acc = FinAccount(**payload.model_dump(), opening_balance=payload.balance)
     db.add(acc); db.commit(); db.refresh(acc)
+    fin_cache.bump(fin_cache.REFDATA)
     return acc
 
 @router.patch("/accounts/{acc_id}", response_model=AccountOut)
@@ -109,15 +120,47 @@ def update_account(acc_id: int, payload: AccountIn, db: Session = Depends(get_db
     if not acc: raise HTTPException(404, "Account not found")
     if payload.is_default:
         db.query(FinAccount).filter(FinAccount.id != acc_id).update({"is_default": False})
+    # A manual balance edit is a correction, not a transaction
+    acc.opening_balance += payload.balance - acc.balance
     for k, v in payload.model_dump(exclude_none=True).items():
         setattr(acc, k, v)
-    db.commit(); db.refresh(acc); return acc
+    db.commit(); db.refresh(acc)
+    fin_cache.bump(fin_cache.REFDATA)
+    return acc
 
 @router.delete("/accounts/{acc_id}", status_code=204)
 def delete_account(acc_id: int, db: Session = Depends(get_db)):
     acc = db.get(FinAccount, acc_id)
     if not acc: raise HTTPException(404, "Account not found")
+    fin_balance.forget_account(db, acc_id)
     db.delete(acc); db.commit()
+    fin_cache.bump(fin_cache.REFDATA, fin_cache.TRANSACTIONS)
+
+@router.get("/accounts/{acc_id}/balance-history")
+def account_balance_history(
+    acc_id: int,
+    granularity: str = Query("day", pattern="^(day|month)$"),
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+) -> Any:
+    """Closing balance per day or month. Defaults to the last 30 days / 12 months."""
+    end = to_date or date.today()
+    if from_date:
+        start = from_date
+    elif granularity == "day":
+        start = end - timedelta(days=29)
+    else:
+        start = date(end.year - 1, end.month, 1)
+    if start > end:
+        raise HTTPException(400, "from_date must not be after to_date")
+    if granularity == "day" and (end - start).days > 3660:
+        raise HTTPException(400, "Daily history is limited to 10 years; use granularity=month")
+    try:
+        points = fin_balance.series(db, acc_id, granularity, start, end)
+    except LookupError:
+        raise HTTPException(404, "Account not found")
+    return {"account_id": acc_id, "granularity": granularity, "points": points}
 
 
 # ── Categories ─────────────────────────────────────────────────────────────────
@@ -148,22 +191,45 @@ def list_categories(cat_type: Optional[str] = None, db: Session = Depends(get_db
 
 @router.post("/categories", response_model=CategoryOut, status_code=201)
 def create_category(payload: CategoryIn, db: Session = Depends(get_db)):
+    if payload.parent_id and not db.get(FinCategory, payload.parent_id):
+        raise HTTPException(400, "Parent category not found")
     cat = FinCategory(**payload.model_dump(), is_default=False, sort_order=99)
-    db.add(cat); db.commit(); db.refresh(cat); return cat
+    db.add(cat); db.flush()
+    fin_category_tree.add(db, cat.id, cat.parent_id)
+    db.commit(); db.refresh(cat)
+    fin_cache.bump(fin_cache.REFDATA)
+    return cat
 
 @router.patch("/categories/{cat_id}", response_model=CategoryOut)
 def update_category(cat_id: int, payload: CategoryIn, db: Session = Depends(get_db)):
     cat = db.get(FinCategory, cat_id)
     if not cat: raise HTTPException(404, "Category not found")
-    for k, v in payload.model_dump(exclude_none=True).items():
+    # parent_id: null moves the category to the top level only when sent explicitly
+    parent_id = payload.parent_id if "parent_id" in payload.model_fields_set else cat.parent_id
+    if parent_id != cat.parent_id:
+        if parent_id and not db.get(FinCategory, parent_id):
+            raise HTTPException(400, "Parent category not found")
+        try:
+            fin_category_tree.move(db, cat.id, parent_id)
+        except ValueError as exc:
+            raise HTTPException(400, str(exc))
+        cat.parent_id = parent_id
+    for k, v in payload.model_dump(exclude_none=True, exclude={"parent_id"}).items():
         setattr(cat, k, v)
-    db.commit(); db.refresh(cat); return cat
+    db.commit(); db.refresh(cat)
+    fin_cache.bump(fin_cache.REFDATA)
+    return cat
 
 @router.delete("/categories/{cat_id}", status_code=204)
 def delete_category(cat_id: int, db: Session = Depends(get_db)):
+    """Its transactions become uncategorized; its sub-categories move up a level."""
     cat = db.get(FinCategory, cat_id)
     if not cat or cat.is_default: raise HTTPException(400, "Cannot delete default category")
+    fin_rollup.reassign_category(db, cat_id)
+    fin_spend_stats.reassign_category(db, cat_id)
+    fin_category_tree.remove(db, cat)
     db.delete(cat); db.commit()
+    fin_cache.bump(fin_cache.REFDATA, fin_cache.TRANSACTIONS)
 
 
 # ── Transactions ───────────────────────────────────────────────────────────────
@@ -192,10 +258,10 @@ class TransactionOut(BaseModel):
     notes: Optional[str]
     txn_date: str
     created_at: str
+    unusual: bool = False  # expense far above its category's usual amounts
 
-def _enrich_txn(t: FinTransaction, db: Session) -> TransactionOut:
-    cat = db.get(FinCategory, t.category_id) if t.category_id else None
-    acc = db.get(FinAccount, t.account_id) if t.account_id else None
+def _txn_out(t: FinTransaction, cat: Any, account_name: Optional[str], unusual: bool = False) -> TransactionOut:
+    """*cat* is anything with name/color/icon (CategoryRef, FinCategory) or None."""
     return TransactionOut(
         id=t.id, amount=t.amount, txn_type=t.txn_type,
         category_id=t.category_id,
@@ -203,28 +269,59 @@ def _enrich_txn(t: FinTransaction, db: Session) -> TransactionOut:
         category_color=cat.color if cat else None,
         category_icon=cat.icon if cat else None,
         account_id=t.account_id,
-        account_name=acc.name if acc else None,
+        account_name=account_name,
         payment_method=t.payment_method,
         notes=t.notes,
         txn_date=t.txn_date.isoformat() if hasattr(t.txn_date, 'isoformat') else str(t.txn_date),
         created_at=t.created_at.isoformat(),
+        unusual=unusual,
     )
 
-def _apply_balance(db: Session, account_id: Optional[int], txn_type: str, amount: float, direction: int = 1):
-    """direction=1 apply, -1 reverse."""
-    if not account_id: return
-    acc = db.get(FinAccount, account_id)
-    if not acc: return
-    delta = amount * direction
-    if txn_type == "income":
-        acc.balance += delta
-    else:
-        acc.balance -= delta
+def _enrich_txn(t: FinTransaction, ref: RefData, limits: Optional[dict[int, float]] = None) -> TransactionOut:
+    """*limits*: fin_spend_stats.thresholds(), to flag unusual expenses."""
+    acc = ref.account(t.account_id)
+    unusual = limits is not None and fin_spend_stats.is_unusual(limits, t.category_id, t.txn_type, t.amount)
+    return _txn_out(t, ref.category(t.category_id), acc.name if acc else None, unusual)
+
+def _apply_balance(db: Session, old: Optional[fin_ledger.TxnFacts], new: Optional[fin_ledger.TxnFacts]):
+    """Reverse *old* and apply *new* as SQL-side increments, netted per account
+    (an edit within one account is a single UPDATE)."""
+    deltas: dict[int, float] = defaultdict(float)
+    if old and old.account_id:
+        deltas[old.account_id] -= fin_balance.balance_effect(old.txn_type, old.amount)
+    if new and new.account_id:
+        deltas[new.account_id] += fin_balance.balance_effect(new.txn_type, new.amount)
+    fin_balance.adjust_accounts(db, deltas)
+
+def _filter_txns(
+    db: Session,
+    q,
+    txn_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    account_id: Optional[int] = None,
+    search: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+):
+    """Apply the shared transaction-list filters to a Query or Select.
+    Returns (filtered, search relevance score or None)."""
+    if txn_type: q = q.where(FinTransaction.txn_type == txn_type)
+    if category_id: q = q.where(FinTransaction.category_id == category_id)
+    if account_id: q = q.where(FinTransaction.account_id == account_id)
+    if from_date: q = q.where(FinTransaction.txn_date >= from_date)
+    if to_date: q = q.where(FinTransaction.txn_date <= f"{to_date}T23:59:59")
+    score = None
+    if search:
+        clause, score = fulltext_match(db, [FinTransaction.notes], search)
+        q = q.where(clause)
+    return q, score
 
 @router.get("/transactions", response_model=list[TransactionOut])
 def list_transactions(
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1),
     offset: int = 0,
+    cursor: Optional[str] = None,
     txn_type: Optional[str] = None,
     category_id: Optional[int] = None,
     account_id: Optional[int] = None,
@@ -233,15 +330,80 @@ def list_transactions(
     to_date: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
+    """Newest first. Pass the X-Next-Cursor header of a page as ?cursor= to get the
+    next one (keyset seek on txn_date, id); offset is kept for older clients."""
     q = db.query(FinTransaction).order_by(FinTransaction.txn_date.desc(), FinTransaction.id.desc())
-    if txn_type: q = q.filter(FinTransaction.txn_type == txn_type)
-    if category_id: q = q.filter(FinTransaction.category_id == category_id)
-    if account_id: q = q.filter(FinTransaction.account_id == account_id)
-    if search: q = q.filter(FinTransaction.notes.ilike(f"%{search}%"))
-    if from_date: q = q.filter(FinTransaction.txn_date >= from_date)
-    if to_date: q = q.filter(FinTransaction.txn_date <= f"{to_date}T23:59:59")
-    txns = q.offset(offset).limit(limit).all()
-    return [_enrich_txn(t, db) for t in txns]
+    q, _ = _filter_txns(db, q, txn_type, category_id, account_id, search, from_date, to_date)
+    if cursor:
+        try:
+            q = q.filter(seek_before(FinTransaction.txn_date, FinTransaction.id, decode_cursor(cursor)))
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    else:
+        q = q.offset(offset)
+    txns = q.limit(limit + 1).all()
+    if len(txns) > limit:
+        txns = txns[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(txns[-1].txn_date, txns[-1].id)
+    ref, limits = refdata(db), fin_spend_stats.thresholds(db)
+    return [_enrich_txn(t, ref, limits) for t in txns]
+
+_EXPORT_COLUMNS = [
+    "id", "txn_date", "txn_type", "amount", "category", "account", "payment_method", "notes", "created_at",
+]
+
+@router.get("/transactions/export")
+def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    txn_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    account_id: Optional[int] = None,
+    search: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Stream every matching transaction (newest first) as CSV or NDJSON,
+    with category/account names joined in SQL."""
+    stmt = (
+        select(
+            FinTransaction.id, FinTransaction.txn_date, FinTransaction.txn_type, FinTransaction.amount,
+            FinCategory.name.label("category"), FinAccount.name.label("account"),
+            FinTransaction.payment_method, FinTransaction.notes, FinTransaction.created_at,
+        )
+        .outerjoin(FinCategory, FinCategory.id == FinTransaction.category_id)
+        .outerjoin(FinAccount, FinAccount.id == FinTransaction.account_id)
+        .order_by(FinTransaction.txn_date.desc(), FinTransaction.id.desc())
+    )
+    stmt, _ = _filter_txns(db, stmt, txn_type, category_id, account_id, search, from_date, to_date)
+
+    body = fin_export.ENCODERS[format](fin_export.stream_rows(db, stmt), _EXPORT_COLUMNS)
+    filename = f"transactions-{date.today():%Y%m%d}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        body = fin_export.gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=fin_export.MEDIA_TYPES[format], headers=headers)
+
+@router.get("/transactions/search", response_model=list[TransactionOut])
+def search_transactions(
+    q: str,
+    limit: int = Query(20, ge=1, le=200),
+    txn_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    account_id: Optional[int] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Best matches first: every word of *q* is a prefix search over notes."""
+    base, score = _filter_txns(db, db.query(FinTransaction), txn_type, category_id, account_id, q, from_date, to_date)
+    if score is None:
+        return []
+    txns = base.order_by(score.desc(), FinTransaction.txn_date.desc(), FinTransaction.id.desc()).limit(limit).all()
+    ref, limits = refdata(db), fin_spend_stats.thresholds(db)
+    return [_enrich_txn(t, ref, limits) for t in txns]
 
 @router.post("/transactions", response_model=TransactionOut, status_code=201)
 def create_transaction(payload: TransactionIn, db: Session = Depends(get_db)):
@@ -257,16 +419,56 @@ def create_transaction(payload: TransactionIn, db: Session = Depends(get_db)):
         subscription_id=payload.subscription_id,
     )
     db.add(t)
-    _apply_balance(db, payload.account_id, payload.txn_type, payload.amount, direction=1)
+    new = fin_ledger.facts(t)
+    _apply_balance(db, None, new)
+    fin_ledger.record_change(db, None, new)
     db.commit(); db.refresh(t)
-    return _enrich_txn(t, db)
+    fin_cache.bump(fin_cache.TRANSACTIONS)
+    return _enrich_txn(t, refdata(db), fin_spend_stats.thresholds(db))
+
+@router.post("/transactions/import")
+def import_transactions(
+    file: UploadFile = File(...),
+    date_col: str = "date",
+    amount_col: str = "amount",
+    type_col: Optional[str] = None,
+    category_col: Optional[str] = None,
+    account_col: Optional[str] = None,
+    notes_col: Optional[str] = None,
+    payment_method_col: Optional[str] = None,
+    date_format: Optional[str] = Query(None, description="strptime format; guessed per file when omitted"),
+    default_type: str = Query("expense", pattern="^(expense|income)$"),
+    signed_amounts: bool = Query(False, description="negative = expense, positive = income"),
+    account_id: Optional[int] = Query(None, description="account for rows without an account column"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+) -> Any:
+    """Stream a CSV into fin_transactions; bad rows are reported, the rest imported in one commit."""
+    columns = fin_import.ColumnMap(
+        date=date_col, amount=amount_col, txn_type=type_col, category=category_col,
+        account=account_col, notes=notes_col, payment_method=payment_method_col,
+    )
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = fin_import.import_csv(
+            db, lines, columns, date_format=date_format, default_type=default_type,
+            signed_amounts=signed_amounts, default_account_id=account_id, dry_run=dry_run,
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(400, str(e))
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+        fin_cache.bump(fin_cache.TRANSACTIONS)
+    return report.as_dict()
 
 @router.patch("/transactions/{txn_id}", response_model=TransactionOut)
 def update_transaction(txn_id: int, payload: TransactionIn, db: Session = Depends(get_db)):
     t = db.get(FinTransaction, txn_id)
     if not t: raise HTTPException(404, "Transaction not found")
-    # Reverse old
-    _apply_balance(db, t.account_id, t.txn_type, t.amount, direction=-1)
+    old = fin_ledger.facts(t)
     t.amount = payload.amount
     t.txn_type = payload.txn_type
     t.category_id = payload.category_id
@@ -275,17 +477,22 @@ def update_transaction(txn_id: int, payload: TransactionIn, db: Session = Depend
     t.notes = payload.notes
     if payload.txn_date:
         t.txn_date = datetime.fromisoformat(payload.txn_date)
-    # Apply new
-    _apply_balance(db, payload.account_id, payload.txn_type, payload.amount, direction=1)
+    new = fin_ledger.facts(t)
+    _apply_balance(db, old, new)
+    fin_ledger.record_change(db, old, new)
     db.commit(); db.refresh(t)
-    return _enrich_txn(t, db)
+    fin_cache.bump(fin_cache.TRANSACTIONS)
+    return _enrich_txn(t, refdata(db), fin_spend_stats.thresholds(db))
 
 @router.delete("/transactions/{txn_id}", status_code=204)
 def delete_transaction(txn_id: int, db: Session = Depends(get_db)):
     t = db.get(FinTransaction, txn_id)
     if not t: raise HTTPException(404, "Transaction not found")
-    _apply_balance(db, t.account_id, t.txn_type, t.amount, direction=-1)
+    old = fin_ledger.facts(t)
+    _apply_balance(db, old, None)
+    fin_ledger.record_change(db, old, None)
     db.delete(t); db.commit()
+    fin_cache.bump(fin_cache.TRANSACTIONS)
 
 
 # ── Budgets ────────────────────────────────────────────────────────────────────
@@ -306,35 +513,22 @@ class BudgetOut(BaseModel):
     spent: float = 0.0
     pct: float = 0.0
 
+def _budget_progress(db: Session, year: int, month: int, budgets: list[FinBudget], ref: RefData) -> list[BudgetOut]:
+    """Spent/pct for every budget of one month (see services/fin_budgets.py)."""
+    return [
+        BudgetOut(
+            id=p.budget.id, year=p.budget.year, month=p.budget.month,
+            category_id=p.budget.category_id,
+            category_name=p.category_name,
+            amount=p.budget.amount, spent=p.spent, pct=round(p.pct, 1),
+        )
+        for p in fin_budgets.progress(db, year, month, budgets, ref)
+    ]
+
 @router.get("/budgets", response_model=list[BudgetOut])
 def list_budgets(year: int, month: int, db: Session = Depends(get_db)):
     budgets = db.query(FinBudget).filter_by(year=year, month=month).all()
-    # Compute spent per category for this month
-    month_start = f"{year}-{month:02d}-01"
-    if month == 12:
-        month_end = f"{year+1}-01-01"
-    else:
-        month_end = f"{year}-{month+1:02d}-01"
-
-    rows: list[BudgetOut] = []
-    for b in budgets:
-        cat = db.get(FinCategory, b.category_id) if b.category_id else None
-        q = db.query(func.sum(FinTransaction.amount)).filter(
-            FinTransaction.txn_type == "expense",
-            FinTransaction.txn_date >= month_start,
-            FinTransaction.txn_date < month_end,
-        )
-        if b.category_id:
-            q = q.filter(FinTransaction.category_id == b.category_id)
-        spent = float(q.scalar() or 0)
-        pct = round(spent / b.amount * 100, 1) if b.amount > 0 else 0
-        rows.append(BudgetOut(
-            id=b.id, year=b.year, month=b.month,
-            category_id=b.category_id,
-            category_name=cat.name if cat else "Total",
-            amount=b.amount, spent=spent, pct=pct,
-        ))
-    return rows
+    return _budget_progress(db, year, month, budgets, refdata(db))
 
 @router.post("/budgets", response_model=BudgetOut, status_code=201)
 def upsert_budget(payload: BudgetIn, db: Session = Depends(get_db)):
@@ -344,11 +538,13 @@ def upsert_budget(payload: BudgetIn, db: Session = Depends(get_db)):
     if existing:
         existing.amount = payload.amount
         db.commit(); db.refresh(existing)
+        fin_cache.bump(fin_cache.BUDGETS)
         b = existing
     else:
         b = FinBudget(year=payload.year, month=payload.month, category_id=payload.category_id, amount=payload.amount)
         db.add(b); db.commit(); db.refresh(b)
-    cat = db.get(FinCategory, b.category_id) if b.category_id else None
+        fin_cache.bump(fin_cache.BUDGETS)
+    cat = refdata(db).category(b.category_id)
     return BudgetOut(id=b.id, year=b.year, month=b.month, category_id=b.category_id,
                      category_name=cat.name if cat else "Total", amount=b.amount, spent=0, pct=0)
 
@@ -357,6 +553,7 @@ def delete_budget(budget_id: int, db: Session = Depends(get_db)):
     b = db.get(FinBudget, budget_id)
     if not b: raise HTTPException(404, "Budget not found")
     db.delete(b); db.commit()
+    fin_cache.bump(fin_cache.BUDGETS)
 
 
 # ── Goals ─────────────────────────────────────────────────────────────────────
@@ -365,7 +562,7 @@ class GoalIn(BaseModel):
     name: str
     target_amount: float
     current_amount: float = 0.0
-    target_date: Optional[str] = None
+    target_date: Optional[date] = None
     notes: Optional[str] = None
     color: str = "blue"
 
@@ -374,7 +571,7 @@ class GoalOut(BaseModel):
     name: str
     target_amount: float
     current_amount: float
-    target_date: Optional[str]
+    target_date: Optional[date]
     notes: Optional[str]
     color: str
     is_active: bool
@@ -387,8 +584,7 @@ def _goal_out(g: FinGoal) -> GoalOut:
     days_left = None
     daily_needed = None
     if g.target_date:
-        td = date.fromisoformat(g.target_date)
-        days_left = (td - date.today()).days
+        days_left = (g.target_date - date.today()).days
         remaining = g.target_amount - g.current_amount
         if days_left > 0 and remaining > 0:
             daily_needed = round(remaining / days_left, 0)
@@ -433,7 +629,7 @@ class SubIn(BaseModel):
     name: str
     amount: float
     billing_cycle: str = "monthly"
-    next_billing_date: str
+    next_billing_date: date
     category_id: Optional[int] = None
     notes: Optional[str] = None
     is_active: bool = True
@@ -443,7 +639,7 @@ class SubOut(BaseModel):
     name: str
     amount: float
     billing_cycle: str
-    next_billing_date: str
+    next_billing_date: date
     category_id: Optional[int]
     category_name: Optional[str]
     category_color: Optional[str]
@@ -452,16 +648,10 @@ class SubOut(BaseModel):
     days_until: int
     monthly_equivalent: float
 
-def _sub_out(s: FinSubscription, db: Session) -> SubOut:
-    cat = db.get(FinCategory, s.category_id) if s.category_id else None
-    try:
-        nd = date.fromisoformat(s.next_billing_date)
-        days_until = (nd - date.today()).days
-    except Exception:
-        days_until = 0
-    # Normalize to monthly
-    cycle_map = {"weekly": 4.33, "monthly": 1, "yearly": 1/12}
-    monthly = round(s.amount * cycle_map.get(s.billing_cycle, 1), 2)
+def _sub_out(s: FinSubscription, ref: RefData) -> SubOut:
+    cat = ref.category(s.category_id)
+    days_until = (s.next_billing_date - date.today()).days
+    monthly = round(fin_subscriptions.monthly_equivalent(s.amount, s.billing_cycle), 2)
     return SubOut(
         id=s.id, name=s.name, amount=s.amount, billing_cycle=s.billing_cycle,
         next_billing_date=s.next_billing_date,
@@ -475,26 +665,39 @@ def _sub_out(s: FinSubscription, db: Session) -> SubOut:
 @router.get("/subscriptions", response_model=list[SubOut])
 def list_subscriptions(db: Session = Depends(get_db)):
     subs = db.query(FinSubscription).order_by(FinSubscription.next_billing_date).all()
-    return [_sub_out(s, db) for s in subs]
+    ref = refdata(db)
+    return [_sub_out(s, ref) for s in subs]
+
+@router.get("/subscriptions/projection")
+def subscription_projection(months: int = Query(12, ge=1, le=36), db: Session = Depends(get_db)):
+    """Every upcoming charge of active subscriptions, totalled per month and per category."""
+    return fin_subscriptions.project(db, months).as_dict()
 
 @router.post("/subscriptions", response_model=SubOut, status_code=201)
 def create_subscription(payload: SubIn, db: Session = Depends(get_db)):
-    s = FinSubscription(**payload.model_dump()); db.add(s); db.commit(); db.refresh(s)
-    return _sub_out(s, db)
+    s = FinSubscription(**payload.model_dump(), billing_day=payload.next_billing_date.day)
+    db.add(s); db.commit(); db.refresh(s)
+    fin_cache.bump(fin_cache.SUBSCRIPTIONS)
+    return _sub_out(s, refdata(db))
 
 @router.patch("/subscriptions/{sub_id}", response_model=SubOut)
 def update_subscription(sub_id: int, payload: SubIn, db: Session = Depends(get_db)):
     s = db.get(FinSubscription, sub_id)
     if not s: raise HTTPException(404, "Subscription not found")
+    if payload.next_billing_date != s.next_billing_date:
+        s.billing_day = payload.next_billing_date.day  # a new date set by hand is the new anchor
     for k, v in payload.model_dump(exclude_none=True).items():
         setattr(s, k, v)
-    db.commit(); db.refresh(s); return _sub_out(s, db)
+    db.commit(); db.refresh(s)
+    fin_cache.bump(fin_cache.SUBSCRIPTIONS)
+    return _sub_out(s, refdata(db))
 
 @router.delete("/subscriptions/{sub_id}", status_code=204)
 def delete_subscription(sub_id: int, db: Session = Depends(get_db)):
     s = db.get(FinSubscription, sub_id)
     if not s: raise HTTPException(404, "Subscription not found")
     db.delete(s); db.commit()
+    fin_cache.bump(fin_cache.SUBSCRIPTIONS)
 
 
 # ── Dashboard / Analytics ──────────────────────────────────────────────────────
@@ -511,51 +714,71 @@ class DashboardOut(BaseModel):
     accounts: list[AccountOut]
     recent_transactions: list[TransactionOut]
 
-@router.get("/dashboard")
-def get_dashboard(db: Session = Depends(get_db)) -> Any:
-    today_str = date.today().isoformat()
-    now = date.today()
-    month_start = f"{now.year}-{now.month:02d}-01"
-
-    total_balance = float(db.query(func.sum(FinAccount.balance)).scalar() or 0)
-
-    def _sum(txn_type: str, from_d: str, to_d: Optional[str] = None) -> float:
-        q = db.query(func.sum(FinTransaction.amount)).filter(
-            FinTransaction.txn_type == txn_type,
-            FinTransaction.txn_date >= from_d,
-        )
-        if to_d:
-            q = q.filter(FinTransaction.txn_date <= f"{to_d}T23:59:59")
-        return float(q.scalar() or 0)
-
-    today_spent = _sum("expense", today_str, today_str)
-    today_income = _sum("income", today_str, today_str)
-    month_spent = _sum("expense", month_start)
-    month_income = _sum("income", month_start)
+_dashboard_cache = fin_cache.VersionedCache(
+    fin_cache.TRANSACTIONS, fin_cache.REFDATA, fin_cache.SUBSCRIPTIONS, ttl=30, maxsize=2,
+)
+
+def _dashboard_kpis(db: Session, today: date) -> Any:
+    """Every transaction/balance scalar on the dashboard in one statement:
+    conditional aggregates over today's transactions plus scalar subqueries for
+    the balance and month totals (from the rollup)."""
+    day_start = datetime.combine(today, datetime.min.time())
+
+    def _today(kind: str):
+        return func.coalesce(func.sum(case((FinTransaction.txn_type == kind, FinTransaction.amount), else_=0)), 0)
+
+    def _month(kind: str):
+        return select(func.coalesce(func.sum(FinMonthlyTotal.total), 0)).where(
+            FinMonthlyTotal.year == today.year, FinMonthlyTotal.month == today.month,
+            FinMonthlyTotal.txn_type == kind,
+        ).scalar_subquery()
+
+    return db.execute(select(
+        _today("expense").label("today_spent"),
+        _today("income").label("today_income"),
+        _month("expense").label("month_spent"),
+        _month("income").label("month_income"),
+        select(func.coalesce(func.sum(FinAccount.balance), 0)).scalar_subquery().label("total_balance"),
+    ).where(
+        FinTransaction.txn_date >= day_start,
+        FinTransaction.txn_date < day_start + timedelta(days=1),
+    )).one()
+
+def _build_dashboard(db: Session, today: date) -> dict:
+    k = _dashboard_kpis(db, today)
+    month_spent, month_income = float(k.month_spent), float(k.month_income)
     savings = month_income - month_spent
     savings_rate = round(savings / month_income * 100, 1) if month_income > 0 else 0
 
-    # Monthly subscriptions cost
-    subs = db.query(FinSubscription).filter_by(is_active=True).all()
-    cycle_map = {"weekly": 4.33, "monthly": 1, "yearly": 1/12}
-    total_subs = sum(s.amount * cycle_map.get(s.billing_cycle, 1) for s in subs)
-
     accounts = db.query(FinAccount).order_by(FinAccount.is_default.desc()).all()
-    recent = db.query(FinTransaction).order_by(FinTransaction.txn_date.desc(), FinTransaction.id.desc()).limit(8).all()
+    recent = db.execute(
+        select(FinTransaction, FinCategory, FinAccount.name)
+        .outerjoin(FinCategory, FinCategory.id == FinTransaction.category_id)
+        .outerjoin(FinAccount, FinAccount.id == FinTransaction.account_id)
+        .order_by(FinTransaction.txn_date.desc(), FinTransaction.id.desc())
+        .limit(8)
+    ).all()
 
     return {
-        "total_balance": _money(total_balance),
-        "today_spent": _money(today_spent),
-        "today_income": _money(today_income),
+        "total_balance": _money(float(k.total_balance)),
+        "today_spent": _money(float(k.today_spent)),
+        "today_income": _money(float(k.today_income)),
         "this_month_spent": _money(month_spent),
         "this_month_income": _money(month_income),
         "this_month_savings": _money(savings),
         "savings_rate": savings_rate,
-        "total_monthly_subs": _money(total_subs),
+        "total_monthly_subs": _money(fin_subscriptions.project(db, today=today).monthly_cost),
         "accounts": [AccountOut.model_validate(a) for a in accounts],
-        "recent_transactions": [_enrich_txn(t, db) for t in recent],
+        "recent_transactions": [_txn_out(t, cat, acc_name) for t, cat, acc_name in recent],
     }
 
+@router.get("/dashboard")
+def get_dashboard(db: Session = Depends(get_db)) -> Any:
+    """Three queries (KPIs, accounts, recent) plus the cached subscription
+    projection; cached for 30s or until the data changes."""
+    today = date.today()
+    return _dashboard_cache.get_or_load(db, today, lambda: _build_dashboard(db, today))
+
 
 class CategorySpendItem(BaseModel):
     category_id: Optional[int]
@@ -566,41 +789,60 @@ class CategorySpendItem(BaseModel):
     count: int
     pct: float
 
-@router.get("/analytics/category-spend", response_model=list[CategorySpendItem])
-def category_spend(year: int, month: int, db: Session = Depends(get_db)):
-    month_start = f"{year}-{month:02d}-01"
-    if month == 12:
-        month_end = f"{year+1}-01-01"
+def _tree_level_totals(db: Session, year: int, month: int, parent_id: Optional[int], ref: RefData) -> dict[Optional[int], tuple[float, int]]:
+    """Spend of each direct sub-category of *parent_id* (top level when None)
+    including everything below it, plus the parent's own spend (or the
+    uncategorized spend at the top level)."""
+    subtree = fin_category_tree.month_subtree_totals(db, year, month)
+    rows = {c: subtree[c] for c in fin_category_tree.children(ref, parent_id) if c in subtree}
+    if parent_id is None:
+        own = subtree.get(None, (0.0, 0))
+        own_key = None
     else:
-        month_end = f"{year}-{month+1:02d}-01"
-
-    rows = db.query(
-        FinTransaction.category_id,
-        func.sum(FinTransaction.amount).label("total"),
-        func.count(FinTransaction.id).label("cnt"),
-    ).filter(
-        FinTransaction.txn_type == "expense",
-        FinTransaction.txn_date >= month_start,
-        FinTransaction.txn_date < month_end,
-    ).group_by(FinTransaction.category_id).all()
+        total, cnt = subtree.get(parent_id, (0.0, 0))
+        own = (total - sum(t for t, _ in rows.values()), cnt - sum(n for _, n in rows.values()))
+        own_key = parent_id
+    if own[1] > 0:
+        rows[own_key] = own
+    return rows
 
-    grand_total = sum(float(r.total) for r in rows) or 1
+@router.get("/analytics/category-spend", response_model=list[CategorySpendItem])
+def category_spend(
+    year: int,
+    month: int,
+    rollup: bool = Query(False, description="aggregate sub-categories into one level of the tree"),
+    parent_id: Optional[int] = Query(None, description="with rollup: the level below this category (top level when omitted)"),
+    db: Session = Depends(get_db),
+):
+    if rollup:
+        rows = _tree_level_totals(db, year, month, parent_id, refdata(db))
+    else:
+        rows = fin_rollup.month_totals(db, year, month)
+    grand_total = sum(total for total, _ in rows.values()) or 1
 
+    ref = refdata(db)
     result = []
-    for r in rows:
-        cat = db.get(FinCategory, r.category_id) if r.category_id else None
+    for cat_id, (total, cnt) in rows.items():
+        cat = ref.category(cat_id)
         result.append(CategorySpendItem(
-            category_id=r.category_id,
+            category_id=cat_id,
             category_name=cat.name if cat else "Uncategorized",
             category_color=cat.color if cat else "zinc",
             category_icon=cat.icon if cat else "circle",
-            total=round(float(r.total), 2),
-            count=r.cnt,
-            pct=round(float(r.total) / grand_total * 100, 1),
+            total=round(total, 2),
+            count=cnt,
+            pct=round(total / grand_total * 100, 1),
         ))
     return sorted(result, key=lambda x: x.total, reverse=True)
 
 
+@router.get("/analytics/forecast")
+def spending_forecast(db: Session = Depends(get_db)):
+    """Month-end projection with 80% bands, per category and in total, and the
+    projected breach date of every budget of the month."""
+    return fin_forecast.month_end(db)
+
+
 class DailySpend(BaseModel):
     date: str
     expense: float
@@ -645,102 +887,46 @@ class InsightItem(BaseModel):
 
 @router.get("/analytics/insights", response_model=list[InsightItem])
 def get_insights(db: Session = Depends(get_db)):
-    now = date.today()
-    month_start = f"{now.year}-{now.month:02d}-01"
-    last_month_start = f"{(now.replace(day=1) - timedelta(days=1)).replace(day=1).isoformat()}"
-    last_month_end = now.replace(day=1).isoformat()
-
-    def _month_spend(from_d: str, to_d: Optional[str] = None) -> float:
-        q = db.query(func.sum(FinTransaction.amount)).filter(
-            FinTransaction.txn_type == "expense",
-            FinTransaction.txn_date >= from_d,
-        )
-        if to_d: q = q.filter(FinTransaction.txn_date < to_d)
-        return float(q.scalar() or 0)
-
-    this_spend = _month_spend(month_start)
-    last_spend = _month_spend(last_month_start, last_month_end)
-
-    insights: list[InsightItem] = []
-
-    # MoM comparison
-    if last_spend > 0:
-        diff_pct = round((this_spend - last_spend) / last_spend * 100, 0)
-        if diff_pct > 20:
-            insights.append(InsightItem(type="warning", title="Spending up this month",
-                body=f"You've spent {diff_pct}% more than last month (₹{int(this_spend):,} vs ₹{int(last_spend):,})"))
-        elif diff_pct < -10:
-            insights.append(InsightItem(type="info", title="Great spending control",
-                body=f"You've spent {abs(diff_pct)}% less than last month. Keep it up!"))
-
-    # Daily average & burn rate
-    days_elapsed = now.day
-    if days_elapsed > 0 and this_spend > 0:
-        daily_avg = this_spend / days_elapsed
-        days_in_month = 30
-        projected = daily_avg * days_in_month
-        insights.append(InsightItem(type="info", title="Burn rate",
-            body=f"Spending ₹{int(daily_avg):,}/day. Projected month total: ₹{int(projected):,}"))
-
-    # Top category
-    cat_rows = db.query(
-        FinTransaction.category_id,
-        func.sum(FinTransaction.amount).label("total"),
-    ).filter(
-        FinTransaction.txn_type == "expense",
-        FinTransaction.txn_date >= month_start,
-    ).group_by(FinTransaction.category_id).order_by(func.sum(FinTransaction.amount).desc()).first()
+    return fin_insights.insights(db)
 
-    if cat_rows:
-        cat = db.get(FinCategory, cat_rows.category_id) if cat_rows.category_id else None
-        if cat:
-            insights.append(InsightItem(type="info", title=f"Top category: {cat.name}",
-                body=f"₹{int(float(cat_rows.total)):,} spent on {cat.name} this month"))
+@router.get("/analytics/insights/timings")
+def get_insights_timings():
+    """Cache hit/miss counters and per-rule timings of the last evaluation."""
+    return fin_insights.stats()
 
-    # High-spend day of week
-    rows = db.query(
-        func.dayofweek(FinTransaction.txn_date).label("dow"),
-        func.sum(FinTransaction.amount).label("total"),
-    ).filter(
-        FinTransaction.txn_type == "expense",
-        FinTransaction.txn_date >= month_start,
-    ).group_by("dow").order_by(func.sum(FinTransaction.amount).desc()).first()
-
-    if rows:
-        days = ["", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-        day_name = days[int(rows.dow)] if 1 <= int(rows.dow) <= 7 else "Unknown"
-        insights.append(InsightItem(type="tip", title=f"High spend day: {day_name}",
-            body=f"You spend the most on {day_name}s. Consider planning ahead."))
-
-    # Budget alerts
-    budgets = db.query(FinBudget).filter_by(year=now.year, month=now.month).all()
-    for b in budgets:
-        spent_q = db.query(func.sum(FinTransaction.amount)).filter(
-            FinTransaction.txn_type == "expense",
-            FinTransaction.txn_date >= month_start,
-        )
-        if b.category_id:
-            spent_q = spent_q.filter(FinTransaction.category_id == b.category_id)
-        spent = float(spent_q.scalar() or 0)
-        pct = spent / b.amount * 100 if b.amount > 0 else 0
-        cat = db.get(FinCategory, b.category_id) if b.category_id else None
-        name = cat.name if cat else "Total"
-        if pct >= 100:
-            insights.append(InsightItem(type="warning", title=f"Budget exceeded: {name}",
-                body=f"Spent ₹{int(spent):,} of ₹{int(b.amount):,} budget"))
-        elif pct >= 80:
-            insights.append(InsightItem(type="warning", title=f"Budget warning: {name}",
-                body=f"{int(pct)}% used — only ₹{int(b.amount - spent):,} left"))
-
-    # Subscriptions reminder
-    subs = db.query(FinSubscription).filter(
-        FinSubscription.is_active == True,  # noqa: E712
-        FinSubscription.next_billing_date <= (now + timedelta(days=7)).isoformat(),
-        FinSubscription.next_billing_date >= now.isoformat(),
-    ).all()
-    if subs:
-        names = ", ".join(s.name for s in subs[:3])
-        insights.append(InsightItem(type="tip", title="Subscriptions due soon",
-            body=f"{names} billing in the next 7 days"))
 
-    return insights[:8]
+# ── Reconciliation ─────────────────────────────────────────────────────────────
+
+def _reconcile(db: Session, fix: bool) -> dict:
+    checked, drifted = reconcile.reconcile(db)
+    if fix and drifted:
+        reconcile.fix(db, drifted)
+        db.commit()
+        fin_cache.bump(fin_cache.REFDATA, fin_cache.TRANSACTIONS)
+    return {"checked": checked, "drifted": [d.as_dict() for d in drifted], "fixed": fix and bool(drifted)}
+
+@router.get("/reconcile")
+def get_reconciliation(db: Session = Depends(get_db)):
+    """Stored vs recomputed balances of fin_accounts and the legacy assets/liabilities."""
+    return _reconcile(db, fix=False)
+
+@router.post("/reconcile")
+def fix_reconciliation(db: Session = Depends(get_db)):
+    """Reset every drifted balance to its recomputed value, in one commit."""
+    return _reconcile(db, fix=True)
+
+
+# ── Automatic posting ──────────────────────────────────────────────────────────
+
+@router.get("/autopost/runs")
+def get_autopost_runs():
+    """Metrics of the most recent automatic posting runs, newest first."""
+    return autopost.recent_runs()
+
+@router.post("/autopost/run")
+def run_autopost(db: Session = Depends(get_db)):
+    """Post every due subscription charge and auto-create recurring rule now."""
+    metrics = autopost.run(db, trigger="manual")
+    if metrics is None:
+        raise HTTPException(409, "An autopost run is already in progress")
+    return metrics.as_dict()
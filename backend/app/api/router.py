@@ -4,6 +4,7 @@ from .attendance import router as attendance_router
 from .backup import router as backup_router
 from .daily_log import router as daily_log_router
 from .dashboard import router as dashboard_router
+from .finance import router as finance_router
 from .finance_new import router as finance_new_router
 from .habits import router as habits_router
 from .life_calendar import router as life_calendar_router
@@ -26,6 +27,7 @@ router.include_router(life_calendar_router)
 router.include_router(weekly_reflection_router)
 router.include_router(backup_router)
 router.include_router(finance_new_router)
+router.include_router(finance_router)
 router.include_router(task_history_router)
 
 
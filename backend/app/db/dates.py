@@ -0,0 +1,90 @@
+"""Dialect-neutral date bucketing expressions.
+
+Each helper compiles to the native function of the connected database, so the
+same query runs on MySQL and on SQLite (where dates are ISO-8601 text):
+
+    week_key(col)     'YYYY-MM-DD' of the week's Monday
+    month_key(col)    'YYYY-MM'
+    quarter_key(col)  'YYYY-Qn'
+    weekday(col)      1 = Sunday … 7 = Saturday (MySQL DAYOFWEEK numbering)
+
+period_key(granularity, col) picks one of the first three by name; the keys
+sort chronologically as strings.
+"""
+from __future__ import annotations
+
+from sqlalchemy import Integer, String, cast, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class month_key(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+@compiles(month_key)
+def _month_key_default(element, compiler, **kw):
+    return compiler.process(func.date_format(*element.clauses, "%Y-%m"), **kw)
+
+
+@compiles(month_key, "sqlite")
+def _month_key_sqlite(element, compiler, **kw):
+    return compiler.process(func.strftime("%Y-%m", *element.clauses), **kw)
+
+
+class week_key(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+@compiles(week_key)
+def _week_key_default(element, compiler, **kw):
+    (col,) = element.clauses
+    return compiler.process(func.date_format(func.subdate(col, func.weekday(col)), "%Y-%m-%d"), **kw)
+
+
+@compiles(week_key, "sqlite")
+def _week_key_sqlite(element, compiler, **kw):
+    # 'weekday 0' moves forward to the next Sunday (or stays on one)
+    return compiler.process(func.date(*element.clauses, "weekday 0", "-6 days"), **kw)
+
+
+class quarter_key(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+@compiles(quarter_key)
+def _quarter_key_default(element, compiler, **kw):
+    (col,) = element.clauses
+    return compiler.process(func.concat(func.year(col), "-Q", func.quarter(col)), **kw)
+
+
+@compiles(quarter_key, "sqlite")
+def _quarter_key_sqlite(element, compiler, **kw):
+    (col,) = element.clauses
+    quarter = ((cast(func.strftime("%m", col), Integer) + 2) // 3).self_group()  # || binds tighter than /
+    return compiler.process(func.strftime("%Y", col).op("||")("-Q").op("||")(quarter), **kw)
+
+
+PERIODS = {"week": week_key, "month": month_key, "quarter": quarter_key}
+
+
+def period_key(granularity: str, col):
+    return PERIODS[granularity](col)
+
+
+class weekday(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(weekday)
+def _weekday_default(element, compiler, **kw):
+    return compiler.process(func.dayofweek(*element.clauses), **kw)
+
+
+@compiles(weekday, "sqlite")
+def _weekday_sqlite(element, compiler, **kw):
+    return compiler.process(cast(func.strftime("%w", *element.clauses), Integer) + 1, **kw)
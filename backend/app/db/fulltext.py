@@ -0,0 +1,58 @@
+"""Ranked prefix search over FULLTEXT-indexed text columns.
+
+On MySQL this compiles to ``MATCH (...) AGAINST (... IN BOOLEAN MODE)``,
+which is answered from the InnoDB FULLTEXT index (kept current by InnoDB on
+every insert/update) and also yields a relevance score. Other dialects fall
+back to a LIKE filter with a constant score, which is correct but unindexed;
+the same LIKE filter handles words shorter than the index's minimum token.
+Input without any word characters (``!!``) is matched literally as a
+substring, so a search never turns into "no filter".
+"""
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import and_, literal, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+# InnoDB ignores tokens shorter than innodb_ft_min_token_size (default 3).
+_MIN_TOKEN = 3
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(search: str) -> list[str]:
+    """Split user input into plain words (drops boolean-mode operators)."""
+    return [w.lower() for w in _WORD.findall(search or "")]
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fulltext_match(
+    db: Session, columns: list, search: str
+) -> tuple[ColumnElement[bool], ColumnElement]:
+    """Return ``(where_clause, score)`` for *search* over *columns*. Every word
+    must match (as a word prefix where the index answers it, as a substring
+    otherwise); input with no words must occur verbatim."""
+    terms = search_terms(search)
+    if not terms:
+        raw = _like_escape(search.strip() or search)
+        return or_(*[c.ilike(f"%{raw}%", escape="\\") for c in columns]), literal(0)
+
+    indexed: list[str] = []
+    if db.get_bind().dialect.name == "mysql":
+        indexed = [t for t in terms if len(t) >= _MIN_TOKEN]
+
+    clauses: list[ColumnElement[bool]] = []
+    score: ColumnElement = literal(0)
+    if indexed:
+        score = match(*columns, against=" ".join(f"+{t}*" for t in indexed)).in_boolean_mode()
+        clauses.append(score)
+    # Words the index cannot answer (too short, or no FULLTEXT support)
+    for t in terms:
+        if t not in indexed:
+            clauses.append(or_(*[c.ilike(f"%{_like_escape(t)}%", escape="\\") for c in columns]))
+    return and_(*clauses), score
@@ -0,0 +1,37 @@
+"""Keyset (cursor) pagination over a (timestamp DESC, id DESC) ordering.
+
+A cursor is an opaque url-safe token holding the sort key of the last row of
+the previous page. Seeking past it is an index range scan, so page N costs
+the same as page 1 regardless of how deep the client has scrolled.
+"""
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+# Response header carrying the token for the next page (absent on the last page).
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = f"{ts.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        ts, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception as exc:  # binascii.Error, UnicodeDecodeError, ValueError
+        raise ValueError("Invalid cursor") from exc
+
+
+def seek_before(ts_col, id_col, cursor: tuple[datetime, int]) -> ColumnElement[bool]:
+    """Rows strictly after *cursor* in (ts DESC, id DESC) order."""
+    ts, row_id = cursor
+    return or_(ts_col < ts, and_(ts_col == ts, id_col < row_id))
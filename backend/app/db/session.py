@@ -1,12 +1,42 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.functions import now
 
 from ..core.config import settings
 
-engine = create_engine(
-    settings.sqlalchemy_database_uri,
-    pool_pre_ping=True,
-)
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    # WAL lets readers run alongside the single writer; the pragmas other than
+    # journal_mode are per connection, so they are set on every connect.
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cur.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cur.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cur.execute("PRAGMA foreign_keys=ON")  # ON DELETE CASCADE / SET NULL, as on MySQL
+    cur.close()
+
+
+@compiles(now, "sqlite")
+def _now_sqlite(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has no fractional seconds, so server-side timestamps
+    # would not compare correctly with bound datetimes, which SQLAlchemy
+    # stores as 'YYYY-MM-DD HH:MM:SS.ffffff' (keyset cursors rely on it).
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+def make_engine(url: str) -> Engine:
+    """Engine for *url*; SQLite files get WAL and the tuned pragmas."""
+    if make_url(url).get_backend_name() == "sqlite":
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        event.listen(engine, "connect", _sqlite_pragmas)
+        return engine
+    return create_engine(url, pool_pre_ping=True)
+
+
+engine = make_engine(settings.sqlalchemy_database_uri)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -0,0 +1,25 @@
+"""Counter-row upserts shared by the derived finance tables."""
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def increment(db: Session, model: Any, key: dict[str, Any], deltas: dict[str, Any]) -> None:
+    """``UPDATE model SET col = col + delta ... WHERE key`` inside the caller's
+    transaction, inserting the row (key + deltas) when it does not exist yet."""
+    where = [getattr(model, k) == v for k, v in key.items()]
+    stmt = update(model).where(*where).values(
+        {k: getattr(model, k) + v for k, v in deltas.items()}
+    ).execution_options(synchronize_session=False)
+    if db.execute(stmt).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values({**key, **deltas}))
+    except IntegrityError:
+        # A concurrent writer created the row first
+        db.execute(stmt)
@@ -1,4 +1,5 @@
 import logging
+from datetime import date, timedelta
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,8 +7,10 @@ from sqlalchemy import inspect, text
 
 from .api.router import router
 from .core.config import settings
-from .db.session import engine
+from .db.session import SessionLocal, engine
 from .models import Base  # importing Base also registers all models via __init__.py
+from .services import autopost, net_worth
+from .services.scheduler import DailyJob
 
 app = FastAPI(title=settings.app_name)
 
@@ -66,6 +69,176 @@ def _ensure_notes_schema() -> None:
         logging.getLogger(__name__).exception("Notes schema check failed")
 
 
+def _ensure_fin_account_schema() -> None:
+    """Additive migration: add fin_accounts.opening_balance, backfilled so that
+    existing balances reconcile with the transactions already recorded."""
+    try:
+        insp = inspect(engine)
+        if not insp.has_table("fin_accounts"):
+            return
+        cols = {c.get("name") for c in insp.get_columns("fin_accounts")}
+        if "opening_balance" in cols:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE fin_accounts ADD COLUMN opening_balance DOUBLE NOT NULL DEFAULT 0"))
+            conn.execute(text(
+                "UPDATE fin_accounts SET opening_balance = balance - COALESCE(("
+                " SELECT SUM(CASE WHEN t.txn_type = 'income' THEN t.amount ELSE -t.amount END)"
+                " FROM fin_transactions t WHERE t.account_id = fin_accounts.id), 0)"
+            ))
+        logging.getLogger(__name__).info("fin_accounts schema updated: opening_balance added")
+    except Exception:
+        logging.getLogger(__name__).exception("fin_accounts schema check failed")
+
+
+def _ensure_fin_date_columns() -> None:
+    """Migration: fin_subscriptions.next_billing_date and fin_goals.target_date
+    were VARCHAR(10) 'YYYY-MM-DD' strings; convert them to DATE in place.
+    Each value is parsed first: valid ones are rewritten as 'YYYY-MM-DD', the
+    rest are reset (today's date for the required billing date, NULL for the
+    optional target date)."""
+    if engine.dialect.name != "mysql":
+        return  # SQLite keeps dates as ISO text either way
+    columns = [
+        ("fin_subscriptions", "next_billing_date", "DATE NOT NULL", date.today().isoformat()),
+        ("fin_goals", "target_date", "DATE NULL", None),
+    ]
+    try:
+        insp = inspect(engine)
+        for table, col, definition, fallback in columns:
+            if not insp.has_table(table):
+                continue
+            current = next((c for c in insp.get_columns(table) if c.get("name") == col), None)
+            if current is None or "CHAR" not in str(current["type"]).upper():
+                continue  # already converted
+            with engine.begin() as conn:
+                # A pattern check alone lets '2024-02-30' through, which the ALTER
+                # then rejects (strict mode) or turns into 0000-00-00: parse each one.
+                fixes = []
+                for row_id, value in conn.execute(text(f"SELECT id, {col} FROM {table} WHERE {col} IS NOT NULL")).all():
+                    try:
+                        canonical = date.fromisoformat(value.strip()).isoformat()
+                    except ValueError:
+                        canonical = fallback
+                    if canonical != value:
+                        fixes.append({"id": row_id, "value": canonical})
+                if fixes:
+                    conn.execute(text(f"UPDATE {table} SET {col} = :value WHERE id = :id"), fixes)
+                conn.execute(text(f"ALTER TABLE {table} MODIFY {col} {definition}"))
+            logging.getLogger(__name__).info("%s.%s converted to DATE (%s values rewritten)", table, col, len(fixes))
+    except Exception:
+        logging.getLogger(__name__).exception("fin_* date column migration failed")
+
+
+def _ensure_fin_subscription_billing_day() -> None:
+    """Additive migration: add fin_subscriptions.billing_day, backfilled from
+    next_billing_date's day, or from the first posted charge's day when
+    next_billing_date sits on a month's last day and may have been clamped."""
+    try:
+        insp = inspect(engine)
+        if not insp.has_table("fin_subscriptions"):
+            return
+        cols = {c.get("name") for c in insp.get_columns("fin_subscriptions")}
+        if "billing_day" in cols:
+            return
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE fin_subscriptions ADD COLUMN billing_day INT NULL"))
+            first_charge = {}
+            if insp.has_table("fin_subscription_charges"):
+                first_charge = dict(conn.execute(text(
+                    "SELECT subscription_id, MIN(due_date) FROM fin_subscription_charges GROUP BY subscription_id"
+                )).all())
+            rows = []
+            for sub_id, next_date in conn.execute(text("SELECT id, next_billing_date FROM fin_subscriptions")).all():
+                nxt, first = date.fromisoformat(str(next_date)), first_charge.get(sub_id)
+                day = nxt.day
+                # A next date on a month's last day may be a clamped later day of month
+                if first is not None and (nxt + timedelta(days=1)).day == 1:
+                    day = max(day, date.fromisoformat(str(first)).day)
+                rows.append({"id": sub_id, "day": day})
+            if rows:
+                conn.execute(text("UPDATE fin_subscriptions SET billing_day = :day WHERE id = :id"), rows)
+        logging.getLogger(__name__).info("fin_subscriptions schema updated: billing_day added")
+    except Exception:
+        logging.getLogger(__name__).exception("fin_subscriptions schema check failed")
+
+
+def _ensure_fin_indexes() -> None:
+    """Additive migration: create indexes declared on fin_* models that older tables lack."""
+    from .models.fin_subscription import FinSubscription
+    from .models.fin_transaction import FinTransaction
+    try:
+        insp = inspect(engine)
+        for table in (FinTransaction.__table__, FinSubscription.__table__):
+            if not insp.has_table(table.name):
+                continue
+            existing = {ix.get("name") for ix in insp.get_indexes(table.name)}
+            missing = [
+                ix for ix in table.indexes
+                if ix.name not in existing
+                # FULLTEXT indexes only exist on MySQL
+                and (engine.dialect.name == "mysql" or not ix.dialect_kwargs.get("mysql_prefix"))
+            ]
+            for ix in missing:
+                ix.create(bind=engine)
+            if missing:
+                logging.getLogger(__name__).info("%s indexes created: %s", table.name, [ix.name for ix in missing])
+    except Exception:
+        logging.getLogger(__name__).exception("fin_* index check failed")
+
+
+def _backfill_fin_rollups() -> None:
+    """Build the tables derived from fin_transactions (monthly rollup, balance
+    checkpoints, category stats) once for databases that predate them."""
+    try:
+        from .db.session import SessionLocal
+        from .models.fin_balance_checkpoint import FinBalanceCheckpoint
+        from .models.fin_category_stat import FinCategoryStat
+        from .models.fin_monthly_total import FinMonthlyTotal
+        from .models.fin_transaction import FinTransaction
+        from .services import fin_balance, fin_rollup, fin_spend_stats
+        db = SessionLocal()
+        try:
+            if db.query(FinTransaction).first() is None:
+                return
+            for model, rebuild in (
+                (FinMonthlyTotal, fin_rollup.rebuild),
+                (FinBalanceCheckpoint, fin_balance.rebuild),
+                (FinCategoryStat, fin_spend_stats.rebuild),
+            ):
+                if db.query(model).first() is None:
+                    rows = rebuild(db)
+                    db.commit()
+                    logging.getLogger(__name__).info("%s backfilled: %s rows", model.__tablename__, rows)
+        finally:
+            db.close()
+    except Exception:
+        logging.getLogger(__name__).exception("fin_* rollup backfill failed")
+
+
+def _backfill_fin_category_closure() -> None:
+    """Build fin_category_closure for categories that are missing from it
+    (databases that predate it, seeded defaults)."""
+    try:
+        from sqlalchemy import func, select
+        from .db.session import SessionLocal
+        from .models.fin_category import FinCategory
+        from .models.fin_category_closure import FinCategoryClosure
+        from .services import fin_category_tree
+        db = SessionLocal()
+        try:
+            linked = select(FinCategoryClosure.descendant_id).where(FinCategoryClosure.depth == 0)
+            missing = db.execute(select(func.count()).select_from(FinCategory).where(FinCategory.id.not_in(linked))).scalar()
+            if missing:
+                rows = fin_category_tree.rebuild(db)
+                db.commit()
+                logging.getLogger(__name__).info("fin_category_closure rebuilt: %s rows", rows)
+        finally:
+            db.close()
+    except Exception:
+        logging.getLogger(__name__).exception("fin_category_closure backfill failed")
+
+
 def _auto_seed_categories() -> None:
     """Seed default finance categories if table is empty."""
     try:
@@ -91,7 +264,49 @@ def _create_tables() -> None:
     Base.metadata.create_all(bind=engine)
     _ensure_daily_log_schema()
     _ensure_notes_schema()
+    _ensure_fin_account_schema()
+    _ensure_fin_date_columns()
+    _ensure_fin_subscription_billing_day()
+    _ensure_fin_indexes()
+    _backfill_fin_rollups()
     _auto_seed_categories()
+    _backfill_fin_category_closure()
+
+
+def _autopost(trigger: str) -> None:
+    db = SessionLocal()
+    try:
+        autopost.run(db, trigger)
+    finally:
+        db.close()
+
+
+_autopost_job = DailyJob("finance-autopost", _autopost, settings.finance_autopost_at)
+
+
+def _net_worth_snapshot(trigger: str) -> None:
+    db = SessionLocal()
+    try:
+        net_worth.capture(db)
+    finally:
+        db.close()
+
+
+_net_worth_job = DailyJob("net-worth-snapshot", _net_worth_snapshot, settings.finance_net_worth_at)
+
+
+@app.on_event("startup")
+def _start_jobs() -> None:
+    if settings.finance_autopost_enabled:
+        _autopost_job.start()
+    if settings.finance_net_worth_enabled:
+        _net_worth_job.start()
+
+
+@app.on_event("shutdown")
+def _stop_jobs() -> None:
+    _autopost_job.stop()
+    _net_worth_job.stop()
 
 app.add_middleware(
     CORSMiddleware,
@@ -103,6 +318,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(router, prefix="/api")
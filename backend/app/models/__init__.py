@@ -10,10 +10,15 @@ from .task_history import TaskHistory
 from .weekly_reflection import WeeklyReflection
 from .fin_account import FinAccount
 from .fin_category import FinCategory
+from .fin_category_closure import FinCategoryClosure
 from .fin_transaction import FinTransaction
 from .fin_budget import FinBudget
 from .fin_goal import FinGoal
 from .fin_subscription import FinSubscription
+from .fin_monthly_total import FinMonthlyTotal
+from .fin_balance_checkpoint import FinBalanceCheckpoint
+from .fin_subscription_charge import FinSubscriptionCharge
+from .fin_category_stat import FinCategoryStat
 
 __all__ = [
     "Base",
@@ -28,8 +33,13 @@ __all__ = [
     "WeeklyReflection",
     "FinAccount",
     "FinCategory",
+    "FinCategoryClosure",
     "FinTransaction",
     "FinBudget",
     "FinGoal",
     "FinSubscription",
+    "FinMonthlyTotal",
+    "FinBalanceCheckpoint",
+    "FinSubscriptionCharge",
+    "FinCategoryStat",
 ]
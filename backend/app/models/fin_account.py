@@ -10,6 +10,7 @@ class FinAccount(Base):
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     account_type: Mapped[str] = mapped_column(String(20), nullable=False, default="bank")  # cash/bank/upi/wallet
     balance: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    opening_balance: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # balance not explained by fin_transactions
     color: Mapped[str | None] = mapped_column(String(30), nullable=True)
     is_default: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -0,0 +1,13 @@
+from __future__ import annotations
+from datetime import date
+from sqlalchemy import Date, Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class FinBalanceCheckpoint(Base):
+    """Net balance change of an account per calendar month, maintained on write."""
+    __tablename__ = "fin_balance_checkpoints"
+    account_id: Mapped[int] = mapped_column(Integer, ForeignKey("fin_accounts.id", ondelete="CASCADE"), primary_key=True)
+    period_start: Mapped[date] = mapped_column(Date, primary_key=True)  # first day of the month
+    net: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+from sqlalchemy import ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class FinCategoryClosure(Base):
+    """Every (ancestor, descendant) pair of the category tree, self pairs at depth 0."""
+    __tablename__ = "fin_category_closure"
+    __table_args__ = (
+        # Rollups join from a transaction's category up to its ancestors
+        Index("ix_fin_cat_closure_descendant", "descendant_id", "ancestor_id", "depth"),
+    )
+    ancestor_id: Mapped[int] = mapped_column(Integer, ForeignKey("fin_categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(Integer, ForeignKey("fin_categories.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+from sqlalchemy import Float, Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class FinCategoryStat(Base):
+    """Running statistics of expense amounts per category, maintained on write."""
+    __tablename__ = "fin_category_stats"
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True)  # 0 = uncategorized
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    mean: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    m2: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)  # sum of squared deviations (Welford)
+    sketch: Mapped[str] = mapped_column(Text, nullable=False, default="{}")  # JSON {log bucket: count}
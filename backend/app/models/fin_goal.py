@@ -1,6 +1,6 @@
 from __future__ import annotations
-from datetime import datetime
-from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text, func
+from datetime import date, datetime
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
@@ -10,7 +10,7 @@ class FinGoal(Base):
     name: Mapped[str] = mapped_column(String(120), nullable=False)
     target_amount: Mapped[float] = mapped_column(Float, nullable=False)
     current_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
-    target_date: Mapped[str | None] = mapped_column(String(10), nullable=True)  # YYYY-MM-DD
+    target_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     color: Mapped[str] = mapped_column(String(30), nullable=False, default="blue")
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
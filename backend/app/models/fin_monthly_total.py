@@ -0,0 +1,14 @@
+from __future__ import annotations
+from sqlalchemy import Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class FinMonthlyTotal(Base):
+    """Rollup of fin_transactions per (month, category, type), maintained on write."""
+    __tablename__ = "fin_monthly_totals"
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    category_id: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)  # 0 = uncategorized (NULL can't be part of the key)
+    txn_type: Mapped[str] = mapped_column(String(10), primary_key=True)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,16 +1,23 @@
 from __future__ import annotations
-from datetime import datetime
-from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text, func
+from datetime import date, datetime
+from sqlalchemy import Boolean, Date, DateTime, Float, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class FinSubscription(Base):
     __tablename__ = "fin_subscriptions"
+    __table_args__ = (
+        # "Due between X and Y" lookups are a range scan over active rows
+        Index("ix_fin_sub_active_next_billing", "is_active", "next_billing_date"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(120), nullable=False)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     billing_cycle: Mapped[str] = mapped_column(String(10), nullable=False, default="monthly")  # monthly/yearly/weekly
-    next_billing_date: Mapped[str] = mapped_column(String(10), nullable=False)  # YYYY-MM-DD
+    next_billing_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Day of month monthly/yearly charges fall on; next_billing_date is clamped
+    # below it in shorter months (31 → Feb 28) and must not become the new anchor.
+    billing_day: Mapped[int | None] = mapped_column(Integer, nullable=True)
     category_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class FinSubscriptionCharge(Base):
+    """One row per posted billing date; the primary key makes a charge postable once."""
+    __tablename__ = "fin_subscription_charges"
+    subscription_id: Mapped[int] = mapped_column(Integer, ForeignKey("fin_subscriptions.id", ondelete="CASCADE"), primary_key=True)
+    due_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    transaction_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
@@ -1,11 +1,20 @@
 from __future__ import annotations
 from datetime import datetime
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 from .base import Base
 
 class FinTransaction(Base):
     __tablename__ = "fin_transactions"
+    __table_args__ = (
+        # Keyset pagination: newest-first listing, alone or with one equality filter
+        Index("ix_fin_txn_date_id", "txn_date", "id"),
+        Index("ix_fin_txn_type_date_id", "txn_type", "txn_date", "id"),
+        Index("ix_fin_txn_category_date_id", "category_id", "txn_date", "id"),
+        Index("ix_fin_txn_account_date_id", "account_id", "txn_date", "id"),
+        # Word-prefix search over notes (MySQL InnoDB FULLTEXT)
+        Index("ft_fin_txn_notes", "notes", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     txn_type: Mapped[str] = mapped_column(String(10), nullable=False, default="expense")  # income/expense
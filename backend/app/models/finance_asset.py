@@ -20,6 +20,8 @@ class FinanceAsset(Base):
 
     currency: Mapped[str] = mapped_column(String(8), nullable=False, default="INR")
     balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    # Part of balance not explained by finance_transactions (initial value + manual edits)
+    opening_balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
 
     is_primary: Mapped[bool] = mapped_column(nullable=False, default=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -10,14 +10,24 @@ from .base import Base
 
 class FinanceAuditLog(Base):
     __tablename__ = "finance_audit_log"
+    __table_args__ = (
+        # Newest-first feeds, filtered by entity or by entity type (see
+        # migrations/create_finance_audit_keyset_indexes.py)
+        Index("idx_finance_audit_entity_date_id", "entity_type", "entity_id", "created_at", "id"),
+        Index("idx_finance_audit_type_date_id", "entity_type", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
     entity_type: Mapped[str] = mapped_column(String(40), nullable=False)
     entity_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    action: Mapped[str] = mapped_column(String(16), nullable=False)  # created, updated, deleted
-
-    before_json: Mapped[str | None] = mapped_column(Text, nullable=True)
-    after_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    action: Mapped[str] = mapped_column(String(16), nullable=False)  # created, updated, deleted, posted
+
+    # Position in the entity's history (1, 2, ...). A snapshot row holds the
+    # entity's full state after the change (before it, for a delete); any
+    # other row only the columns the change set, with their new values.
+    seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    is_snapshot: Mapped[bool] = mapped_column(nullable=False, default=False)
+    changes_json: Mapped[str | None] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
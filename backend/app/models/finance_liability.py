@@ -18,6 +18,8 @@ class FinanceLiability(Base):
     liability_type: Mapped[str] = mapped_column(String(32), nullable=False)
 
     balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    # Part of balance not explained by finance_transactions (initial value + manual edits)
+    opening_balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
 
     credit_limit: Mapped[Decimal | None] = mapped_column(Numeric(14, 2), nullable=True)
     due_day: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Date, DateTime, Integer, Numeric, String, Text, func
+from sqlalchemy import Date, DateTime, Integer, Numeric, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -37,6 +37,10 @@ class FinanceRecurringRule(Base):
 
 class FinanceRecurringOccurrence(Base):
     __tablename__ = "finance_recurring_occurrences"
+    __table_args__ = (
+        # A rule's due date is posted at most once
+        UniqueConstraint("recurring_id", "due_date", name="uq_finance_occurrence_rule_due"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
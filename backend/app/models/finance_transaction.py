@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, Integer, Numeric, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, Numeric, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -11,6 +11,15 @@ from .base import Base
 
 class FinanceTransaction(Base):
     __tablename__ = "finance_transactions"
+    __table_args__ = (
+        # Keyset pagination: newest-first listing, alone or with one equality
+        # filter (see migrations/create_finance_txn_keyset_indexes.py)
+        Index("idx_finance_txn_date_id", "transacted_at", "id"),
+        Index("idx_finance_txn_type_date_id", "txn_type", "transacted_at", "id"),
+        Index("idx_finance_txn_category_date_id", "category", "transacted_at", "id"),
+        # Word-prefix search over descriptions (MySQL InnoDB FULLTEXT)
+        Index("ft_finance_txn_description", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
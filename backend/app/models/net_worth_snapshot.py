@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import Date, DateTime, Numeric, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class NetWorthSnapshot(Base):
+    """Closing totals of finance_assets / finance_liabilities for one day."""
+
+    __tablename__ = "net_worth_snapshots"
+
+    snapshot_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    total_assets: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0)
+    total_liabilities: Mapped[Decimal] = mapped_column(Numeric(16, 2), nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
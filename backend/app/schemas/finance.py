@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -233,19 +233,57 @@ class FinanceOccurrenceDetailedOut(BaseModel):
     category: str
 
 
+class FinanceDueRuleOut(BaseModel):
+    recurring_id: int
+    name: str
+    txn_type: str
+    amount: Decimal
+    category: str
+    due_dates: list[date]
+
+
+class FinancePostDueOut(BaseModel):
+    until: date
+    rules_due: int
+    posted: int
+    already_posted: int
+    skipped: list[dict]
+    transaction_ids: list[int]
+    still_due: int  # rules still due afterwards: skipped, or capped at MAX_PERIODS_PER_RULE periods
+
+
 class FinanceAuditLogOut(BaseModel):
     id: int
     entity_type: str
     entity_id: int | None
     action: str
-    before_json: str | None
-    after_json: str | None
+    seq: int
+    is_snapshot: bool
+    changes_json: str | None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class FinanceAuditTimelineEntryOut(BaseModel):
+    id: int
+    seq: int
+    action: str
+    created_at: datetime
+    changes: dict[str, dict[str, Any]]  # column -> {"from": old, "to": new}
+
+
+class FinanceAuditStateOut(BaseModel):
+    entity_type: str
+    entity_id: int
+    seq: int
+    action: str
+    changed_at: datetime
+    deleted: bool
+    state: dict[str, Any] | None
+
+
 
 # Budgets
 class FinanceMonthlyBudgetCreate(BaseModel):
@@ -362,7 +400,15 @@ class FinanceCategorySpendOut(BaseModel):
 
 
 class FinanceCashflowPointOut(BaseModel):
-    month: str
+    period: str  # 'YYYY-MM-DD' (week's Monday), 'YYYY-MM' or 'YYYY-Qn'
+    month: str  # same as period; kept for existing clients
     income: Decimal
     expense: Decimal
     savings: Decimal
+
+
+class FinanceNetWorthPointOut(BaseModel):
+    date: date  # the day's close (a period's last stored day); today's point is live
+    total_assets: Decimal
+    total_liabilities: Decimal
+    net_worth: Decimal
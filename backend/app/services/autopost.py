@@ -0,0 +1,200 @@
+"""
+Automatic posting of due recurring charges.
+
+One run posts, up to today:
+
+* every billing date of an active FinSubscription from its next_billing_date
+  on, as an expense on the default account (fin_subscription_charges records
+  each posted date; its primary key makes a date postable once), then moves
+  next_billing_date past today;
+* every due date of an active auto_create finance_recurring_rules row (see
+  ``recurring.post_due``). Each batch locks its rules FOR UPDATE, and
+  pending occurrences are claimed with a guarded UPDATE.
+
+Missed periods are caught up. Work is committed in batches of BATCH_SIZE
+subscriptions / rules, so a failing batch is rolled back on its own and the
+next run retries it. Runs do not overlap within a process. Across processes,
+and against the /expense posting endpoints, a concurrent double post becomes
+a failed batch instead of a double charge. For subscriptions the
+fin_subscription_charges key does this. For rules, the lock makes the later
+poster wait and then find the rules rolled forward, and a lost occurrence
+claim aborts the batch. Metrics of the last HISTORY runs are kept in memory.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import inspect, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.fin_account import FinAccount
+from ..models.fin_subscription import FinSubscription
+from ..models.fin_subscription_charge import FinSubscriptionCharge
+from ..models.fin_transaction import FinTransaction
+from ..models.finance_recurring import FinanceRecurringRule
+from . import fin_balance, fin_cache, fin_ledger, fin_subscriptions, recurring
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+HISTORY = 20
+MAX_PERIODS = recurring.MAX_PERIODS_PER_RULE
+
+
+@dataclass
+class RunMetrics:
+    trigger: str  # startup / scheduled / manual
+    started_at: datetime
+    until: date
+    duration_ms: float = 0.0
+    subscriptions_due: int = 0
+    subscription_charges: int = 0
+    rules_due: int = 0
+    rule_occurrences: int = 0
+    already_posted: int = 0
+    batches: int = 0
+    skipped: list[dict] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["started_at"] = self.started_at.isoformat(timespec="seconds")
+        d["until"] = self.until.isoformat()
+        d["duration_ms"] = round(self.duration_ms, 1)
+        return d
+
+
+_runs: deque[RunMetrics] = deque(maxlen=HISTORY)
+_run_lock = threading.Lock()
+
+
+def recent_runs() -> list[dict]:
+    """Most recent first."""
+    return [m.as_dict() for m in reversed(_runs)]
+
+
+# ── Subscriptions ──────────────────────────────────────────────────────────────
+
+def _post_subscriptions(db: Session, subs: list[FinSubscription], today: date, metrics: RunMetrics) -> None:
+    """Post one batch in the caller's transaction."""
+    account_id = db.execute(
+        select(FinAccount.id).order_by(FinAccount.is_default.desc(), FinAccount.id).limit(1)
+    ).scalar()
+    posted_keys = set(db.execute(
+        select(FinSubscriptionCharge.subscription_id, FinSubscriptionCharge.due_date).where(
+            FinSubscriptionCharge.subscription_id.in_([s.id for s in subs]),
+            FinSubscriptionCharge.due_date >= min(s.next_billing_date for s in subs),
+        )
+    ).all())
+
+    charges: list[tuple[FinSubscription, date, FinTransaction]] = []
+    ledger = fin_ledger.Batch()
+    deltas: dict[int, float] = defaultdict(float)
+    for s in subs:
+        # Keep the billing day before next_billing_date moves to a possibly clamped date
+        s.billing_day = s.billing_day or s.next_billing_date.day
+        dates = fin_subscriptions.billing_dates(s.next_billing_date, s.billing_cycle, s.next_billing_date, date.max, s.billing_day)
+        for n, due in enumerate(dates):
+            if due > today or n == MAX_PERIODS:
+                s.next_billing_date = due
+                break
+            if (s.id, due) in posted_keys:
+                metrics.already_posted += 1
+                continue
+            t = FinTransaction(
+                amount=s.amount, txn_type="expense", category_id=s.category_id, account_id=account_id,
+                notes=s.name, txn_date=datetime.combine(due, datetime.min.time()), subscription_id=s.id,
+            )
+            db.add(t)
+            charges.append((s, due, t))
+            new = fin_ledger.facts(t)
+            ledger.add(None, new)
+            if account_id:
+                deltas[account_id] += fin_balance.balance_effect(new.txn_type, new.amount)
+
+    if not charges:
+        return
+    db.flush()  # assigns transaction ids
+    db.execute(insert(FinSubscriptionCharge.__table__), [
+        {"subscription_id": s.id, "due_date": due, "transaction_id": t.id} for s, due, t in charges
+    ])
+    ledger.apply(db)
+    fin_balance.adjust_accounts(db, deltas)
+    metrics.subscription_charges += len(charges)
+
+
+def _run_subscriptions(db: Session, today: date, metrics: RunMetrics) -> None:
+    ids = list(db.execute(
+        select(FinSubscription.id).where(
+            FinSubscription.is_active == True,  # noqa: E712
+            FinSubscription.next_billing_date <= today,
+        ).order_by(FinSubscription.id)
+    ).scalars())
+    metrics.subscriptions_due = len(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[i:i + BATCH_SIZE]
+        try:
+            subs = list(db.execute(select(FinSubscription).where(FinSubscription.id.in_(chunk))).scalars())
+            _post_subscriptions(db, subs, today, metrics)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Subscription autopost batch failed")
+            metrics.errors.append(f"subscriptions {chunk[0]}..{chunk[-1]}: {exc}")
+            continue
+        metrics.batches += 1
+        fin_cache.bump(fin_cache.TRANSACTIONS, fin_cache.SUBSCRIPTIONS)
+
+
+# ── Legacy recurring rules ─────────────────────────────────────────────────────
+
+def _run_rules(db: Session, today: date, metrics: RunMetrics) -> None:
+    if not inspect(db.get_bind()).has_table(FinanceRecurringRule.__tablename__):
+        return
+    ids = [r.id for r in recurring.due_rules(db, today, auto_only=True)]
+    db.rollback()  # release the loaded rules; each batch reloads its own
+    metrics.rules_due = len(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[i:i + BATCH_SIZE]
+        try:
+            # Locked, so /expense/occurrences/post-due or another worker posting the
+            # same rules waits for this batch and then finds them rolled forward
+            rules = recurring.due_rules(db, today, auto_only=True, rule_ids=chunk, for_update=True)
+            result = recurring.post_due(db, rules, today)
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Recurring rule autopost batch failed")
+            metrics.errors.append(f"rules {chunk[0]}..{chunk[-1]}: {exc}")
+            continue
+        metrics.batches += 1
+        metrics.rule_occurrences += result.posted
+        metrics.already_posted += result.already_posted
+        metrics.skipped.extend(result.skipped)
+
+
+def run(db: Session, trigger: str = "manual", today: Optional[date] = None) -> Optional[RunMetrics]:
+    """Post everything due up to *today*. None when a run is already in progress."""
+    if not _run_lock.acquire(blocking=False):
+        return None
+    try:
+        today = today or date.today()
+        metrics = RunMetrics(trigger=trigger, started_at=datetime.now(), until=today)
+        start = time.perf_counter()
+        _run_subscriptions(db, today, metrics)
+        _run_rules(db, today, metrics)
+        metrics.duration_ms = (time.perf_counter() - start) * 1000
+        _runs.append(metrics)
+        logger.info(
+            "Autopost (%s): %d subscription charges, %d rule occurrences in %d batches, %.0f ms",
+            trigger, metrics.subscription_charges, metrics.rule_occurrences, metrics.batches, metrics.duration_ms,
+        )
+        return metrics
+    finally:
+        _run_lock.release()
@@ -0,0 +1,207 @@
+"""
+Account balance history for /api/finance.
+
+fin_balance_checkpoints holds each account's net balance change per calendar
+month, kept in step with fin_transactions by the write endpoints (see
+fin_ledger). A balance at any date is then
+
+    current balance - (net of all checkpoints) + (net of checkpoints before the
+    date's month) + (running sum of that month's transactions up to the date)
+
+so a range query reads the account's checkpoint rows plus the transactions of
+the range itself, never the history before it. Whatever is not explained by
+transactions (opening balance, manual edits) is treated as present from the
+start.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, extract, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..db.upsert import increment
+from ..models.fin_account import FinAccount
+from ..models.fin_balance_checkpoint import FinBalanceCheckpoint
+from ..models.fin_transaction import FinTransaction
+
+CheckpointKey = tuple[int, date]  # account_id, first day of month
+
+
+def balance_effect(txn_type: str, amount: float) -> float:
+    """Signed change a transaction makes to its account's balance."""
+    return amount if txn_type == "income" else -amount
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+class CheckpointDeltas(defaultdict):
+    """Pending (net, count) adjustments per (account, month)."""
+
+    def __init__(self):
+        super().__init__(lambda: [0.0, 0])
+
+    def add(self, txn_date: datetime, account_id: Optional[int], txn_type: str, amount: float, sign: int = 1) -> None:
+        if not account_id:
+            return
+        d = self[(account_id, _month_start(txn_date))]
+        d[0] += balance_effect(txn_type, amount) * sign
+        d[1] += sign
+
+
+def apply(db: Session, deltas: CheckpointDeltas) -> None:
+    """Add *deltas* to the checkpoints inside the caller's transaction."""
+    for (account_id, period_start), (net, count) in deltas.items():
+        if count == 0 and abs(net) < 1e-9:
+            continue
+        key = {"account_id": account_id, "period_start": period_start}
+        increment(db, FinBalanceCheckpoint, key, {"net": net, "count": count})
+        if count < 0:
+            db.execute(delete(FinBalanceCheckpoint).filter_by(**key).where(FinBalanceCheckpoint.count <= 0)
+                       .execution_options(synchronize_session=False))
+
+
+def adjust_accounts(db: Session, deltas: dict[int, float]) -> None:
+    """``UPDATE fin_accounts SET balance = balance + :delta`` per account, in the
+    caller's transaction; the database applies it atomically, so concurrent
+    writers never lose each other's changes."""
+    for account_id, delta in deltas.items():
+        if abs(delta) < 1e-9:
+            continue
+        db.execute(
+            update(FinAccount).where(FinAccount.id == account_id)
+            .values(balance=FinAccount.balance + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def forget_account(db: Session, account_id: int) -> None:
+    """Drop a deleted account's checkpoints (its transactions lose their account)."""
+    db.execute(delete(FinBalanceCheckpoint).where(FinBalanceCheckpoint.account_id == account_id)
+               .execution_options(synchronize_session=False))
+
+
+# ── Series ─────────────────────────────────────────────────────────────────────
+
+def _effect_column():
+    return case((FinTransaction.txn_type == "income", FinTransaction.amount), else_=-FinTransaction.amount)
+
+
+def series(db: Session, account_id: int, granularity: str, start: date, end: date) -> list[dict]:
+    """Closing balance of *account_id* for every day or month in [start, end]."""
+    first_month = _month_start(start)
+    anchor = db.execute(
+        select(
+            FinAccount.balance,
+            select(func.coalesce(func.sum(FinBalanceCheckpoint.net), 0))
+                .where(FinBalanceCheckpoint.account_id == account_id).scalar_subquery(),
+            select(func.coalesce(func.sum(FinBalanceCheckpoint.net), 0))
+                .where(FinBalanceCheckpoint.account_id == account_id,
+                       FinBalanceCheckpoint.period_start < first_month).scalar_subquery(),
+        ).where(FinAccount.id == account_id)
+    ).one_or_none()
+    if anchor is None:
+        raise LookupError(account_id)
+    balance, total_net, net_before = (float(v) for v in anchor)
+    opening = balance - total_net + net_before  # balance at the start of first_month
+
+    if granularity == "month":
+        running = func.sum(FinBalanceCheckpoint.net).over(order_by=FinBalanceCheckpoint.period_start)
+        closing = {
+            r.period_start: opening + float(r.running)
+            for r in db.execute(
+                select(FinBalanceCheckpoint.period_start, running.label("running")).where(
+                    FinBalanceCheckpoint.account_id == account_id,
+                    FinBalanceCheckpoint.period_start >= first_month,
+                    FinBalanceCheckpoint.period_start <= end,
+                )
+            )
+        }
+        periods, d = [], first_month
+        while d <= end:
+            periods.append(d)
+            d = _next_month(d)
+    else:
+        day = func.date(FinTransaction.txn_date)
+        running = func.sum(func.sum(_effect_column())).over(order_by=day)
+        closing = {
+            (r.day if isinstance(r.day, date) else date.fromisoformat(str(r.day))): opening + float(r.running)
+            for r in db.execute(
+                select(day.label("day"), running.label("running")).where(
+                    FinTransaction.account_id == account_id,
+                    FinTransaction.txn_date >= datetime.combine(first_month, datetime.min.time()),
+                    FinTransaction.txn_date < datetime.combine(end + timedelta(days=1), datetime.min.time()),
+                ).group_by(day)
+            )
+        }
+        periods = [first_month + timedelta(days=i) for i in range((end - first_month).days + 1)]
+
+    points, current = [], opening
+    for p in periods:
+        current = closing.get(p, current)
+        if p >= start or granularity == "month":
+            points.append({"date": p.isoformat(), "balance": round(current, 2)})
+    return points
+
+
+# ── Rebuild / consistency check ────────────────────────────────────────────────
+
+def _aggregate_from_transactions():
+    year = extract("year", FinTransaction.txn_date)
+    month = extract("month", FinTransaction.txn_date)
+    return (
+        select(
+            FinTransaction.account_id, year.label("year"), month.label("month"),
+            func.sum(_effect_column()).label("net"), func.count(FinTransaction.id).label("count"),
+        )
+        .where(FinTransaction.account_id.is_not(None))
+        .group_by(FinTransaction.account_id, year, month)
+    )
+
+
+def _expected(db: Session) -> dict[CheckpointKey, tuple[float, int]]:
+    return {
+        (r.account_id, date(int(r.year), int(r.month), 1)): (float(r.net), int(r.count))
+        for r in db.execute(_aggregate_from_transactions())
+    }
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every checkpoint from fin_transactions. Caller commits."""
+    db.execute(delete(FinBalanceCheckpoint).execution_options(synchronize_session=False))
+    rows = [
+        {"account_id": a, "period_start": p, "net": net, "count": count}
+        for (a, p), (net, count) in _expected(db).items()
+    ]
+    if rows:
+        db.execute(insert(FinBalanceCheckpoint.__table__), rows)
+    return len(rows)
+
+
+def check(db: Session, tolerance: float = 0.005) -> list[dict]:
+    """Compare checkpoints with a fresh aggregate; one entry per mismatched key."""
+    expected = _expected(db)
+    actual = {
+        (r.account_id, r.period_start): (float(r.net), int(r.count))
+        for r in db.execute(select(FinBalanceCheckpoint).where(FinBalanceCheckpoint.count != 0)).scalars()
+    }
+    problems = []
+    for key in sorted(expected.keys() | actual.keys()):
+        exp_net, exp_count = expected.get(key, (0.0, 0))
+        act_net, act_count = actual.get(key, (0.0, 0))
+        if exp_count != act_count or abs(exp_net - act_net) > tolerance:
+            account_id, period_start = key
+            problems.append({
+                "account_id": account_id, "period_start": period_start.isoformat(),
+                "expected_net": round(exp_net, 2), "actual_net": round(act_net, 2),
+                "expected_count": exp_count, "actual_count": act_count,
+            })
+    return problems
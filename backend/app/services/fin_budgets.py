@@ -0,0 +1,54 @@
+"""
+Budget progress for /api/finance: shared by GET /budgets and the insights
+engine's budget alerts, so both report the same figures.
+
+A category budget's spend includes all of its sub-categories (one join of the
+monthly rollup with the category closure, see
+fin_category_tree.month_subtree_totals); an overall budget (no category)
+counts the month total, the sum over the top level.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.fin_budget import FinBudget
+from . import fin_category_tree
+from .fin_cache import RefData
+
+
+@dataclass
+class BudgetProgress:
+    budget: FinBudget
+    category_name: str  # "Total" for the overall budget
+    spent: float
+    pct: float  # unrounded; 0 for a zero budget
+
+
+def progress(
+    db: Session, year: int, month: int, budgets: list[FinBudget], ref: RefData,
+    spend_by_cat: Optional[dict[Optional[int], float]] = None,
+) -> list[BudgetProgress]:
+    """Spent / pct of every budget of one month, in the order given.
+    *spend_by_cat* ({category_id: subtree expense total}) skips the query
+    when the caller already has the month's totals."""
+    if not budgets:
+        return []
+    if spend_by_cat is None:
+        spend_by_cat = {cat_id: total for cat_id, (total, _) in fin_category_tree.month_subtree_totals(db, year, month).items()}
+    month_total = sum(total for cat_id, total in spend_by_cat.items()
+                      if cat_id is None or cat_id not in ref.categories or fin_category_tree.is_root(ref, cat_id))
+
+    out: list[BudgetProgress] = []
+    for b in budgets:
+        cat = ref.category(b.category_id)
+        spent = spend_by_cat.get(b.category_id, 0.0) if b.category_id else month_total
+        out.append(BudgetProgress(
+            budget=b,
+            category_name=cat.name if cat else "Total",
+            spent=spent,
+            pct=spent / b.amount * 100 if b.amount > 0 else 0,
+        ))
+    return out
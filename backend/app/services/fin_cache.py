@@ -0,0 +1,167 @@
+"""
+Process-wide caches for the /api/finance module.
+
+Cached values are tied to *data versions*: one counter per scope
+("refdata", "transactions", ...) that write endpoints bump right after they
+commit. A cache entry stamped with an older version is reloaded on next read.
+
+Loaders run on the caller's session, whose snapshot (MySQL REPEATABLE READ)
+may have opened well before the miss. Each session therefore remembers the
+versions current when its transaction began, and a load is stamped with
+those: a write its snapshot cannot see was bumped later, so the entry is
+already stale for everyone and can only cost one extra reload.
+
+Caches are per process — run a single worker, or accept that other workers
+catch up on their own next bump.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+from sqlalchemy import event, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models.fin_account import FinAccount
+from ..models.fin_category import FinCategory
+
+T = TypeVar("T")
+
+# ── Data versions ──────────────────────────────────────────────────────────────
+
+REFDATA = "refdata"  # categories + accounts (names, colors, hierarchy)
+TRANSACTIONS = "transactions"  # fin_transactions and everything derived from them
+BUDGETS = "budgets"
+SUBSCRIPTIONS = "subscriptions"
+
+_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+
+def data_version(*scopes: str) -> tuple[int, ...]:
+    return tuple(_versions.get(s, 0) for s in scopes)
+
+
+def bump(*scopes: str) -> None:
+    """Invalidate every cache that depends on any of *scopes*. Call after commit."""
+    with _versions_lock:
+        for s in scopes:
+            _versions[s] = _versions.get(s, 0) + 1
+
+
+_BEGIN_VERSIONS = "fin_cache_versions"
+
+
+@event.listens_for(Session, "after_begin")
+def _remember_versions(session, transaction, connection):
+    # Fires as the transaction takes its connection, before its first read
+    session.info.setdefault(_BEGIN_VERSIONS, _versions.copy())
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_versions(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_BEGIN_VERSIONS, None)
+
+
+def _snapshot_version(db: Session, scopes: tuple[str, ...]) -> tuple[int, ...]:
+    """Versions as of *db*'s open transaction (current ones when none is open)."""
+    begun = db.info.get(_BEGIN_VERSIONS)
+    return data_version(*scopes) if begun is None else tuple(begun.get(s, 0) for s in scopes)
+
+
+class VersionedCache:
+    """Keyed cache whose entries expire when any of its scopes is bumped,
+    or after *ttl* seconds when one is given."""
+
+    def __init__(self, *scopes: str, ttl: Optional[float] = None, maxsize: int = 64):
+        self.scopes = scopes
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: dict[Hashable, tuple[tuple[int, ...], float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, db: Session, key: Hashable, loader: Callable[[], T]) -> T:
+        """Cached value for *key*, or *loader*'s result (which must read
+        through *db*) stamped with the versions *db*'s snapshot reflects."""
+        version = data_version(*self.scopes)
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+        if hit and hit[0] == version and (self.ttl is None or now - hit[1] < self.ttl):
+            return hit[2]
+        version = _snapshot_version(db, self.scopes)
+        value = loader()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                self._entries.clear()
+            self._entries[key] = (version, now, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ── Reference data (categories + accounts) ─────────────────────────────────────
+
+@dataclass(frozen=True)
+class CategoryRef:
+    id: int
+    name: str
+    color: str
+    icon: str
+    cat_type: str
+    parent_id: Optional[int]
+
+
+@dataclass(frozen=True)
+class AccountRef:
+    id: int
+    name: str
+    color: Optional[str]
+    account_type: str
+
+
+@dataclass(frozen=True)
+class RefData:
+    categories: dict[int, CategoryRef]
+    accounts: dict[int, AccountRef]
+
+    def category(self, cat_id: Optional[int]) -> Optional[CategoryRef]:
+        return self.categories.get(cat_id) if cat_id else None
+
+    def account(self, acc_id: Optional[int]) -> Optional[AccountRef]:
+        return self.accounts.get(acc_id) if acc_id else None
+
+
+def _load_refdata(db: Session) -> RefData:
+    # Both tables are tiny; one UNION ALL keeps a cold load to a single round-trip.
+    stmt = union_all(
+        select(
+            literal("c").label("kind"), FinCategory.id, FinCategory.name, FinCategory.color,
+            FinCategory.icon, FinCategory.cat_type.label("type"), FinCategory.parent_id,
+        ),
+        select(
+            literal("a"), FinAccount.id, FinAccount.name, FinAccount.color,
+            null(), FinAccount.account_type, null(),
+        ),
+    )
+    categories: dict[int, CategoryRef] = {}
+    accounts: dict[int, AccountRef] = {}
+    for r in db.execute(stmt):
+        if r.kind == "c":
+            categories[r.id] = CategoryRef(r.id, r.name, r.color, r.icon, r.type, r.parent_id)
+        else:
+            accounts[r.id] = AccountRef(r.id, r.name, r.color, r.type)
+    return RefData(categories=categories, accounts=accounts)
+
+
+_refdata_cache = VersionedCache(REFDATA, maxsize=1)
+
+
+def refdata(db: Session) -> RefData:
+    """Current categories/accounts snapshot; loads with *db* on a miss."""
+    return _refdata_cache.get_or_load(db, None, lambda: _load_refdata(db))
@@ -0,0 +1,144 @@
+"""
+Category hierarchy for /api/finance through a closure table.
+
+fin_category_closure holds every (ancestor, descendant) pair of the
+fin_categories tree, each category paired with itself at depth 0, and is kept
+in step with parent_id by the category endpoints (same DB transaction).
+Rolling anything keyed by category up the tree is then one join on
+descendant_id grouped by ancestor_id, whatever the depth of the tree.
+
+Categories whose parent no longer exists are treated as roots.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.fin_category import FinCategory
+from ..models.fin_category_closure import FinCategoryClosure
+from ..models.fin_monthly_total import FinMonthlyTotal
+from .fin_cache import RefData
+
+C = FinCategoryClosure
+
+
+def _ancestors(db: Session, cat_id: int) -> list[tuple[int, int]]:
+    """(ancestor_id, depth) of *cat_id*, itself included."""
+    return [tuple(r) for r in db.execute(select(C.ancestor_id, C.depth).where(C.descendant_id == cat_id))]
+
+
+def _subtree(db: Session, cat_id: int) -> list[tuple[int, int]]:
+    """(descendant_id, depth) under *cat_id*, itself included."""
+    return [tuple(r) for r in db.execute(select(C.descendant_id, C.depth).where(C.ancestor_id == cat_id))]
+
+
+# ── Maintenance (caller commits) ───────────────────────────────────────────────
+
+def add(db: Session, cat_id: int, parent_id: Optional[int]) -> None:
+    """Link a new category below *parent_id* (None = root)."""
+    rows = [{"ancestor_id": cat_id, "descendant_id": cat_id, "depth": 0}]
+    if parent_id:
+        rows += [{"ancestor_id": a, "descendant_id": cat_id, "depth": d + 1} for a, d in _ancestors(db, parent_id)]
+    db.execute(insert(C.__table__), rows)
+
+
+def move(db: Session, cat_id: int, parent_id: Optional[int]) -> None:
+    """Re-link *cat_id* and its whole subtree below *parent_id*.
+
+    Raises ValueError when *parent_id* is the category itself or one of its
+    descendants."""
+    subtree = _subtree(db, cat_id)
+    sub_ids = [d for d, _ in subtree]
+    if parent_id in sub_ids:
+        raise ValueError("A category cannot be moved below itself or one of its sub-categories")
+    old_ancestors = [a for a, d in _ancestors(db, cat_id) if d > 0]
+    if old_ancestors:
+        db.execute(delete(C).where(C.ancestor_id.in_(old_ancestors), C.descendant_id.in_(sub_ids))
+                   .execution_options(synchronize_session=False))
+    if parent_id:
+        db.execute(insert(C.__table__), [
+            {"ancestor_id": a, "descendant_id": s, "depth": da + ds + 1}
+            for a, da in _ancestors(db, parent_id)
+            for s, ds in subtree
+        ])
+
+
+def remove(db: Session, cat: FinCategory) -> None:
+    """Unlink a category about to be deleted; its children move up to its parent."""
+    below = [d for d, depth in _subtree(db, cat.id) if depth > 0]
+    above = [a for a, depth in _ancestors(db, cat.id) if depth > 0]
+    db.execute(delete(C).where((C.ancestor_id == cat.id) | (C.descendant_id == cat.id))
+               .execution_options(synchronize_session=False))
+    if below and above:
+        db.execute(update(C).where(C.ancestor_id.in_(above), C.descendant_id.in_(below))
+                   .values(depth=C.depth - 1).execution_options(synchronize_session=False))
+    db.execute(update(FinCategory).where(FinCategory.parent_id == cat.id)
+               .values(parent_id=cat.parent_id).execution_options(synchronize_session=False))
+
+
+# ── Reads ──────────────────────────────────────────────────────────────────────
+
+def is_root(ref: RefData, cat_id: int) -> bool:
+    parent_id = ref.categories[cat_id].parent_id
+    return parent_id is None or parent_id not in ref.categories
+
+
+def children(ref: RefData, parent_id: Optional[int]) -> list[int]:
+    """Direct sub-categories of *parent_id*; the roots when None."""
+    if parent_id is None:
+        return [c for c in ref.categories if is_root(ref, c)]
+    return [c.id for c in ref.categories.values() if c.parent_id == parent_id]
+
+
+def month_subtree_totals(db: Session, year: int, month: int, txn_type: str = "expense") -> dict[Optional[int], tuple[float, int]]:
+    """{category_id (None = uncategorized): (total, count)} for one month, each
+    category's figures including all of its descendants."""
+    rows = db.execute(
+        select(C.ancestor_id, func.sum(FinMonthlyTotal.total), func.sum(FinMonthlyTotal.count))
+        .select_from(FinMonthlyTotal)
+        .outerjoin(C, C.descendant_id == FinMonthlyTotal.category_id)
+        .where(
+            FinMonthlyTotal.year == year,
+            FinMonthlyTotal.month == month,
+            FinMonthlyTotal.txn_type == txn_type,
+            FinMonthlyTotal.count > 0,
+        )
+        .group_by(C.ancestor_id)
+    )
+    return {ancestor_id: (float(total), int(count)) for ancestor_id, total, count in rows}
+
+
+# ── Rebuild / consistency check ────────────────────────────────────────────────
+
+def _expected(db: Session) -> dict[tuple[int, int], int]:
+    parents = dict(db.execute(select(FinCategory.id, FinCategory.parent_id)).all())
+    pairs: dict[tuple[int, int], int] = {}
+    for cat_id in parents:
+        node, depth, seen = cat_id, 0, set()
+        while node in parents and node not in seen:  # stops at a missing parent or a cycle
+            pairs[(node, cat_id)] = depth
+            seen.add(node)
+            node, depth = parents[node], depth + 1
+    return pairs
+
+
+def rebuild(db: Session) -> int:
+    """Recompute the closure from parent_id. Caller commits."""
+    db.execute(delete(C).execution_options(synchronize_session=False))
+    rows = [{"ancestor_id": a, "descendant_id": d, "depth": depth} for (a, d), depth in _expected(db).items()]
+    if rows:
+        db.execute(insert(C.__table__), rows)
+    return len(rows)
+
+
+def check(db: Session) -> list[dict]:
+    """Compare the closure with parent_id; one entry per mismatched pair."""
+    expected = _expected(db)
+    actual = {(r.ancestor_id, r.descendant_id): r.depth for r in db.execute(select(C)).scalars()}
+    return [
+        {"ancestor_id": a, "descendant_id": d, "expected_depth": expected.get((a, d)), "actual_depth": actual.get((a, d))}
+        for a, d in sorted(expected.keys() | actual.keys())
+        if expected.get((a, d)) != actual.get((a, d))
+    ]
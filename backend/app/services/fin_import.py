@@ -0,0 +1,231 @@
+"""
+Bulk CSV import into fin_transactions.
+
+The file is read row by row and inserted in executemany batches, so memory
+stays bounded by the batch size (plus the capped error list) however large
+the upload is. Rollup and account-balance changes are accumulated while
+reading and written once at the end, all in the caller's DB transaction.
+"""
+from __future__ import annotations
+
+import csv
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.fin_transaction import FinTransaction
+from . import fin_balance, fin_ledger
+from .fin_cache import refdata
+
+BATCH_SIZE = 1000
+MAX_ERRORS = 500
+
+# Tried in order when no explicit date format is given; day-first before
+# month-first, as in Indian bank statements.
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y",
+    "%d %b %Y", "%d-%b-%Y", "%d %B %Y", "%Y/%m/%d", "%m/%d/%Y",
+)
+_TYPE_ALIASES = {
+    "expense": "expense", "debit": "expense", "dr": "expense", "withdrawal": "expense",
+    "income": "income", "credit": "income", "cr": "income", "deposit": "income",
+}
+_AMOUNT_JUNK = re.compile(r"[₹$€£,\s]|rs\.?|inr", re.IGNORECASE)
+
+
+@dataclass
+class ColumnMap:
+    """CSV header names for each transaction field; only date and amount are required."""
+    date: str = "date"
+    amount: str = "amount"
+    txn_type: Optional[str] = None
+    category: Optional[str] = None
+    account: Optional[str] = None
+    notes: Optional[str] = None
+    payment_method: Optional[str] = None
+
+    def required(self) -> list[str]:
+        return [c for c in (self.date, self.amount, self.txn_type, self.category,
+                            self.account, self.notes, self.payment_method) if c]
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[dict] = field(default_factory=list)
+    errors_truncated: bool = False
+    balance_changes: dict[int, float] = field(default_factory=lambda: defaultdict(float))
+
+    def error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"line": line, "error": message})
+        else:
+            self.errors_truncated = True
+
+    def as_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+            "balance_changes": {k: round(v, 2) for k, v in self.balance_changes.items()},
+        }
+
+
+class _DateParser:
+    """Parses with *fmt* if given, else with the first known format that fits,
+    trying the last successful one first (statements use a single format)."""
+
+    def __init__(self, fmt: Optional[str]):
+        self.formats = [fmt] if fmt else list(_DATE_FORMATS)
+
+    def __call__(self, raw: str) -> datetime:
+        raw = raw.strip()
+        if len(self.formats) > 1:
+            try:
+                return datetime.fromisoformat(raw)
+            except ValueError:
+                pass
+        for i, fmt in enumerate(self.formats):
+            try:
+                value = datetime.strptime(raw, fmt)
+            except ValueError:
+                continue
+            if i:
+                self.formats.insert(0, self.formats.pop(i))
+            return value
+        raise ValueError(f"unrecognised date {raw!r}")
+
+
+def parse_amount(raw: str) -> float:
+    """'₹1,234.50', '(120)', '99.00 Dr', '-5' → signed float ('Dr'/parentheses are negative)."""
+    s = raw.strip()
+    negative = False
+    low = s.lower()
+    if low.endswith(("dr", "cr")):
+        negative = low.endswith("dr")
+        s = s[:-2]
+    if s.startswith("(") and s.endswith(")"):
+        negative, s = True, s[1:-1]
+    s = _AMOUNT_JUNK.sub("", s)
+    if s.startswith("-"):
+        negative, s = not negative, s[1:]
+    if not s:
+        raise ValueError("empty amount")
+    try:
+        value = float(s)
+    except ValueError:
+        raise ValueError(f"invalid amount {raw!r}") from None
+    return -value if negative else value
+
+
+def import_csv(
+    db: Session,
+    lines: Iterable[str],
+    columns: ColumnMap,
+    *,
+    date_format: Optional[str] = None,
+    default_type: str = "expense",
+    signed_amounts: bool = False,
+    default_account_id: Optional[int] = None,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> ImportReport:
+    """Validate and insert every row of *lines*. Rows that fail to parse are
+    reported and skipped; the rest are inserted. Caller commits (or rolls back
+    on dry run — nothing is written then anyway).
+
+    With *signed_amounts*, a negative amount is an expense and a positive one
+    income unless a type column says otherwise; otherwise amounts are taken
+    as absolute values of *default_type*. Raises ValueError for a bad header."""
+    reader = csv.DictReader(lines)
+    header = reader.fieldnames or []
+    missing = [c for c in columns.required() if c not in header]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    ref = refdata(db)
+    categories: dict[tuple[str, str], int] = {}
+    for c in ref.categories.values():
+        for kind in (("expense", "income") if c.cat_type == "both" else (c.cat_type,)):
+            categories.setdefault((c.name.strip().lower(), kind), c.id)
+    accounts = {a.name.strip().lower(): a.id for a in ref.accounts.values()}
+    if default_account_id is not None and default_account_id not in ref.accounts:
+        raise ValueError(f"Unknown account id {default_account_id}")
+
+    parse_date = _DateParser(date_format)
+    report = ImportReport(dry_run=dry_run)
+    ledger = fin_ledger.Batch()
+    batch: list[dict] = []
+
+    def flush() -> None:
+        if batch and not dry_run:
+            # Core insert on the Table: one executemany per batch (the ORM bulk
+            # path would split it wherever a row's None columns differ)
+            db.execute(insert(FinTransaction.__table__), batch)
+        report.imported += len(batch)
+        batch.clear()
+
+    for row in reader:
+        report.rows += 1
+        line = reader.line_num
+        try:
+            txn_date = parse_date(row[columns.date] or "")
+            amount = parse_amount(row[columns.amount] or "")
+
+            txn_type = default_type
+            if signed_amounts:
+                txn_type = "expense" if amount < 0 else "income"
+            raw_type = (row[columns.txn_type] or "").strip().lower() if columns.txn_type else ""
+            if raw_type:
+                if raw_type not in _TYPE_ALIASES:
+                    raise ValueError(f"unknown type {raw_type!r}")
+                txn_type = _TYPE_ALIASES[raw_type]
+            amount = abs(amount)
+
+            category_id = None
+            raw_cat = (row[columns.category] or "").strip().lower() if columns.category else ""
+            if raw_cat:
+                category_id = categories.get((raw_cat, txn_type))
+                if category_id is None:
+                    raise ValueError(f"no {txn_type} category named {row[columns.category].strip()!r}")
+
+            account_id = default_account_id
+            raw_acc = (row[columns.account] or "").strip().lower() if columns.account else ""
+            if raw_acc:
+                account_id = accounts.get(raw_acc)
+                if account_id is None:
+                    raise ValueError(f"no account named {row[columns.account].strip()!r}")
+        except (ValueError, KeyError) as e:
+            report.error(line, str(e))
+            continue
+
+        notes = (row[columns.notes] or "").strip() if columns.notes else ""
+        method = (row[columns.payment_method] or "").strip().lower() if columns.payment_method else ""
+        batch.append({
+            "amount": amount, "txn_type": txn_type, "category_id": category_id,
+            "account_id": account_id, "payment_method": method[:20] or "cash",
+            "notes": notes or None, "txn_date": txn_date,
+        })
+        ledger.add(None, fin_ledger.TxnFacts(amount, txn_type, category_id, account_id, txn_date))
+        if account_id:
+            report.balance_changes[account_id] += fin_balance.balance_effect(txn_type, amount)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    if not dry_run:
+        ledger.apply(db)
+        fin_balance.adjust_accounts(db, report.balance_changes)
+    return report
@@ -0,0 +1,266 @@
+"""
+Insights engine for /api/finance/analytics/insights.
+
+All inputs are gathered up front in four queries of its own: this and last
+month's rollup joined to the category closure (per-category spend, and the
+subtree totals behind budget progress, services/fin_budgets.py, the same
+figures as /budgets); one pass over the expenses since the month's start or
+a week ago (spend by weekday, and the past week's expenses above their
+category's unusual-spend threshold); the month's budgets; the subscriptions
+due this week. The reference data, those thresholds and the month-end
+forecast come from their own caches — the writes that invalidate insights
+usually invalidate them too, so a miss after a transaction write also pays
+their loads (one query for the thresholds, two or three for the forecast).
+Every rule then runs in memory over that snapshot. Results are cached per
+data version (and per day), so repeated dashboard loads cost nothing until a
+transaction, budget, subscription or category changes.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from ..models.fin_budget import FinBudget
+from ..models.fin_category_closure import FinCategoryClosure
+from ..models.fin_monthly_total import FinMonthlyTotal
+from ..models.fin_subscription import FinSubscription
+from ..models.fin_transaction import FinTransaction
+from . import fin_budgets, fin_cache, fin_forecast, fin_spend_stats
+from .fin_cache import RefData, VersionedCache, refdata
+
+MAX_INSIGHTS = 8
+_DAY_NAMES = ["", "Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+
+
+@dataclass
+class InsightFacts:
+    today: date
+    this_by_cat: dict[Optional[int], float]
+    this_spend: float
+    last_spend: float
+    spend_by_dow: dict[int, float]  # 1 = Sunday … 7 = Saturday
+    budgets: list[fin_budgets.BudgetProgress]  # this month's, spend rolled up the category tree
+    subs_due: list[FinSubscription]
+    unusual: list[FinTransaction]  # past 7 days, largest first
+    forecast: dict  # fin_forecast.month_end()
+    ref: RefData
+
+
+def _gather(db: Session, today: date) -> InsightFacts:
+    last = today.replace(day=1) - timedelta(days=1)
+    # This and last month's rollup joined to the category closure: each
+    # (category, ancestor) row gives the direct totals (ancestor = itself, or
+    # no closure row) and the subtree totals the budgets need (by ancestor).
+    this_by_cat: dict[Optional[int], float] = {}
+    subtree_spend: dict[Optional[int], float] = {}
+    last_spend = 0.0
+    for r in db.execute(
+        select(FinMonthlyTotal.year, FinMonthlyTotal.month, FinMonthlyTotal.category_id,
+               FinCategoryClosure.ancestor_id, func.sum(FinMonthlyTotal.total).label("total"))
+        .select_from(FinMonthlyTotal)
+        .outerjoin(FinCategoryClosure, FinCategoryClosure.descendant_id == FinMonthlyTotal.category_id)
+        .where(
+            FinMonthlyTotal.txn_type == "expense",
+            FinMonthlyTotal.count > 0,
+            or_(
+                and_(FinMonthlyTotal.year == today.year, FinMonthlyTotal.month == today.month),
+                and_(FinMonthlyTotal.year == last.year, FinMonthlyTotal.month == last.month),
+            ),
+        )
+        .group_by(FinMonthlyTotal.year, FinMonthlyTotal.month, FinMonthlyTotal.category_id, FinCategoryClosure.ancestor_id)
+    ):
+        total = float(r.total)
+        direct = r.ancestor_id is None or r.ancestor_id == r.category_id
+        if (r.year, r.month) == (today.year, today.month):
+            subtree_spend[r.ancestor_id] = subtree_spend.get(r.ancestor_id, 0.0) + total
+            if direct:
+                cat_id = r.category_id or None
+                this_by_cat[cat_id] = this_by_cat.get(cat_id, 0.0) + total
+        elif direct:
+            last_spend += total
+
+    # One pass over the expenses since the earlier of the month's start and
+    # a week ago: weekday spend for this month, unusual ones for the week.
+    month_start = today.replace(day=1)
+    week_start = today - timedelta(days=6)
+    limits = fin_spend_stats.thresholds(db)
+    spend_by_dow: dict[int, float] = {}
+    unusual: list[FinTransaction] = []
+    for t in db.execute(select(FinTransaction).where(
+        FinTransaction.txn_type == "expense",
+        FinTransaction.txn_date >= datetime.combine(min(month_start, week_start), datetime.min.time()),
+    )).scalars():
+        day = t.txn_date.date()
+        if day >= month_start:
+            dow = day.isoweekday() % 7 + 1  # 1 = Sunday, as dates.weekday()
+            spend_by_dow[dow] = spend_by_dow.get(dow, 0.0) + t.amount
+        if day >= week_start and fin_spend_stats.is_unusual(limits, t.category_id, t.txn_type, t.amount):
+            unusual.append(t)
+    unusual.sort(key=lambda t: -t.amount)
+
+    ref = refdata(db)
+    budgets = db.execute(select(FinBudget).filter_by(year=today.year, month=today.month)).scalars().all()
+    subs_due = db.execute(select(FinSubscription).where(
+        FinSubscription.is_active == True,  # noqa: E712
+        FinSubscription.next_billing_date.between(today, today + timedelta(days=7)),
+    )).scalars().all()
+
+    return InsightFacts(
+        today=today,
+        this_by_cat=this_by_cat,
+        this_spend=sum(this_by_cat.values()),
+        last_spend=last_spend,
+        spend_by_dow=spend_by_dow,
+        budgets=fin_budgets.progress(db, today.year, today.month, list(budgets), ref, spend_by_cat=subtree_spend),
+        subs_due=list(subs_due),
+        unusual=unusual,
+        forecast=fin_forecast.month_end(db, today),
+        ref=ref,
+    )
+
+
+# ── Rules ──────────────────────────────────────────────────────────────────────
+
+def _insight(type_: str, title: str, body: str) -> dict:
+    return {"type": type_, "title": title, "body": body}
+
+
+def _rule_month_over_month(f: InsightFacts) -> list[dict]:
+    if f.last_spend <= 0:
+        return []
+    diff_pct = round((f.this_spend - f.last_spend) / f.last_spend * 100, 0)
+    if diff_pct > 20:
+        return [_insight("warning", "Spending up this month",
+            f"You've spent {diff_pct}% more than last month (₹{int(f.this_spend):,} vs ₹{int(f.last_spend):,})")]
+    if diff_pct < -10:
+        return [_insight("info", "Great spending control",
+            f"You've spent {abs(diff_pct)}% less than last month. Keep it up!")]
+    return []
+
+
+def _rule_burn_rate(f: InsightFacts) -> list[dict]:
+    days_elapsed = f.today.day
+    if days_elapsed <= 0 or f.this_spend <= 0:
+        return []
+    daily_avg = f.this_spend / days_elapsed
+    total = f.forecast["total"]
+    return [_insight("info", "Burn rate",
+        f"Spending ₹{int(daily_avg):,}/day. Projected month total: ₹{int(total['projected']):,} "
+        f"(likely ₹{int(total['low']):,}–₹{int(total['high']):,})")]
+
+
+def _rule_top_category(f: InsightFacts) -> list[dict]:
+    if not f.this_by_cat:
+        return []
+    top_id, top_total = max(f.this_by_cat.items(), key=lambda kv: kv[1])
+    cat = f.ref.category(top_id)
+    if not cat:
+        return []
+    return [_insight("info", f"Top category: {cat.name}", f"₹{int(top_total):,} spent on {cat.name} this month")]
+
+
+def _rule_peak_day(f: InsightFacts) -> list[dict]:
+    if not f.spend_by_dow:
+        return []
+    dow = max(f.spend_by_dow, key=f.spend_by_dow.get)
+    day_name = _DAY_NAMES[dow] if 1 <= dow <= 7 else "Unknown"
+    return [_insight("tip", f"High spend day: {day_name}",
+        f"You spend the most on {day_name}s. Consider planning ahead.")]
+
+
+def _rule_budget_alerts(f: InsightFacts) -> list[dict]:
+    out = []
+    for p in f.budgets:
+        if p.pct >= 100:
+            out.append(_insight("warning", f"Budget exceeded: {p.category_name}",
+                f"Spent ₹{int(p.spent):,} of ₹{int(p.budget.amount):,} budget"))
+        elif p.pct >= 80:
+            out.append(_insight("warning", f"Budget warning: {p.category_name}",
+                f"{int(p.pct)}% used — only ₹{int(p.budget.amount - p.spent):,} left"))
+    return out
+
+
+def _rule_subscriptions_due(f: InsightFacts) -> list[dict]:
+    if not f.subs_due:
+        return []
+    names = ", ".join(s.name for s in f.subs_due[:3])
+    return [_insight("tip", "Subscriptions due soon", f"{names} billing in the next 7 days")]
+
+
+def _rule_unusual_spend(f: InsightFacts) -> list[dict]:
+    out = []
+    for t in f.unusual[:2]:
+        cat = f.ref.category(t.category_id)
+        name = cat.name if cat else "Uncategorized"
+        out.append(_insight("warning", f"Unusual spend: {name}",
+            f"₹{int(t.amount):,} on {t.txn_date:%d %b} is far above your usual {name} spending"))
+    return out
+
+
+RULES: list[tuple[str, Callable[[InsightFacts], list[dict]]]] = [
+    ("month_over_month", _rule_month_over_month),
+    ("burn_rate", _rule_burn_rate),
+    ("top_category", _rule_top_category),
+    ("peak_day", _rule_peak_day),
+    ("budget_alerts", _rule_budget_alerts),
+    ("subscriptions_due", _rule_subscriptions_due),
+    ("unusual_spend", _rule_unusual_spend),
+]
+
+
+# ── Evaluation, cache, timings ─────────────────────────────────────────────────
+
+_cache = VersionedCache(
+    fin_cache.TRANSACTIONS, fin_cache.BUDGETS, fin_cache.SUBSCRIPTIONS, fin_cache.REFDATA, maxsize=4,
+)
+_stats_lock = threading.Lock()
+_stats: dict = {"cache_hits": 0, "cache_misses": 0, "last_run": None}
+
+
+def _evaluate(db: Session, today: date) -> list[dict]:
+    started = time.perf_counter()
+    facts = _gather(db, today)
+    gather_ms = (time.perf_counter() - started) * 1000
+
+    insights: list[dict] = []
+    rule_ms: dict[str, float] = {}
+    for name, rule in RULES:
+        t0 = time.perf_counter()
+        insights.extend(rule(facts))
+        rule_ms[name] = round((time.perf_counter() - t0) * 1000, 3)
+
+    with _stats_lock:
+        _stats["last_run"] = {
+            "computed_at": datetime.now().isoformat(timespec="seconds"),
+            "gather_ms": round(gather_ms, 3),
+            "rules_ms": rule_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000, 3),
+            "insights": len(insights),
+        }
+    return insights[:MAX_INSIGHTS]
+
+
+def insights(db: Session, today: Optional[date] = None) -> list[dict]:
+    today = today or date.today()
+    missed = False
+
+    def _load() -> list[dict]:
+        nonlocal missed
+        missed = True
+        return _evaluate(db, today)
+
+    result = _cache.get_or_load(db, today, _load)
+    with _stats_lock:
+        _stats["cache_misses" if missed else "cache_hits"] += 1
+    return result
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "rules": [name for name, _ in RULES]}
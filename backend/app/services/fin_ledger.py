@@ -0,0 +1,58 @@
+"""
+Side tables derived from fin_transactions, updated in the same DB transaction
+as the row itself. Write endpoints describe each change as (old, new) facts;
+either side is None for a create or a delete.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.fin_transaction import FinTransaction
+from . import fin_balance, fin_rollup, fin_spend_stats
+
+
+@dataclass(frozen=True)
+class TxnFacts:
+    amount: float
+    txn_type: str
+    category_id: Optional[int]
+    account_id: Optional[int]
+    txn_date: datetime
+
+
+def facts(t: FinTransaction) -> TxnFacts:
+    return TxnFacts(t.amount, t.txn_type, t.category_id, t.account_id, t.txn_date)
+
+
+class Batch:
+    """Accumulates many changes and applies the side-table updates once."""
+
+    def __init__(self):
+        self.rollup = fin_rollup.RollupDeltas()
+        self.checkpoints = fin_balance.CheckpointDeltas()
+        self.stats = fin_spend_stats.StatDeltas()
+
+    def add(self, old: Optional[TxnFacts], new: Optional[TxnFacts]) -> None:
+        if old:
+            self.rollup.add(old.txn_date, old.category_id, old.txn_type, old.amount, -1)
+            self.checkpoints.add(old.txn_date, old.account_id, old.txn_type, old.amount, -1)
+            self.stats.add(old.category_id, old.txn_type, old.amount, -1)
+        if new:
+            self.rollup.add(new.txn_date, new.category_id, new.txn_type, new.amount, +1)
+            self.checkpoints.add(new.txn_date, new.account_id, new.txn_type, new.amount, +1)
+            self.stats.add(new.category_id, new.txn_type, new.amount, +1)
+
+    def apply(self, db: Session) -> None:
+        fin_rollup.apply(db, self.rollup)
+        fin_balance.apply(db, self.checkpoints)
+        fin_spend_stats.apply(db, self.stats)
+
+
+def record_change(db: Session, old: Optional[TxnFacts], new: Optional[TxnFacts]) -> None:
+    batch = Batch()
+    batch.add(old, new)
+    batch.apply(db)
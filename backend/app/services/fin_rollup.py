@@ -0,0 +1,132 @@
+"""
+fin_monthly_totals: per (year, month, category_id, txn_type) sum and count of
+fin_transactions, kept in step with the raw table by the transaction write
+endpoints (same DB transaction), so monthly analytics read a handful of rows
+instead of scanning the month.
+
+Uncategorized transactions roll up under category_id 0.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, extract, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..db.upsert import increment
+
+from ..models.fin_monthly_total import FinMonthlyTotal
+from ..models.fin_transaction import FinTransaction
+
+UNCATEGORIZED = 0
+
+RollupKey = tuple[int, int, int, str]  # year, month, category_id, txn_type
+
+
+class RollupDeltas(defaultdict):
+    """Pending (total, count) adjustments per rollup key."""
+
+    def __init__(self):
+        super().__init__(lambda: [0.0, 0])
+
+    def add(self, txn_date: datetime, category_id: Optional[int], txn_type: str, amount: float, sign: int = 1) -> None:
+        d = self[(txn_date.year, txn_date.month, category_id or UNCATEGORIZED, txn_type)]
+        d[0] += amount * sign
+        d[1] += sign
+
+
+def apply(db: Session, deltas: RollupDeltas) -> None:
+    """Add *deltas* to the rollup inside the caller's transaction."""
+    for (year, month, category_id, txn_type), (total, count) in deltas.items():
+        if count == 0 and abs(total) < 1e-9:
+            continue
+        key = {"year": year, "month": month, "category_id": category_id, "txn_type": txn_type}
+        increment(db, FinMonthlyTotal, key, {"total": total, "count": count})
+        if count < 0:
+            db.execute(delete(FinMonthlyTotal).filter_by(**key).where(FinMonthlyTotal.count <= 0)
+                       .execution_options(synchronize_session=False))
+
+
+def reassign_category(db: Session, category_id: int) -> None:
+    """Fold a deleted category's rows into the uncategorized bucket."""
+    rows = db.execute(select(FinMonthlyTotal).where(FinMonthlyTotal.category_id == category_id)).scalars().all()
+    if not rows:
+        return
+    deltas = RollupDeltas()
+    for r in rows:
+        d = deltas[(r.year, r.month, UNCATEGORIZED, r.txn_type)]
+        d[0] += r.total
+        d[1] += r.count
+    db.execute(delete(FinMonthlyTotal).where(FinMonthlyTotal.category_id == category_id)
+               .execution_options(synchronize_session=False))
+    apply(db, deltas)
+
+
+# ── Reads ──────────────────────────────────────────────────────────────────────
+
+def month_totals(db: Session, year: int, month: int, txn_type: str = "expense") -> dict[Optional[int], tuple[float, int]]:
+    """{category_id (None = uncategorized): (total, count)} for one month."""
+    rows = db.execute(
+        select(FinMonthlyTotal.category_id, FinMonthlyTotal.total, FinMonthlyTotal.count).where(
+            FinMonthlyTotal.year == year,
+            FinMonthlyTotal.month == month,
+            FinMonthlyTotal.txn_type == txn_type,
+            FinMonthlyTotal.count > 0,
+        )
+    )
+    return {(r.category_id or None): (float(r.total), int(r.count)) for r in rows}
+
+
+# ── Rebuild / consistency check ────────────────────────────────────────────────
+
+def _aggregate_from_transactions():
+    year = extract("year", FinTransaction.txn_date)
+    month = extract("month", FinTransaction.txn_date)
+    category = func.coalesce(FinTransaction.category_id, UNCATEGORIZED)
+    return (
+        select(
+            year.label("year"), month.label("month"), category.label("category_id"),
+            FinTransaction.txn_type,
+            func.sum(FinTransaction.amount).label("total"),
+            func.count(FinTransaction.id).label("count"),
+        )
+        .group_by(year, month, category, FinTransaction.txn_type)
+    )
+
+
+def rebuild(db: Session) -> int:
+    """Recompute the whole rollup from fin_transactions. Caller commits."""
+    db.execute(delete(FinMonthlyTotal).execution_options(synchronize_session=False))
+    agg = _aggregate_from_transactions()
+    db.execute(
+        insert(FinMonthlyTotal).from_select(
+            ["year", "month", "category_id", "txn_type", "total", "count"], agg
+        )
+    )
+    return db.execute(select(func.count()).select_from(FinMonthlyTotal)).scalar() or 0
+
+
+def check(db: Session, tolerance: float = 0.005) -> list[dict]:
+    """Compare the rollup with a fresh aggregate; returns one entry per mismatched key."""
+    expected = {
+        (int(r.year), int(r.month), int(r.category_id), r.txn_type): (float(r.total), int(r.count))
+        for r in db.execute(_aggregate_from_transactions())
+    }
+    actual = {
+        (r.year, r.month, r.category_id, r.txn_type): (float(r.total), int(r.count))
+        for r in db.execute(select(FinMonthlyTotal).where(FinMonthlyTotal.count != 0)).scalars()
+    }
+    problems = []
+    for key in sorted(expected.keys() | actual.keys()):
+        exp_total, exp_count = expected.get(key, (0.0, 0))
+        act_total, act_count = actual.get(key, (0.0, 0))
+        if exp_count != act_count or abs(exp_total - act_total) > tolerance:
+            year, month, category_id, txn_type = key
+            problems.append({
+                "year": year, "month": month, "category_id": category_id, "txn_type": txn_type,
+                "expected_total": round(exp_total, 2), "actual_total": round(act_total, 2),
+                "expected_count": exp_count, "actual_count": act_count,
+            })
+    return problems
@@ -0,0 +1,268 @@
+"""
+Per-category statistics of expense amounts, for spotting unusual spends.
+
+fin_category_stats keeps, per category (0 = uncategorized), the count, mean
+and sum of squared deviations of every expense amount (Welford's online
+method, which also runs in reverse for deletes and edits) plus a log-bucket
+quantile sketch: bucket k counts amounts in (GAMMA^(k-1), GAMMA^k], so any
+quantile is known to within ±6%. The rows are updated by the transaction write
+endpoints through fin_ledger, in the same DB transaction.
+
+An expense is *unusual* when its category has at least MIN_COUNT expenses
+and the amount exceeds both mean + Z_THRESHOLD standard deviations and the
+category's 95th percentile — one comparison against a per-category threshold
+computed once per data version.
+"""
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.fin_category_stat import FinCategoryStat
+from ..models.fin_transaction import FinTransaction
+from . import fin_cache
+from .fin_cache import VersionedCache
+
+UNCATEGORIZED = 0
+GAMMA = 1.12
+MAX_BUCKET = 160  # GAMMA ** 160 ≈ 8e7
+MIN_COUNT = 8
+Z_THRESHOLD = 3.0
+QUANTILE = 0.95
+
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket(amount: float) -> int:
+    if amount <= 1:
+        return 0
+    return min(MAX_BUCKET, math.ceil(math.log(amount) / _LOG_GAMMA))
+
+
+def _bucket_value(k: int) -> float:
+    """Midpoint estimate of the amounts in bucket *k*."""
+    return 2 * GAMMA ** k / (GAMMA + 1) if k > 0 else 1.0
+
+
+@dataclass
+class Welford:
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        d = x - self.mean
+        self.mean += d / self.count
+        self.m2 += d * (x - self.mean)
+
+    def remove(self, x: float) -> None:
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        mean = (self.count * self.mean - x) / (self.count - 1)
+        self.m2 = max(0.0, self.m2 - (x - mean) * (x - self.mean))
+        self.count -= 1
+        self.mean = mean
+
+    def merge(self, other: "Welford") -> None:
+        """Chan et al.'s parallel combination."""
+        n = self.count + other.count
+        if not other.count:
+            return
+        d = other.mean - self.mean
+        self.m2 += other.m2 + d * d * self.count * other.count / n
+        self.mean += d * other.count / n
+        self.count = n
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+def quantile(sketch: dict[int, int], q: float) -> Optional[float]:
+    total = sum(sketch.values())
+    if total <= 0:
+        return None
+    rank, seen = q * (total - 1), 0
+    for k in sorted(sketch):
+        seen += sketch[k]
+        if seen > rank:
+            return _bucket_value(k)
+    return _bucket_value(max(sketch))
+
+
+def _load_sketch(raw: Optional[str]) -> dict[int, int]:
+    return {int(k): int(v) for k, v in json.loads(raw or "{}").items()}
+
+
+def _dump_sketch(sketch: dict[int, int]) -> str:
+    return json.dumps({str(k): v for k, v in sorted(sketch.items()) if v > 0}, separators=(",", ":"))
+
+
+# ── Maintenance (caller commits) ───────────────────────────────────────────────
+
+class StatDeltas(list):
+    """Pending (category_id, amount, +1 / -1) expense changes, in write order."""
+
+    def add(self, category_id: Optional[int], txn_type: str, amount: float, sign: int = 1) -> None:
+        if txn_type == "expense":
+            self.append((category_id or UNCATEGORIZED, amount, sign))
+
+
+def _locked_rows(db: Session, category_ids: set[int]) -> dict[int, FinCategoryStat]:
+    """Stats rows of *category_ids*, created if missing and locked for update."""
+    existing = set(db.execute(
+        select(FinCategoryStat.category_id).where(FinCategoryStat.category_id.in_(category_ids))
+    ).scalars())
+    for cat_id in category_ids - existing:
+        try:
+            with db.begin_nested():
+                db.execute(insert(FinCategoryStat).values(category_id=cat_id, count=0, mean=0.0, m2=0.0, sketch="{}"))
+        except IntegrityError:
+            pass  # a concurrent writer created it first
+    rows = db.execute(
+        select(FinCategoryStat).where(FinCategoryStat.category_id.in_(category_ids))
+        .with_for_update().execution_options(populate_existing=True)
+    ).scalars()
+    return {r.category_id: r for r in rows}
+
+
+def apply(db: Session, deltas: StatDeltas) -> None:
+    if not deltas:
+        return
+    rows = _locked_rows(db, {cat_id for cat_id, _, _ in deltas})
+    state = {cat_id: (Welford(r.count, r.mean, r.m2), _load_sketch(r.sketch)) for cat_id, r in rows.items()}
+    for cat_id, amount, sign in deltas:
+        w, sketch = state[cat_id]
+        k = bucket(amount)
+        if sign > 0:
+            w.add(amount)
+            sketch[k] = sketch.get(k, 0) + 1
+        else:
+            w.remove(amount)
+            sketch[k] = sketch.get(k, 0) - 1
+    for cat_id, (w, sketch) in state.items():
+        r = rows[cat_id]
+        r.count, r.mean, r.m2, r.sketch = w.count, w.mean, w.m2, _dump_sketch(sketch)
+
+
+def reassign_category(db: Session, category_id: int) -> None:
+    """Fold a deleted category's stats into the uncategorized row."""
+    rows = _locked_rows(db, {category_id, UNCATEGORIZED})
+    src, dst = rows[category_id], rows[UNCATEGORIZED]
+    w = Welford(dst.count, dst.mean, dst.m2)
+    w.merge(Welford(src.count, src.mean, src.m2))
+    sketch = _load_sketch(dst.sketch)
+    for k, n in _load_sketch(src.sketch).items():
+        sketch[k] = sketch.get(k, 0) + n
+    dst.count, dst.mean, dst.m2, dst.sketch = w.count, w.mean, w.m2, _dump_sketch(sketch)
+    db.delete(src)
+
+
+# ── Unusual-spend thresholds ───────────────────────────────────────────────────
+
+def _threshold(count: int, mean: float, m2: float, sketch: dict[int, int]) -> Optional[float]:
+    if count < MIN_COUNT:
+        return None
+    std = Welford(count, mean, m2).std
+    return max(mean + Z_THRESHOLD * std, quantile(sketch, QUANTILE) or 0.0)
+
+
+def _load_thresholds(db: Session) -> dict[int, float]:
+    out = {}
+    for r in db.execute(select(FinCategoryStat).where(FinCategoryStat.count >= MIN_COUNT)).scalars():
+        t = _threshold(r.count, r.mean, r.m2, _load_sketch(r.sketch))
+        if t is not None:
+            out[r.category_id] = t
+    return out
+
+
+_thresholds_cache = VersionedCache(fin_cache.TRANSACTIONS, maxsize=1)
+
+
+def thresholds(db: Session) -> dict[int, float]:
+    """{category_id: amount above which an expense is unusual}, per data version."""
+    return _thresholds_cache.get_or_load(db, None, lambda: _load_thresholds(db))
+
+
+def is_unusual(thresholds: dict[int, float], category_id: Optional[int], txn_type: str, amount: float) -> bool:
+    if txn_type != "expense":
+        return False
+    limit = thresholds.get(category_id or UNCATEGORIZED)
+    return limit is not None and amount > limit
+
+
+# ── Rebuild / consistency check ────────────────────────────────────────────────
+
+def _expected(db: Session) -> dict[int, tuple[int, float, float, dict[int, int]]]:
+    """Stats of the whole history, vectorized over one read of all expenses."""
+    data = np.array(
+        db.execute(
+            select(func.coalesce(FinTransaction.category_id, UNCATEGORIZED), FinTransaction.amount)
+            .where(FinTransaction.txn_type == "expense")
+        ).all(),
+        dtype=float,
+    ).reshape(-1, 2)
+    if not len(data):
+        return {}
+    amounts = data[:, 1]
+    cats, inv = np.unique(data[:, 0].astype(np.int64), return_inverse=True)
+    counts = np.bincount(inv)
+    means = np.bincount(inv, weights=amounts) / counts
+    m2 = np.bincount(inv, weights=(amounts - means[inv]) ** 2)
+
+    with np.errstate(divide="ignore"):
+        keys = np.ceil(np.log(np.maximum(amounts, 1.0)) / _LOG_GAMMA).astype(np.int64)
+    keys = np.clip(keys, 0, MAX_BUCKET)
+    pairs, pair_counts = np.unique(inv * (MAX_BUCKET + 1) + keys, return_counts=True)
+    sketches: list[dict[int, int]] = [{} for _ in cats]
+    for pair, n in zip(pairs.tolist(), pair_counts.tolist()):
+        sketches[pair // (MAX_BUCKET + 1)][pair % (MAX_BUCKET + 1)] = n
+
+    return {
+        int(c): (int(counts[i]), float(means[i]), float(m2[i]), sketches[i])
+        for i, c in enumerate(cats.tolist())
+    }
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every category's stats from fin_transactions. Caller commits."""
+    db.execute(delete(FinCategoryStat).execution_options(synchronize_session=False))
+    rows = [
+        {"category_id": c, "count": n, "mean": mean, "m2": m2, "sketch": _dump_sketch(sketch)}
+        for c, (n, mean, m2, sketch) in _expected(db).items()
+    ]
+    if rows:
+        db.execute(insert(FinCategoryStat.__table__), rows)
+    return len(rows)
+
+
+def check(db: Session, tolerance: float = 0.01) -> list[dict]:
+    """Compare the stored stats with a fresh computation; one entry per mismatched category."""
+    expected = _expected(db)
+    actual = {
+        r.category_id: (r.count, r.mean, r.m2, _load_sketch(r.sketch))
+        for r in db.execute(select(FinCategoryStat).where(FinCategoryStat.count != 0)).scalars()
+    }
+    problems = []
+    for cat_id in sorted(expected.keys() | actual.keys()):
+        exp = expected.get(cat_id, (0, 0.0, 0.0, {}))
+        act = actual.get(cat_id, (0, 0.0, 0.0, {}))
+        exp_std, act_std = Welford(*exp[:3]).std, Welford(*act[:3]).std
+        if (exp[0] != act[0] or abs(exp[1] - act[1]) > tolerance or abs(exp_std - act_std) > tolerance
+                or {k: v for k, v in exp[3].items() if v} != {k: v for k, v in act[3].items() if v}):
+            problems.append({
+                "category_id": cat_id,
+                "expected_count": exp[0], "actual_count": act[0],
+                "expected_mean": round(exp[1], 2), "actual_mean": round(act[1], 2),
+                "expected_std": round(exp_std, 2), "actual_std": round(act_std, 2),
+            })
+    return problems
@@ -0,0 +1,150 @@
+"""
+Subscription projection: every charge of every active FinSubscription over
+the next N months, from its next_billing_date forward.
+
+Monthly and yearly cycles keep the subscription's billing_day (the anchor's
+day of month when unset) and clamp it to the month's last day when the month
+is shorter (Jan 31 → Feb 28 → Mar 31; Feb 29 → Feb 28 in non-leap years).
+Autopost stores the clamped date as next_billing_date, so projecting from it
+needs billing_day to get back to the 31st. Results are cached per data version of
+subscriptions and categories.
+"""
+from __future__ import annotations
+
+import calendar
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.fin_subscription import FinSubscription
+from . import fin_cache
+from .fin_cache import VersionedCache, refdata
+
+DEFAULT_MONTHS = 12
+CYCLE_MONTHS = {"monthly": 1, "yearly": 12}  # anything else but "weekly" bills monthly
+
+
+def _add_months(anchor: date, n: int, day: Optional[int] = None) -> date:
+    y, m = divmod(anchor.month - 1 + n, 12)
+    year, month = anchor.year + y, m + 1
+    return date(year, month, min(day or anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def billing_dates(anchor: date, cycle: str, start: date, end: date, day: Optional[int] = None) -> Iterator[date]:
+    """Charge dates in [start, end) of a subscription billed on *anchor*, then
+    on *day* of every cycle's month (the anchor's day when None)."""
+    if cycle == "weekly":
+        d = anchor
+        if d < start:
+            d += timedelta(weeks=-(-(start - d).days // 7))
+        while d < end:
+            yield d
+            d += timedelta(weeks=1)
+        return
+    step = CYCLE_MONTHS.get(cycle, 1)
+    n = 0
+    if anchor < start:
+        # Jump close to start without walking every past period
+        n = max(0, ((start.year - anchor.year) * 12 + start.month - anchor.month) // step - 1) * step
+    while True:
+        d = _add_months(anchor, n, day)
+        if d >= end:
+            return
+        if d >= start:
+            yield d
+        n += step
+
+
+def monthly_equivalent(amount: float, cycle: str) -> float:
+    """Average cost per month of one subscription."""
+    if cycle == "weekly":
+        return amount * 365.25 / 7 / 12
+    return amount / CYCLE_MONTHS.get(cycle, 1)
+
+
+@dataclass(frozen=True)
+class Projection:
+    start: date
+    months: list[dict]  # [{month, total, count, by_category: [...]}, ...]
+    by_category: list[dict]
+    total: float
+    charges: int
+    monthly_cost: float  # sum of monthly_equivalent() over active subscriptions
+
+    @property
+    def monthly_average(self) -> float:
+        return self.total / len(self.months) if self.months else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "start": self.start.isoformat(),
+            "months": self.months,
+            "by_category": self.by_category,
+            "total": round(self.total, 2),
+            "charges": self.charges,
+            "monthly_average": round(self.monthly_average, 2),
+            "monthly_cost": round(self.monthly_cost, 2),
+        }
+
+
+def _compute(db: Session, start: date, months: int) -> Projection:
+    end = _add_months(date(start.year, start.month, 1), months)
+    subs = db.execute(
+        select(FinSubscription.amount, FinSubscription.billing_cycle,
+               FinSubscription.next_billing_date, FinSubscription.billing_day, FinSubscription.category_id)
+        .where(FinSubscription.is_active == True)  # noqa: E712
+    ).all()
+    ref = refdata(db)
+
+    month_totals: dict[tuple[int, int], list] = {}
+    d = date(start.year, start.month, 1)
+    while d < end:
+        month_totals[(d.year, d.month)] = [0.0, 0, defaultdict(float)]
+        d = _add_months(d, 1)
+    cat_totals: dict[Optional[int], float] = defaultdict(float)
+    charges = 0
+    for s in subs:
+        for when in billing_dates(s.next_billing_date, s.billing_cycle, start, end, s.billing_day):
+            m = month_totals[(when.year, when.month)]
+            m[0] += s.amount
+            m[1] += 1
+            m[2][s.category_id] += s.amount
+            cat_totals[s.category_id] += s.amount
+            charges += 1
+
+    def _categories(totals: dict[Optional[int], float]) -> list[dict]:
+        out = []
+        for cat_id, total in sorted(totals.items(), key=lambda kv: -kv[1]):
+            cat = ref.category(cat_id)
+            out.append({
+                "category_id": cat_id,
+                "category_name": cat.name if cat else None,
+                "category_color": cat.color if cat else None,
+                "total": round(total, 2),
+            })
+        return out
+
+    return Projection(
+        start=start,
+        months=[
+            {"month": f"{y}-{m:02d}", "total": round(t, 2), "count": n, "by_category": _categories(cats)}
+            for (y, m), (t, n, cats) in month_totals.items()
+        ],
+        by_category=_categories(cat_totals),
+        total=sum(cat_totals.values()),
+        charges=charges,
+        monthly_cost=sum(monthly_equivalent(s.amount, s.billing_cycle) for s in subs),
+    )
+
+
+_cache = VersionedCache(fin_cache.SUBSCRIPTIONS, fin_cache.REFDATA, maxsize=8)
+
+
+def project(db: Session, months: int = DEFAULT_MONTHS, today: Optional[date] = None) -> Projection:
+    """Charges from *today* to the end of the month *months* - 1 months ahead."""
+    today = today or date.today()
+    return _cache.get_or_load(db, (today, months), lambda: _compute(db, today, months))
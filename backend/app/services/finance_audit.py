@@ -0,0 +1,256 @@
+"""
+Audit trail of the legacy /expense ledger (finance_audit_log).
+
+Entries are staged on the session while an endpoint works and written with
+one executemany just before its single commit (see finance.py's _commit), so
+a change and its audit rows land in the same DB transaction or not at all.
+
+Storage is diff-based. Each entity's entries are numbered (seq); an update
+stores only the columns it changed, with their new values, read from the
+ORM's attribute history before the flush. A full snapshot of the entity is
+stored instead on create and delete, on the first entry of an entity
+without history, and every SNAPSHOT_EVERY entries, so rebuilding any past
+state (state_at) reads at most SNAPSHOT_EVERY rows. Columns come from the
+mapper, so the audited fields follow the models. A "created" snapshot also
+gets the server-generated columns (created_at), read back in one query per
+model when the entries are written.
+
+Changes an endpoint makes to other entities as a side effect — balances
+moved by a transaction, a demoted primary asset — are staged with touched(),
+which takes the new values explicitly (they are often written with a plain
+UPDATE and have no attribute history) and merges repeated changes of one
+entity within the transaction into a single entry.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, event, func, inspect, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models.finance_audit_log import FinanceAuditLog
+
+SNAPSHOT_EVERY = 20
+
+_PENDING = "finance_audit_pending"
+_TOUCHED = "finance_audit_touched"
+
+
+def dumps(v) -> str | None:
+    return json.dumps(v, default=str, ensure_ascii=False, separators=(",", ":")) if v is not None else None
+
+
+def snapshot(obj) -> dict:
+    """Every loaded column of *obj* (server-side defaults not yet fetched are left out)."""
+    state = inspect(obj)
+    return {a.key: state.dict[a.key] for a in state.mapper.column_attrs if a.key in state.dict}
+
+
+def changes(obj) -> dict:
+    """New values of the columns of *obj* modified since it was loaded.
+
+    Must run before the session flushes the modification."""
+    state = inspect(obj)
+    out = {}
+    for a in state.mapper.column_attrs:
+        hist = state.attrs[a.key].history
+        if hist.added or hist.deleted:
+            out[a.key] = hist.added[0] if hist.added else None
+    return out
+
+
+# ── Staging (caller commits) ───────────────────────────────────────────────────
+
+@dataclass
+class _Entry:
+    entity_type: str
+    entity_id: int | None
+    action: str
+    diff: dict | None  # None: always a snapshot
+    full: dict
+    model: type | None = None  # with unloaded: read the missing columns back on flush
+    unloaded: tuple[str, ...] = ()
+
+
+def _stage(db: Session, entry: _Entry) -> None:
+    db.info.setdefault(_PENDING, []).append(entry)
+
+
+def created(db: Session, entity_type: str, obj, action: str = "created") -> None:
+    """Stage the creation of *obj*; call after the flush that assigns its id."""
+    state = inspect(obj)
+    unloaded = tuple(a.key for a in state.mapper.column_attrs if a.key not in state.dict)
+    _stage(db, _Entry(entity_type, state.identity[0], action, None, snapshot(obj), state.mapper.class_, unloaded))
+
+
+def updated(db: Session, entity_type: str, obj, action: str = "updated") -> None:
+    """Stage the pending modification of *obj*; call before it is flushed."""
+    _stage(db, _Entry(entity_type, inspect(obj).identity[0], action, changes(obj), snapshot(obj)))
+
+
+def deleted(db: Session, entity_type: str, obj) -> None:
+    """Stage the deletion of *obj*; call before it is flushed."""
+    _stage(db, _Entry(entity_type, inspect(obj).identity[0], "deleted", None, snapshot(obj)))
+
+
+def touched(db: Session, entity_type: str, obj, values: dict, action: str = "updated") -> None:
+    """Stage a side-effect change of *obj* (already applied, to the object or
+    by an UPDATE); *values* are the changed columns' new values. Repeated
+    calls for one entity before the flush make a single entry."""
+    key = (entity_type, inspect(obj).identity[0])
+    merged: dict = db.info.setdefault(_TOUCHED, {})
+    entry = merged.get(key)
+    if entry is None:
+        entry = merged[key] = _Entry(key[0], key[1], action, {}, {})
+        _stage(db, entry)
+    entry.diff.update(values)
+    entry.full = {**snapshot(obj), **values}
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_TOUCHED, None)
+
+
+def _fill_unloaded(db: Session, entries: list[_Entry]) -> None:
+    """Read server-generated columns of new rows back, one query per model."""
+    by_model: dict[type, list[_Entry]] = {}
+    for e in entries:
+        if e.unloaded and e.entity_id is not None:
+            by_model.setdefault(e.model, []).append(e)
+    for model, group in by_model.items():
+        keys = sorted({k for e in group for k in e.unloaded})
+        pk = inspect(model).primary_key[0]
+        rows = db.execute(
+            select(pk, *[getattr(model, k) for k in keys]).where(pk.in_([e.entity_id for e in group]))
+        ).all()
+        values = {r[0]: dict(zip(keys, r[1:])) for r in rows}
+        for e in group:
+            e.full.update({k: v for k, v in values.get(e.entity_id, {}).items() if k in e.unloaded})
+
+
+def _last_seqs(db: Session, keys: set[tuple[str, int]]) -> dict[tuple[str, int], int]:
+    L = FinanceAuditLog
+    rows = db.execute(
+        select(L.entity_type, L.entity_id, func.max(L.seq))
+        .where(tuple_(L.entity_type, L.entity_id).in_(keys))
+        .group_by(L.entity_type, L.entity_id)
+    )
+    return {(t, i): seq for t, i, seq in rows}
+
+
+def flush(db: Session) -> int:
+    """Write the staged entries (one executemany). Caller commits."""
+    entries: list[_Entry] = db.info.pop(_PENDING, None) or []
+    db.info.pop(_TOUCHED, None)
+    if not entries:
+        return 0
+    _fill_unloaded(db, entries)
+    seqs = _last_seqs(db, {(e.entity_type, e.entity_id) for e in entries if e.entity_id is not None})
+    rows = []
+    for e in entries:
+        key = (e.entity_type, e.entity_id)
+        prev = seqs.get(key)
+        seq = seqs[key] = (prev or 0) + 1
+        is_snapshot = e.diff is None or prev is None or seq % SNAPSHOT_EVERY == 0
+        rows.append({
+            "entity_type": e.entity_type,
+            "entity_id": e.entity_id,
+            "action": e.action,
+            "seq": seq,
+            "is_snapshot": is_snapshot,
+            "changes_json": dumps(e.full if is_snapshot else e.diff),
+        })
+    db.execute(insert(FinanceAuditLog.__table__), rows)
+    return len(rows)
+
+
+# ── Reconstruction ─────────────────────────────────────────────────────────────
+
+@dataclass
+class EntityState:
+    seq: int
+    action: str
+    changed_at: datetime
+    deleted: bool
+    state: dict[str, Any] | None  # JSON values, as stored
+
+
+def state_at(db: Session, entity_type: str, entity_id: int, at: datetime | None = None) -> EntityState | None:
+    """The entity as it was at *at* (now when None), rebuilt from its latest
+    snapshot up to then plus the diffs after it; None without history."""
+    L = FinanceAuditLog
+    base = select(L).where(L.entity_type == entity_type, L.entity_id == entity_id)
+    if at is not None:
+        base = base.where(L.created_at <= at)
+    snap = db.execute(
+        base.where(L.is_snapshot == True).order_by(L.seq.desc(), L.id.desc()).limit(1)
+    ).scalars().first()
+    if snap is None:
+        return None
+
+    last, state = snap, json.loads(snap.changes_json or "{}")
+    after = or_(L.seq > snap.seq, and_(L.seq == snap.seq, L.id > snap.id))
+    for row in db.execute(base.where(after).order_by(L.seq.asc(), L.id.asc())).scalars():
+        values = json.loads(row.changes_json or "{}")
+        if row.is_snapshot:
+            state = values
+        else:
+            state.update(values)
+        last = row
+    deleted = last.action == "deleted"
+    return EntityState(
+        seq=last.seq,
+        action=last.action,
+        changed_at=last.created_at,
+        deleted=deleted,
+        state=None if deleted else state,
+    )
+
+
+@dataclass
+class TimelineEntry:
+    id: int
+    seq: int
+    action: str
+    created_at: datetime
+    changes: dict[str, dict[str, Any]]  # column -> {"from": old, "to": new}
+
+
+def timeline(db: Session, entity_type: str, entity_id: int, rows: list[FinanceAuditLog]) -> list[TimelineEntry]:
+    """Old and new value of every column changed by *rows* (entries of one
+    entity), in the order given. Replays from the last snapshot before the
+    oldest of them, so the cost is bounded by len(rows) + SNAPSHOT_EVERY."""
+    if not rows:
+        return []
+    L = FinanceAuditLog
+    entity = (L.entity_type == entity_type, L.entity_id == entity_id)
+    lo, hi = min(r.seq for r in rows), max(r.seq for r in rows)
+    start = db.execute(select(func.max(L.seq)).where(*entity, L.is_snapshot == True, L.seq < lo)).scalar() or 1
+    wanted = {r.id for r in rows}
+
+    out: dict[int, TimelineEntry] = {}
+    state: dict | None = None
+    for r in db.execute(
+        select(L).where(*entity, L.seq >= start, L.seq <= hi).order_by(L.seq.asc(), L.id.asc())
+    ).scalars():
+        values = json.loads(r.changes_json or "{}")
+        if r.action == "deleted":
+            new = None
+        elif r.is_snapshot:
+            new = values
+        else:
+            new = {**(state or {}), **values}
+        if r.id in wanted:
+            old_s, new_s = state or (values if r.action == "deleted" else {}), new or {}
+            out[r.id] = TimelineEntry(r.id, r.seq, r.action, r.created_at, {
+                k: {"from": old_s.get(k), "to": new_s.get(k)}
+                for k in {**old_s, **new_s}
+                if old_s.get(k) != new_s.get(k)
+            })
+        state = new
+    return [out[r.id] for r in rows if r.id in out]
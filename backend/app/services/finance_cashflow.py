@@ -0,0 +1,182 @@
+"""
+Income / expense / savings per period for /expense/analytics/cashflow.
+
+One conditional-aggregation query over a transacted_at range (served by the
+(transacted_at, id) index) returns both sums per period key — week, month or
+quarter, see app/db/dates.period_key.
+
+Closed periods (every period before the current one) are kept in a
+process-wide cache, so a request normally reads only the current period.
+A closed period can still change through a back-dated entry, an edit or a
+delete; session events collect the transacted_at (old and new) of every
+finance_transactions row an ORM flush writes, and the commit drops the
+cached periods containing them. Writes that bypass the ORM must call
+invalidate() themselves.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from ..db.dates import PERIODS, period_key
+from ..models.finance_transaction import FinanceTransaction
+
+GRANULARITIES = tuple(PERIODS)
+MAX_PERIODS = {"week": 520, "month": 240, "quarter": 80}  # ~10 / 20 / 20 years
+EXPENSE_TYPES = ("expense", "liability_payment")
+
+ZERO = Decimal(0)
+
+
+# ── Period arithmetic (mirrors the SQL keys) ───────────────────────────────────
+
+def period_start(granularity: str, d: date) -> date:
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())
+    if granularity == "quarter":
+        return date(d.year, (d.month - 1) // 3 * 3 + 1, 1)
+    return date(d.year, d.month, 1)
+
+
+def shift(granularity: str, start: date, n: int) -> date:
+    """The start of the period *n* periods after the one starting at *start*."""
+    if granularity == "week":
+        return start + timedelta(weeks=n)
+    months = start.year * 12 + start.month - 1 + n * (3 if granularity == "quarter" else 1)
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def label(granularity: str, start: date) -> str:
+    if granularity == "week":
+        return start.isoformat()
+    if granularity == "quarter":
+        return f"{start.year:04d}-Q{(start.month - 1) // 3 + 1}"
+    return f"{start.year:04d}-{start.month:02d}"
+
+
+# ── Closed-period cache ────────────────────────────────────────────────────────
+
+_closed: dict[tuple[str, str], tuple[Decimal, Decimal]] = {}
+_generation = 0
+_lock = threading.Lock()
+
+
+def invalidate(moments: Iterable[datetime] | None = None) -> None:
+    """Forget the cached periods containing *moments* (every period when None)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        if moments is None:
+            _closed.clear()
+            return
+        for m in moments:
+            for g in GRANULARITIES:
+                _closed.pop((g, label(g, period_start(g, m.date()))), None)
+
+
+_TOUCHED = "finance_cashflow_touched"
+_ALL = object()
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_touched(session: Session, _ctx, _instances) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, FinanceTransaction):
+            continue
+        hist = inspect(obj).attrs.transacted_at.history
+        moments = [m for m in (*hist.added, *hist.deleted, *hist.unchanged) if m is not None]
+        touched = session.info.setdefault(_TOUCHED, set())
+        touched.update(moments if moments else (_ALL,))  # date not loaded: assume any period
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_touched(session: Session) -> None:
+    touched = session.info.pop(_TOUCHED, None)
+    if touched:
+        invalidate(None if _ALL in touched else touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_touched(session: Session) -> None:
+    session.info.pop(_TOUCHED, None)
+
+
+# ── Series ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class CashflowPoint:
+    period: str
+    income: Decimal
+    expense: Decimal
+
+    @property
+    def savings(self) -> Decimal:
+        return self.income - self.expense
+
+
+def _totals(db: Session, granularity: str, start: date, end: date) -> dict[str, tuple[Decimal, Decimal]]:
+    """{period key: (income, expense)} for transactions in [start, end), one query."""
+    key = period_key(granularity, FinanceTransaction.transacted_at)
+    amount = FinanceTransaction.amount
+    rows = db.execute(
+        select(
+            key,
+            func.sum(case((FinanceTransaction.txn_type == "income", amount), else_=0)),
+            func.sum(case((FinanceTransaction.txn_type.in_(EXPENSE_TYPES), amount), else_=0)),
+        )
+        .where(
+            FinanceTransaction.transacted_at >= datetime.combine(start, datetime.min.time()),
+            FinanceTransaction.transacted_at < datetime.combine(end, datetime.min.time()),
+        )
+        .group_by(key)
+    ).all()
+    return {str(k): (Decimal(inc or 0), Decimal(exp or 0)) for k, inc, exp in rows}
+
+
+def series(db: Session, granularity: str, last_n: int | None = None, today: date | None = None) -> list[CashflowPoint]:
+    """Continuous periods from the first transaction (or the last *last_n*
+    periods) through the current one."""
+    # Read the generation before the first query: on MySQL that query opens
+    # the REPEATABLE READ snapshot all later reads see, and any commit missing
+    # from it must bump the generation after we took it, so stale totals are
+    # never cached.
+    with _lock:
+        generation = _generation
+    first_at = db.execute(select(func.min(FinanceTransaction.transacted_at))).scalar()
+    if not first_at:
+        return []
+    today = today or datetime.utcnow().date()
+    current = period_start(granularity, today)
+    n = min(last_n or MAX_PERIODS[granularity], MAX_PERIODS[granularity])
+    start = max(period_start(granularity, first_at.date()), shift(granularity, current, -(n - 1)))
+    if start > current:  # only future-dated transactions
+        start = current
+
+    periods = []
+    p = start
+    while p <= current:
+        periods.append(p)
+        p = shift(granularity, p, 1)
+
+    with _lock:
+        cached = {label(granularity, p): _closed.get((granularity, label(granularity, p))) for p in periods[:-1]}
+    missing = [p for p in periods[:-1] if cached[label(granularity, p)] is None]
+
+    fresh = _totals(db, granularity, missing[0] if missing else current, shift(granularity, current, 1))
+    with _lock:
+        if generation == _generation:
+            for p in missing:
+                _closed[(granularity, label(granularity, p))] = fresh.get(label(granularity, p), (ZERO, ZERO))
+
+    out = []
+    for p in periods:
+        key = label(granularity, p)
+        income, expense = cached.get(key) or fresh.get(key, (ZERO, ZERO))
+        out.append(CashflowPoint(key, income, expense))
+    return out
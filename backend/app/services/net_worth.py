@@ -0,0 +1,238 @@
+"""
+Daily net worth time series (net_worth_snapshots) for the legacy /expense ledger.
+
+A row holds the closing totals of finance_assets and finance_liabilities for
+one day. Only closed days (before today, UTC) are stored; today's point
+always comes from the live balances.
+
+capture() runs from a daily job (see main.py) and writes every missing day
+up to yesterday in one executemany. Past days are reconstructed from the
+live balances minus the finance_transactions deltas dated after them, so the
+first run backfills the whole history. Opening balances and manual balance
+corrections carry no date: the backfill counts them from the first day,
+while rows captured later keep the value they had at the time.
+
+A transaction written, edited or deleted with a date that is already
+covered shifts the rows from that day on (adjust(), in the caller's
+transaction), so stored days stay equal to a fresh reconstruction.
+
+history() reads a date range, one row per day, or only the closing row of
+each week / month / quarter; five years of daily rows are ~1,830 rows of the
+primary key range.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import bindparam, case, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..db.dates import period_key
+from ..models.finance_asset import FinanceAsset
+from ..models.finance_liability import FinanceLiability
+from ..models.finance_transaction import FinanceTransaction
+from ..models.net_worth_snapshot import NetWorthSnapshot
+from .finance_cashflow import period_start
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "week", "month", "quarter")
+_PERIOD_DAYS = {"day": 1, "week": 7, "month": 30.44, "quarter": 91.31}
+
+# A stray transaction decades in the past should not make the first run
+# write tens of thousands of rows.
+MAX_BACKFILL_DAYS = 20 * 366
+
+ZERO = Decimal(0)
+
+
+def delta(txn_type: str, amount) -> tuple[Decimal, Decimal]:
+    """(assets, liabilities) change caused by one transaction; mirrors
+    finance.py's _apply_transaction_effect (transfers move nothing)."""
+    amount = Decimal(amount)
+    if txn_type == "income":
+        return amount, ZERO
+    if txn_type == "expense":
+        return -amount, ZERO
+    if txn_type == "liability_payment":
+        return -amount, -amount
+    return ZERO, ZERO
+
+
+def live_totals(db: Session) -> tuple[Decimal, Decimal]:
+    """Current (assets, liabilities) totals, one round trip."""
+    assets, liabilities = db.execute(
+        select(
+            select(func.coalesce(func.sum(FinanceAsset.balance), 0)).scalar_subquery(),
+            select(func.coalesce(func.sum(FinanceLiability.balance), 0)).scalar_subquery(),
+        )
+    ).one()
+    return Decimal(assets), Decimal(liabilities)
+
+
+def _daily_deltas(db: Session, since: datetime) -> dict[date, tuple[Decimal, Decimal]]:
+    T = FinanceTransaction
+    day = func.date(T.transacted_at)
+    rows = db.execute(
+        select(
+            day,
+            func.sum(case(
+                (T.txn_type == "income", T.amount),
+                (T.txn_type.in_(("expense", "liability_payment")), -T.amount),
+                else_=0,
+            )),
+            func.sum(case((T.txn_type == "liability_payment", -T.amount), else_=0)),
+        )
+        .where(T.transacted_at >= since)
+        .group_by(day)
+    ).all()
+    # DATE() comes back as a date on MySQL and as text on SQLite
+    return {date.fromisoformat(str(d)): (Decimal(a or 0), Decimal(l or 0)) for d, a, l in rows}
+
+
+# ── Writes ─────────────────────────────────────────────────────────────────────
+
+def capture(db: Session, today: date | None = None) -> int:
+    """Write the closing totals of every missing day up to yesterday and
+    commit; returns the number of rows written."""
+    today = today or datetime.utcnow().date()
+    yesterday = today - timedelta(days=1)
+    last = db.execute(select(func.max(NetWorthSnapshot.snapshot_date))).scalar()
+    if last is not None:
+        last = date.fromisoformat(str(last))
+        if last >= yesterday:
+            return 0
+        start = last + timedelta(days=1)
+    else:
+        first_at = db.execute(select(func.min(FinanceTransaction.transacted_at))).scalar()
+        start = min(first_at.date(), yesterday) if first_at else yesterday
+    start = max(start, yesterday - timedelta(days=MAX_BACKFILL_DAYS))
+
+    assets, liabilities = live_totals(db)
+    deltas = _daily_deltas(db, datetime.combine(start + timedelta(days=1), datetime.min.time()))
+    # Walk back from the live totals: first undo everything dated after
+    # yesterday (today and future-dated entries), then one day at a time.
+    for d, (a, l) in deltas.items():
+        if d > yesterday:
+            assets, liabilities = assets - a, liabilities - l
+
+    rows = []
+    d = yesterday
+    while d >= start:
+        rows.append({"snapshot_date": d, "total_assets": assets, "total_liabilities": liabilities})
+        a, l = deltas.get(d, (ZERO, ZERO))
+        assets, liabilities = assets - a, liabilities - l
+        d -= timedelta(days=1)
+
+    try:
+        db.execute(insert(NetWorthSnapshot.__table__), rows[::-1])
+        db.commit()
+    except IntegrityError:
+        # Another worker captured the same days first
+        db.rollback()
+        return 0
+    logger.info("Net worth snapshots written: %s (%s to %s)", len(rows), start, yesterday)
+    return len(rows)
+
+
+def adjust(db: Session, changes: Iterable[tuple[date, Decimal, Decimal]]) -> None:
+    """Shift stored days by (day, assets, liabilities) changes: a change on
+    day d moves every row from d on. One executemany over disjoint date
+    ranges; caller commits."""
+    by_day: dict[date, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    for d, a, l in changes:
+        by_day[d][0] += a
+        by_day[d][1] += l
+    days = sorted(d for d, (a, l) in by_day.items() if a or l)
+    if not days:
+        return
+    rows = []
+    total_a = total_l = ZERO
+    for i, d in enumerate(days):
+        total_a, total_l = total_a + by_day[d][0], total_l + by_day[d][1]
+        hi = days[i + 1] if i + 1 < len(days) else date.max
+        rows.append({"lo": d, "hi": hi, "da": total_a, "dl": total_l})
+    t = NetWorthSnapshot.__table__
+    db.execute(
+        update(t)
+        .where(t.c.snapshot_date >= bindparam("lo"), t.c.snapshot_date < bindparam("hi"))
+        .values(
+            total_assets=t.c.total_assets + bindparam("da"),
+            total_liabilities=t.c.total_liabilities + bindparam("dl"),
+        ),
+        rows,
+    )
+
+
+def adjust_transaction(db: Session, txn_type: str, amount, transacted_at: datetime, direction: int = 1) -> None:
+    """adjust() for one transaction applied (direction=1) or reversed (-1)."""
+    a, l = delta(txn_type, amount)
+    adjust(db, [(transacted_at.date(), a * direction, l * direction)])
+
+
+# ── Reads ──────────────────────────────────────────────────────────────────────
+
+@dataclass
+class NetWorthPoint:
+    date: date
+    total_assets: Decimal
+    total_liabilities: Decimal
+
+    @property
+    def net_worth(self) -> Decimal:
+        return self.total_assets - self.total_liabilities
+
+
+def pick_granularity(start: date, end: date, max_points: int) -> str:
+    """The finest granularity giving at most *max_points* points over [start, end]."""
+    days = (end - start).days + 1
+    for g in GRANULARITIES:
+        if days / _PERIOD_DAYS[g] <= max_points:
+            return g
+    return GRANULARITIES[-1]
+
+
+def history(
+    db: Session,
+    start: date | None = None,
+    end: date | None = None,
+    granularity: str | None = None,
+    max_points: int | None = None,
+    today: date | None = None,
+) -> list[NetWorthPoint]:
+    """Closing totals per day (or per period, dated by its last stored day)
+    in [start, end]; today's point is live. Without *granularity*, the
+    finest one giving at most *max_points* points (daily when None)."""
+    today = today or datetime.utcnow().date()
+    end = min(end or today, today)
+    S = NetWorthSnapshot
+    if start is None:
+        first = db.execute(select(func.min(S.snapshot_date))).scalar()
+        start = date.fromisoformat(str(first)) if first is not None else today
+    if start > end:
+        return []
+    if granularity is None:
+        granularity = pick_granularity(start, end, max_points) if max_points else "day"
+
+    in_range = (S.snapshot_date >= start, S.snapshot_date <= end)
+    stmt = select(S.snapshot_date, S.total_assets, S.total_liabilities).where(*in_range)
+    if granularity != "day":
+        closes = select(func.max(S.snapshot_date)).where(*in_range).group_by(period_key(granularity, S.snapshot_date))
+        stmt = stmt.where(S.snapshot_date.in_(closes))
+    points = [
+        NetWorthPoint(date.fromisoformat(str(d)), Decimal(a), Decimal(l))
+        for d, a, l in db.execute(stmt.order_by(S.snapshot_date))
+    ]
+
+    if end == today:
+        # Today's point closes the current period in place of the last stored day
+        if points and granularity != "day" and period_start(granularity, points[-1].date) == period_start(granularity, today):
+            points.pop()
+        points.append(NetWorthPoint(today, *live_totals(db)))
+    return points
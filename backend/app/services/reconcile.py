@@ -0,0 +1,143 @@
+"""
+Balance reconciliation for both finance ledgers.
+
+Stored balances are maintained incrementally on every transaction write
+(``_apply_balance`` for fin_accounts, ``_apply_transaction_effect`` for
+finance_assets / finance_liabilities). Here every expected balance is
+recomputed as ``opening_balance + net effect of all transactions``, with the
+net effects summed by grouped queries in the database — one statement per
+table, whatever the number of transactions.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+
+from ..models.fin_account import FinAccount
+from ..models.fin_transaction import FinTransaction
+from ..models.finance_asset import FinanceAsset
+from ..models.finance_liability import FinanceLiability
+from ..models.finance_transaction import FinanceTransaction
+
+TOLERANCE = 0.005
+
+
+@dataclass
+class Drift:
+    ledger: str  # table name
+    id: int
+    name: str
+    recorded: float
+    expected: float
+
+    @property
+    def drift(self) -> float:
+        return round(self.recorded - self.expected, 2)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "drift": self.drift}
+
+
+def _sum_where(condition, amount):
+    return func.coalesce(func.sum(case((condition, amount), else_=0)), 0)
+
+
+def _fin_accounts(db: Session) -> list[tuple]:
+    net = (
+        select(
+            FinTransaction.account_id.label("account_id"),
+            (_sum_where(FinTransaction.txn_type == "income", FinTransaction.amount)
+             - _sum_where(FinTransaction.txn_type != "income", FinTransaction.amount)).label("net"),
+        )
+        .where(FinTransaction.account_id.is_not(None))
+        .group_by(FinTransaction.account_id)
+        .subquery()
+    )
+    stmt = (
+        select(FinAccount.id, FinAccount.name, FinAccount.balance,
+               FinAccount.opening_balance + func.coalesce(net.c.net, 0))
+        .outerjoin(net, net.c.account_id == FinAccount.id)
+    )
+    return [("fin_accounts", *r) for r in db.execute(stmt)]
+
+
+def _finance_assets(db: Session) -> list[tuple]:
+    t = FinanceTransaction
+    outflow = (
+        select(t.from_asset_id.label("asset_id"),
+               _sum_where(t.txn_type.in_(("expense", "transfer", "liability_payment")), t.amount).label("amount"))
+        .where(t.from_asset_id.is_not(None))
+        .group_by(t.from_asset_id)
+        .subquery()
+    )
+    inflow = (
+        select(t.to_asset_id.label("asset_id"),
+               _sum_where(t.txn_type.in_(("income", "transfer")), t.amount).label("amount"))
+        .where(t.to_asset_id.is_not(None))
+        .group_by(t.to_asset_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            FinanceAsset.id, FinanceAsset.name, FinanceAsset.balance,
+            FinanceAsset.opening_balance + func.coalesce(inflow.c.amount, 0) - func.coalesce(outflow.c.amount, 0),
+        )
+        .outerjoin(outflow, outflow.c.asset_id == FinanceAsset.id)
+        .outerjoin(inflow, inflow.c.asset_id == FinanceAsset.id)
+    )
+    return [("finance_assets", *r) for r in db.execute(stmt)]
+
+
+def _finance_liabilities(db: Session) -> list[tuple]:
+    t = FinanceTransaction
+    paid = (
+        select(t.liability_id.label("liability_id"),
+               _sum_where(t.txn_type == "liability_payment", t.amount).label("amount"))
+        .where(t.liability_id.is_not(None))
+        .group_by(t.liability_id)
+        .subquery()
+    )
+    stmt = (
+        select(FinanceLiability.id, FinanceLiability.name, FinanceLiability.balance,
+               FinanceLiability.opening_balance - func.coalesce(paid.c.amount, 0))
+        .outerjoin(paid, paid.c.liability_id == FinanceLiability.id)
+    )
+    return [("finance_liabilities", *r) for r in db.execute(stmt)]
+
+
+LEDGERS = {
+    "fin_accounts": (FinAccount, _fin_accounts),
+    "finance_assets": (FinanceAsset, _finance_assets),
+    "finance_liabilities": (FinanceLiability, _finance_liabilities),
+}
+
+
+def reconcile(db: Session, ledgers: tuple[str, ...] = tuple(LEDGERS), tolerance: float = TOLERANCE) -> tuple[int, list[Drift]]:
+    """(number of balances checked, the ones that drifted by more than *tolerance*)."""
+    checked, drifted = 0, []
+    for name in ledgers:
+        for ledger, row_id, row_name, recorded, expected in LEDGERS[name][1](db):
+            checked += 1
+            d = Drift(ledger, row_id, row_name, float(recorded or 0), float(expected or 0))
+            if abs(d.recorded - d.expected) > tolerance:
+                drifted.append(d)
+    return checked, drifted
+
+
+def fix(db: Session, drifted: list[Drift]) -> None:
+    """Set each drifted balance to its expected value (one executemany per
+    table). Caller commits, so all corrections land together or not at all."""
+    for name, (model, _) in LEDGERS.items():
+        rows = [{"_id": d.id, "_balance": d.expected} for d in drifted if d.ledger == name]
+        if not rows:
+            continue
+        if model is not FinAccount:
+            rows = [{**r, "_balance": Decimal(str(round(r["_balance"], 2)))} for r in rows]
+        table = model.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("_id")).values(balance=bindparam("_balance")),
+            rows,
+        )
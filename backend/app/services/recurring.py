@@ -0,0 +1,257 @@
+"""
+Posting of legacy recurring rules (finance_recurring_rules) in bulk.
+
+Every due date of a rule up to a cut-off — including periods missed while
+nothing ran — becomes a finance_transactions row plus a "posted"
+finance_recurring_occurrences row, and the rule rolls forward to its next
+due date with a fresh pending occurrence, exactly as posting one occurrence
+by hand does. A due date is postable only once: a new occurrence row hits the
+unique key (recurring_id, due_date), and an existing pending one is claimed
+with a guarded UPDATE (claim_occurrence) that fails once another poster got
+there first. All of this happens in the caller's transaction:
+
+- Asset and liability balances are adjusted with one UPDATE per touched row
+  and audited with the values read back.
+- Stored net worth snapshots are adjusted with one executemany (see
+  ``net_worth.adjust``).
+- Audit entries are written with one executemany.
+"""
+from __future__ import annotations
+
+import calendar
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..models.finance_asset import FinanceAsset
+from ..models.finance_liability import FinanceLiability
+from ..models.finance_recurring import FinanceRecurringOccurrence, FinanceRecurringRule
+from ..models.finance_transaction import FinanceTransaction
+from . import finance_audit, net_worth
+
+# Upper bound on catch-up periods per rule and run (a daily rule left alone
+# for years should not post thousands of rows in one go).
+MAX_PERIODS_PER_RULE = 400
+
+
+def next_due_date(rule: FinanceRecurringRule, from_date: date) -> date:
+    if rule.schedule == "daily":
+        return from_date + timedelta(days=1)
+    if rule.schedule == "weekly":
+        return from_date + timedelta(days=7)
+    if rule.schedule == "monthly":
+        year = from_date.year
+        month = from_date.month + 1
+        if month == 13:
+            month = 1
+            year += 1
+        day = rule.day_of_month or from_date.day
+        last_day = calendar.monthrange(year, month)[1]
+        day = min(max(1, int(day)), last_day)
+        return date(year, month, day)
+    # Should never happen (validated by schema)
+    return from_date
+
+
+def due_dates(rule: FinanceRecurringRule, until: date, limit: int = MAX_PERIODS_PER_RULE) -> Iterator[date]:
+    """The rule's due dates from next_due_date up to and including *until*."""
+    d = rule.next_due_date
+    for _ in range(limit):
+        if d > until:
+            return
+        yield d
+        nxt = next_due_date(rule, d)
+        if nxt <= d:
+            return
+        d = nxt
+
+
+class AlreadyPosted(Exception):
+    """A pending occurrence was posted concurrently; roll back and retry."""
+
+
+def claim_occurrence(db: Session, occurrence_id: int) -> bool:
+    """Mark a pending occurrence posted. False when it is no longer pending.
+
+    The UPDATE reads the committed row and keeps it locked until commit, so
+    of two concurrent posters exactly one gets True. Caller commits."""
+    O = FinanceRecurringOccurrence
+    return db.execute(
+        update(O).where(O.id == occurrence_id, O.status == "pending")
+        .values(status="posted")
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+
+@dataclass
+class PostingResult:
+    rules_due: int = 0
+    posted: int = 0
+    already_posted: int = 0
+    skipped: list[dict] = field(default_factory=list)  # {rule_id, reason}
+    transaction_ids: list[int] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "rules_due": self.rules_due,
+            "posted": self.posted,
+            "already_posted": self.already_posted,
+            "skipped": self.skipped,
+        }
+
+
+def due_rules(
+    db: Session,
+    until: date,
+    *,
+    auto_only: bool,
+    rule_ids: Iterable[int] | None = None,
+    for_update: bool = False,
+) -> list[FinanceRecurringRule]:
+    """Active rules with a due date <= *until*. With *for_update* the rows are
+    locked, so concurrent posters of the same rules run one after the other
+    and the later one sees the rules already rolled forward."""
+    stmt = select(FinanceRecurringRule).where(
+        FinanceRecurringRule.is_active == True,  # noqa: E712
+        FinanceRecurringRule.next_due_date <= until,
+    )
+    if auto_only:
+        stmt = stmt.where(FinanceRecurringRule.auto_create == True)  # noqa: E712
+    if rule_ids is not None:
+        stmt = stmt.where(FinanceRecurringRule.id.in_(list(rule_ids)))
+    stmt = stmt.order_by(FinanceRecurringRule.id)
+    if for_update:
+        stmt = stmt.with_for_update().execution_options(populate_existing=True)
+    return list(db.execute(stmt).scalars())
+
+
+def post_due(db: Session, rules: Iterable[FinanceRecurringRule], until: date) -> PostingResult:
+    """Post every due date <= *until* of *rules* (load them with due_rules(...,
+    for_update=True)). Raises AlreadyPosted when a pending occurrence was
+    posted concurrently. Caller commits."""
+    rules = list(rules)
+    result = PostingResult(rules_due=len(rules))
+    if not rules:
+        return result
+
+    primary_id = db.execute(
+        select(FinanceAsset.id).order_by(FinanceAsset.is_primary.desc(), FinanceAsset.id).limit(1)
+    ).scalar()
+    asset_ids = set(db.execute(select(FinanceAsset.id)).scalars())
+    liability_ids = set(db.execute(select(FinanceLiability.id)).scalars())
+
+    # Existing occurrences from the earliest due date on, keyed by (rule, due_date)
+    occurrences = {
+        (o.recurring_id, o.due_date): o
+        for o in db.execute(
+            select(FinanceRecurringOccurrence).where(
+                FinanceRecurringOccurrence.recurring_id.in_([r.id for r in rules]),
+                FinanceRecurringOccurrence.due_date >= min(r.next_due_date for r in rules),
+            )
+        ).scalars()
+    }
+
+    asset_deltas: dict[int, Decimal] = defaultdict(Decimal)
+    liability_deltas: dict[int, Decimal] = defaultdict(Decimal)
+    posted: list[tuple[FinanceRecurringOccurrence, FinanceTransaction]] = []
+    now = datetime.utcnow()
+
+    for rule in rules:
+        if rule.txn_type == "transfer":
+            result.skipped.append({"rule_id": rule.id, "reason": "Posting transfer occurrences is not supported"})
+            continue
+        asset_id = rule.asset_id or primary_id
+        if asset_id is None or asset_id not in asset_ids:
+            result.skipped.append({"rule_id": rule.id, "reason": "asset not found"})
+            continue
+        if rule.txn_type == "liability_payment" and rule.liability_id not in liability_ids:
+            result.skipped.append({"rule_id": rule.id, "reason": "liability not found"})
+            continue
+
+        last = None
+        for due in due_dates(rule, until):
+            last = due
+            occ = occurrences.get((rule.id, due))
+            if occ is not None and occ.status != "pending":
+                result.already_posted += 1
+                continue
+            if occ is not None and occ.id is not None and not claim_occurrence(db, occ.id):
+                raise AlreadyPosted(f"occurrence {occ.id} of rule {rule.id}")
+            txn = FinanceTransaction(
+                txn_type=rule.txn_type,
+                amount=rule.amount,
+                category=rule.category,
+                payment_mode=None,
+                description=rule.description or rule.name,
+                transacted_at=datetime.combine(due, time.min),
+                from_asset_id=asset_id if rule.txn_type in ("expense", "liability_payment") else None,
+                to_asset_id=asset_id if rule.txn_type == "income" else None,
+                liability_id=rule.liability_id,
+                recurring_id=rule.id,
+            )
+            db.add(txn)
+            if occ is None:
+                occ = FinanceRecurringOccurrence(recurring_id=rule.id, due_date=due)
+                db.add(occ)
+                occurrences[(rule.id, due)] = occ
+            occ.status = "posted"
+            posted.append((occ, txn))
+
+            amount = Decimal(rule.amount)
+            if rule.txn_type == "income":
+                asset_deltas[asset_id] += amount
+            else:
+                asset_deltas[asset_id] -= amount
+                if rule.txn_type == "liability_payment":
+                    liability_deltas[rule.liability_id] -= amount
+        if last is None:
+            continue
+
+        rule.next_due_date = next_due_date(rule, last)
+        rule.updated_at = now
+        if (rule.id, rule.next_due_date) not in occurrences:
+            pending = FinanceRecurringOccurrence(recurring_id=rule.id, due_date=rule.next_due_date, status="pending")
+            db.add(pending)
+            occurrences[(rule.id, rule.next_due_date)] = pending
+
+    if not posted:
+        db.flush()
+        return result
+
+    db.flush()  # assigns transaction ids
+    for occ, txn in posted:
+        occ.transaction_id = txn.id
+    db.flush()
+
+    for model, entity_type, deltas in (
+        (FinanceAsset, "asset", asset_deltas),
+        (FinanceLiability, "liability", liability_deltas),
+    ):
+        moved = [row_id for row_id, delta in deltas.items() if delta]
+        for row_id in moved:
+            db.execute(
+                update(model).where(model.id == row_id)
+                .values(balance=model.balance + deltas[row_id], updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        if moved:
+            # Read the new balances back for the audit trail
+            for obj in db.execute(
+                select(model).where(model.id.in_(moved)).execution_options(populate_existing=True)
+            ).scalars():
+                finance_audit.touched(db, entity_type, obj, {"balance": obj.balance, "updated_at": obj.updated_at})
+    net_worth.adjust(db, [(txn.transacted_at.date(), *net_worth.delta(txn.txn_type, txn.amount)) for _, txn in posted])
+
+    for occ, txn in posted:
+        finance_audit.created(db, "transaction", txn)
+        finance_audit.created(db, "occurrence", occ, action="posted")
+    finance_audit.flush(db)
+
+    result.posted = len(posted)
+    result.transaction_ids = [txn.id for _, txn in posted]
+    return result
@@ -0,0 +1,53 @@
+"""
+Minimal in-process scheduler: a daemon thread that runs a job once at
+startup and then every day at a fixed local time. Exceptions are logged and
+never stop the thread. Run a single worker, or every worker runs its own copy
+(jobs must tolerate that; autopost does through its unique keys).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, time, timedelta
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DailyJob:
+    def __init__(self, name: str, fn: Callable[[str], object], at: time):
+        self.name = name
+        self.fn = fn  # called with the trigger: "startup" or "scheduled"
+        self.at = at
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now()
+        nxt = datetime.combine(now.date(), self.at)
+        if nxt <= now:
+            nxt += timedelta(days=1)
+        return (nxt - now).total_seconds()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self, trigger: str) -> None:
+        try:
+            self.fn(trigger)
+        except Exception:
+            logger.exception("Job %s failed", self.name)
+
+    def _loop(self) -> None:
+        self._run("startup")
+        while not self._stop.wait(self.seconds_until_next()):
+            self._run("scheduled")
@@ -0,0 +1,171 @@
+"""Compare /api/finance endpoint latency across database backends.
+
+Each URL gets the app's own engine setup (WAL and pragmas for SQLite), its
+tables created if missing and, with --seed, a synthetic dataset when it has
+no transactions yet (databases that already hold data are never written to,
+except by the write endpoint with --writes). Requests go through the ASGI app
+in process, so the numbers are server-side latency: routing, ORM and the
+database round-trips, without HTTP overhead.
+
+Data-version caches are invalidated before every request unless --warm is
+given, so each call pays its queries.
+
+Usage (from backend/):
+    python bench_backends.py sqlite:///bench.db "mysql+pymysql://root:@127.0.0.1/personalos_bench" --seed 50000
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Allow "from app..." imports regardless of the working directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from app.api.router import router
+from app.db.session import get_db, make_engine
+from app.models import Base, FinAccount, FinCategory, FinTransaction
+from app.services import fin_balance, fin_cache, fin_category_tree, fin_rollup, fin_spend_stats
+
+SCOPES = (fin_cache.REFDATA, fin_cache.TRANSACTIONS, fin_cache.BUDGETS, fin_cache.SUBSCRIPTIONS)
+
+
+def _seed(Session, rows: int) -> None:
+    db = Session()
+    try:
+        if db.execute(select(func.count()).select_from(FinTransaction)).scalar():
+            print("  has transactions; not seeding")
+            return
+        cats = [FinCategory(name=f"Category {i}", cat_type="expense") for i in range(30)]
+        accounts = [FinAccount(name=f"Account {i}", balance=0.0, is_default=i == 0) for i in range(4)]
+        db.add_all(cats + accounts)
+        db.flush()
+        rng = random.Random(42)
+        today = datetime.combine(date.today(), datetime.min.time())
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "amount": round(rng.lognormvariate(5, 1), 2),
+                "txn_type": "income" if rng.random() < 0.05 else "expense",
+                "category_id": rng.choice(cats).id,
+                "account_id": rng.choice(accounts).id,
+                "payment_method": "upi",
+                "notes": f"seed {i}",
+                "txn_date": today - timedelta(days=rng.randrange(3 * 365), minutes=rng.randrange(1440)),
+            })
+            if len(batch) == 5000:
+                db.execute(insert(FinTransaction.__table__), batch)
+                batch = []
+        if batch:
+            db.execute(insert(FinTransaction.__table__), batch)
+        fin_rollup.rebuild(db)
+        fin_balance.rebuild(db)
+        fin_category_tree.rebuild(db)
+        fin_spend_stats.rebuild(db)
+        db.commit()
+        print(f"  seeded {rows} transactions")
+    finally:
+        db.close()
+
+
+def _requests(Session, writes: bool) -> list[tuple[str, str, dict]]:
+    db = Session()
+    try:
+        account_id = db.execute(select(FinAccount.id).limit(1)).scalar()
+        category_id = db.execute(select(FinCategory.id).limit(1)).scalar()
+    finally:
+        db.close()
+    today = date.today()
+    ym = f"year={today.year}&month={today.month}"
+    reqs = [
+        ("GET", "/api/finance/transactions?limit=50", {}),
+        ("GET", "/api/finance/dashboard", {}),
+        ("GET", f"/api/finance/analytics/category-spend?{ym}", {}),
+        ("GET", f"/api/finance/analytics/daily-trend?{ym}", {}),
+        ("GET", "/api/finance/analytics/insights", {}),
+        ("GET", "/api/finance/analytics/forecast", {}),
+        ("GET", f"/api/finance/budgets?{ym}", {}),
+    ]
+    if account_id:
+        reqs.append(("GET", f"/api/finance/accounts/{account_id}/balance-history?granularity=month", {}))
+    if writes:
+        reqs.append(("POST", "/api/finance/transactions", {"json": {
+            "amount": 12.5, "txn_type": "expense", "category_id": category_id, "account_id": account_id,
+            "notes": "bench",
+        }}))
+    return reqs
+
+
+def _bench(url: str, seed: int, iterations: int, warm: bool, writes: bool) -> dict[str, list[float]]:
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    if seed:
+        _seed(Session, seed)
+
+    def _get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.dependency_overrides[get_db] = _get_db
+    client = TestClient(app)
+
+    timings: dict[str, list[float]] = {}
+    fin_cache.bump(*SCOPES)  # never reuse entries loaded from another backend
+    for method, path, kwargs in _requests(Session, writes):
+        client.request(method, path, **kwargs).raise_for_status()  # warm-up: pool, statement cache
+        samples = []
+        for _ in range(iterations):
+            if not warm:
+                fin_cache.bump(*SCOPES)
+            started = time.perf_counter()
+            client.request(method, path, **kwargs).raise_for_status()
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[f"{method} {path.split('?')[0]}"] = samples
+    engine.dispose()
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="+", help="SQLAlchemy database URLs to compare")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic transactions to insert into empty databases")
+    parser.add_argument("-n", "--iterations", type=int, default=30)
+    parser.add_argument("--warm", action="store_true", help="let the data-version caches serve repeat requests")
+    parser.add_argument("--writes", action="store_true", help="also time POST /transactions (adds rows)")
+    args = parser.parse_args()
+
+    results = {}
+    for url in args.urls:
+        name = make_url(url).render_as_string(hide_password=True)
+        print(f"{name}:")
+        results[name] = _bench(url, args.seed, args.iterations, args.warm, args.writes)
+
+    endpoints = list(next(iter(results.values())))
+    width = max(len(e) for e in endpoints)
+    print()
+    print(f"{'median / p95 ms':<{width}}  " + "  ".join(f"{n[:28]:>28}" for n in results))
+    for e in endpoints:
+        cells = []
+        for timings in results.values():
+            s = sorted(timings.get(e, []))
+            cells.append(f"{statistics.median(s):>13.2f} / {s[int(len(s) * 0.95) - 1]:>10.2f}" if s else f"{'-':>28}")
+        print(f"{e:<{width}}  " + "  ".join(cells))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
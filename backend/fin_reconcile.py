@@ -0,0 +1,48 @@
+"""Check stored account balances against the transaction history.
+
+Covers fin_accounts (new finance module) and finance_assets /
+finance_liabilities (legacy ledger). Each expected balance is
+opening_balance + net effect of all transactions.
+
+Usage (from backend/):
+    python fin_reconcile.py          # report drifted balances
+    python fin_reconcile.py --fix    # also reset them, in one transaction
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Allow "from app..." imports regardless of the working directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from app.db.session import SessionLocal
+from app.services import reconcile
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="set drifted balances to their expected value")
+    parser.add_argument("--ledger", choices=list(reconcile.LEDGERS), action="append",
+                        help="limit the check to one table (repeatable)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        checked, drifted = reconcile.reconcile(db, tuple(args.ledger or reconcile.LEDGERS))
+        print(f"{checked} balances checked, {len(drifted)} drifted")
+        for d in drifted:
+            print(f"  {d.ledger} #{d.id} {d.name}: recorded {d.recorded:.2f}, expected {d.expected:.2f} (drift {d.drift:+.2f})")
+        if not drifted:
+            return 0
+        if args.fix:
+            reconcile.fix(db, drifted)
+            db.commit()
+            print(f"Fixed {len(drifted)} balances")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""Rebuild or verify the derived finance tables: fin_monthly_totals,
+fin_balance_checkpoints and fin_category_stats (from fin_transactions) and
+fin_category_closure (from fin_categories.parent_id).
+
+Usage (from backend/):
+    python fin_rollups.py check      # report keys where a derived table != its source
+    python fin_rollups.py rebuild    # recompute every derived table from scratch
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Allow "from app..." imports regardless of the working directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from app.db.session import SessionLocal
+from app.services import fin_balance, fin_category_tree, fin_rollup, fin_spend_stats
+
+
+def _print_rollup_problems(problems: list[dict]) -> None:
+    print(f"{len(problems)} inconsistent fin_monthly_totals keys:")
+    for p in problems:
+        print(
+            f"  {p['year']}-{p['month']:02d} cat={p['category_id']} {p['txn_type']}: "
+            f"total {p['actual_total']} (expected {p['expected_total']}), "
+            f"count {p['actual_count']} (expected {p['expected_count']})"
+        )
+
+
+def _print_checkpoint_problems(problems: list[dict]) -> None:
+    print(f"{len(problems)} inconsistent fin_balance_checkpoints keys:")
+    for p in problems:
+        print(
+            f"  account={p['account_id']} {p['period_start'][:7]}: "
+            f"net {p['actual_net']} (expected {p['expected_net']}), "
+            f"count {p['actual_count']} (expected {p['expected_count']})"
+        )
+
+
+def _print_closure_problems(problems: list[dict]) -> None:
+    print(f"{len(problems)} inconsistent fin_category_closure pairs:")
+    for p in problems:
+        print(
+            f"  ancestor={p['ancestor_id']} descendant={p['descendant_id']}: "
+            f"depth {p['actual_depth']} (expected {p['expected_depth']})"
+        )
+
+
+def _print_stats_problems(problems: list[dict]) -> None:
+    print(f"{len(problems)} inconsistent fin_category_stats rows:")
+    for p in problems:
+        print(
+            f"  cat={p['category_id']}: count {p['actual_count']} (expected {p['expected_count']}), "
+            f"mean {p['actual_mean']} (expected {p['expected_mean']}), "
+            f"std {p['actual_std']} (expected {p['expected_std']})"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rows = fin_rollup.rebuild(db)
+            checkpoints = fin_balance.rebuild(db)
+            pairs = fin_category_tree.rebuild(db)
+            stats = fin_spend_stats.rebuild(db)
+            db.commit()
+            print(f"fin_monthly_totals rebuilt: {rows} rows")
+            print(f"fin_balance_checkpoints rebuilt: {checkpoints} rows")
+            print(f"fin_category_closure rebuilt: {pairs} rows")
+            print(f"fin_category_stats rebuilt: {stats} rows")
+            return 0
+
+        rollup_problems = fin_rollup.check(db)
+        checkpoint_problems = fin_balance.check(db)
+        closure_problems = fin_category_tree.check(db)
+        stats_problems = fin_spend_stats.check(db)
+        if not (rollup_problems or checkpoint_problems or closure_problems or stats_problems):
+            print("All derived finance tables are consistent with their sources")
+            return 0
+        if rollup_problems:
+            _print_rollup_problems(rollup_problems)
+        if checkpoint_problems:
+            _print_checkpoint_problems(checkpoint_problems)
+        if closure_problems:
+            _print_closure_problems(closure_problems)
+        if stats_problems:
+            _print_stats_problems(stats_problems)
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
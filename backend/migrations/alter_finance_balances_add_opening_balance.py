@@ -0,0 +1,90 @@
+"""Add opening_balance to finance_assets and finance_liabilities.
+
+opening_balance is the part of a balance not explained by
+finance_transactions (the value entered at creation plus manual edits), so
+that reconciliation can recompute every balance as
+opening_balance + net effect of transactions. Existing rows are backfilled
+from their current balance, i.e. today's balances are taken as correct.
+
+This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+
+BACKFILL = {
+    "finance_assets": """
+        UPDATE finance_assets a SET opening_balance = a.balance
+            - COALESCE((SELECT SUM(t.amount) FROM finance_transactions t
+                        WHERE t.to_asset_id = a.id AND t.txn_type IN ('income', 'transfer')), 0)
+            + COALESCE((SELECT SUM(t.amount) FROM finance_transactions t
+                        WHERE t.from_asset_id = a.id AND t.txn_type IN ('expense', 'transfer', 'liability_payment')), 0)
+    """,
+    "finance_liabilities": """
+        UPDATE finance_liabilities l SET opening_balance = l.balance
+            + COALESCE((SELECT SUM(t.amount) FROM finance_transactions t
+                        WHERE t.liability_id = l.id AND t.txn_type = 'liability_payment'), 0)
+    """,
+}
+
+
+def _column_exists(conn, table_name: str, column_name: str) -> bool:
+    result = conn.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+              AND COLUMN_NAME = :column_name
+            """
+        ),
+        {"table_name": table_name, "column_name": column_name},
+    )
+    return (result.scalar() or 0) > 0
+
+
+def upgrade() -> int:
+    print("Running migration: alter_finance_balances_add_opening_balance")
+    try:
+        with engine.begin() as conn:
+            for table, backfill in BACKFILL.items():
+                if _column_exists(conn, table, "opening_balance"):
+                    print(f"  ✓ {table}.opening_balance exists")
+                    continue
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN opening_balance DECIMAL(14,2) NOT NULL DEFAULT 0 AFTER balance"
+                ))
+                conn.execute(text(backfill))
+                print(f"  ✓ Added and backfilled {table}.opening_balance")
+        print("\n✅ Migration completed successfully!")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            for table in BACKFILL:
+                if _column_exists(conn, table, "opening_balance"):
+                    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN opening_balance"))
+                    print(f"  ✓ Dropped {table}.opening_balance")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
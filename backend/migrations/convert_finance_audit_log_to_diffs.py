@@ -0,0 +1,181 @@
+"""Convert finance_audit_log from before/after snapshots to compact diffs.
+
+Adds seq, is_snapshot and changes_json, rewrites every existing entry the
+way app/services/finance_audit.py now writes them (a full snapshot on
+create, delete, the first entry of an entity and every SNAPSHOT_EVERY
+entries; otherwise only the changed columns with their new values), then
+drops before_json and after_json. Entities are processed a chunk at a time,
+in id order within each entity.
+
+The downgrade rebuilds before_json / after_json from the diffs.
+
+This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from sqlalchemy import column, inspect, select, table, text, tuple_
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+from app.services.finance_audit import SNAPSHOT_EVERY, dumps
+
+TABLE = "finance_audit_log"
+CHUNK = 500  # entities per round trip
+
+log = table(
+    TABLE,
+    column("id"), column("entity_type"), column("entity_id"), column("action"),
+    column("before_json"), column("after_json"), column("seq"), column("is_snapshot"), column("changes_json"),
+)
+
+
+def _columns(conn) -> set[str]:
+    return {c["name"] for c in inspect(conn).get_columns(TABLE)}
+
+
+def _entity_chunks(conn):
+    keys = conn.execute(
+        select(log.c.entity_type, log.c.entity_id).where(log.c.entity_id.is_not(None))
+        .group_by(log.c.entity_type, log.c.entity_id)
+    ).all()
+    for i in range(0, len(keys), CHUNK):
+        yield [tuple(k) for k in keys[i:i + CHUNK]]
+
+
+def _rows_by_entity(conn, keys, *cols):
+    rows = conn.execute(
+        select(log.c.id, log.c.entity_type, log.c.entity_id, log.c.action, *cols)
+        .where(tuple_(log.c.entity_type, log.c.entity_id).in_(keys))
+        .order_by(log.c.entity_type, log.c.entity_id, log.c.id)
+    ).all()
+    grouped: dict[tuple, list] = {}
+    for r in rows:
+        grouped.setdefault((r.entity_type, r.entity_id), []).append(r)
+    return grouped.values()
+
+
+def _to_diffs(rows) -> list[dict]:
+    out, state = [], None
+    for seq, r in enumerate(rows, start=1):
+        before = json.loads(r.before_json) if r.before_json else {}
+        after = json.loads(r.after_json) if r.after_json else {}
+        if r.action == "deleted":
+            full, diff, state = {**(state or {}), **before}, None, None
+        elif r.action == "created" or state is None:
+            state = {**before, **after}
+            full, diff = state, None
+        else:
+            diff = {k: v for k, v in after.items() if state.get(k) != v}
+            state.update(after)
+            full = state
+        snap = diff is None or seq % SNAPSHOT_EVERY == 0
+        out.append({"row_id": r.id, "seq": seq, "snap": snap, "changes": dumps(full if snap else diff)})
+    return out
+
+
+def _to_snapshots(rows) -> list[dict]:
+    out, state = [], None
+    for r in rows:
+        values = json.loads(r.changes_json) if r.changes_json else {}
+        before = dict(state) if state is not None else None
+        if r.action == "deleted":
+            state, after = None, None
+            before = values
+        else:
+            state = values if r.is_snapshot or state is None else {**state, **values}
+            after = state
+        out.append({"row_id": r.id, "before": dumps(before), "after": dumps(after)})
+    return out
+
+
+def upgrade() -> int:
+    print("Running migration: convert_finance_audit_log_to_diffs")
+    try:
+        with engine.begin() as conn:
+            cols = _columns(conn)
+            if "before_json" not in cols:
+                print("  ✓ finance_audit_log already stores diffs")
+                return 0
+            for name, ddl in (
+                ("seq", "INT NOT NULL DEFAULT 0"),
+                ("is_snapshot", "BOOLEAN NOT NULL DEFAULT 0"),
+                ("changes_json", "TEXT NULL"),
+            ):
+                if name not in cols:
+                    conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN {name} {ddl}"))
+                    print(f"  ✓ Added {name}")
+
+        with engine.begin() as conn:
+            old_size = conn.execute(text(
+                f"SELECT COALESCE(SUM(COALESCE(LENGTH(before_json), 0) + COALESCE(LENGTH(after_json), 0)), 0) FROM {TABLE}"
+            )).scalar()
+            converted = 0
+            for keys in _entity_chunks(conn):
+                updates = []
+                for rows in _rows_by_entity(conn, keys, log.c.before_json, log.c.after_json):
+                    updates += _to_diffs(rows)
+                conn.execute(
+                    text(f"UPDATE {TABLE} SET seq = :seq, is_snapshot = :snap, changes_json = :changes WHERE id = :row_id"),
+                    updates,
+                )
+                converted += len(updates)
+            # Entries without an entity id stand alone
+            conn.execute(text(
+                f"UPDATE {TABLE} SET seq = 1, is_snapshot = 1, changes_json = COALESCE(after_json, before_json) "
+                f"WHERE entity_id IS NULL"
+            ))
+            new_size = conn.execute(text(f"SELECT COALESCE(SUM(COALESCE(LENGTH(changes_json), 0)), 0) FROM {TABLE}")).scalar()
+            print(f"  ✓ Converted {converted} entries: {old_size} → {new_size} bytes of JSON")
+
+        with engine.begin() as conn:
+            for name in ("before_json", "after_json"):
+                conn.execute(text(f"ALTER TABLE {TABLE} DROP COLUMN {name}"))
+            print("  ✓ Dropped before_json, after_json")
+        print("\n✅ Migration completed successfully!")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            cols = _columns(conn)
+            if "changes_json" not in cols:
+                print("  ✓ finance_audit_log already stores snapshots")
+                return 0
+            for name in ("before_json", "after_json"):
+                if name not in cols:
+                    conn.execute(text(f"ALTER TABLE {TABLE} ADD COLUMN {name} TEXT NULL"))
+
+        with engine.begin() as conn:
+            for keys in _entity_chunks(conn):
+                updates = []
+                for rows in _rows_by_entity(conn, keys, log.c.is_snapshot, log.c.changes_json):
+                    updates += _to_snapshots(rows)
+                conn.execute(
+                    text(f"UPDATE {TABLE} SET before_json = :before, after_json = :after WHERE id = :row_id"),
+                    updates,
+                )
+            conn.execute(text(f"UPDATE {TABLE} SET after_json = changes_json WHERE entity_id IS NULL"))
+
+        with engine.begin() as conn:
+            for name in ("seq", "is_snapshot", "changes_json"):
+                conn.execute(text(f"ALTER TABLE {TABLE} DROP COLUMN {name}"))
+            print("  ✓ Restored before_json, after_json")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
@@ -0,0 +1,88 @@
+"""Composite indexes for keyset pagination of finance_audit_log.
+
+The /expense/history feed is ordered by (created_at DESC, id DESC), filtered
+by entity_type or by (entity_type, entity_id); per-entity timelines and the
+audit writer's last-seq lookup use the latter too. Each index leads with the
+equality columns and ends with the sort key so every page is a bounded range
+scan. The single-column idx_entity_type is a prefix of the new type index
+and is dropped.
+
+This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+
+TABLE = "finance_audit_log"
+INDEXES = {
+    "idx_finance_audit_entity_date_id": "(entity_type, entity_id, created_at, id)",
+    "idx_finance_audit_type_date_id": "(entity_type, created_at, id)",
+}
+SUPERSEDED = {"idx_entity_type": "(entity_type)"}
+
+
+def _index_exists(conn, table_name: str, index_name: str) -> bool:
+    result = conn.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+              AND INDEX_NAME = :index_name
+            """
+        ),
+        {"table_name": table_name, "index_name": index_name},
+    )
+    return (result.scalar() or 0) > 0
+
+
+def upgrade() -> int:
+    print("Running migration: create_finance_audit_keyset_indexes")
+    try:
+        with engine.begin() as conn:
+            for name, cols in INDEXES.items():
+                if _index_exists(conn, TABLE, name):
+                    print(f"  ✓ {name} exists")
+                    continue
+                conn.execute(text(f"CREATE INDEX {name} ON {TABLE}{cols}"))
+                print(f"  ✓ Created {name}")
+            for name in SUPERSEDED:
+                if _index_exists(conn, TABLE, name):
+                    conn.execute(text(f"DROP INDEX {name} ON {TABLE}"))
+                    print(f"  ✓ Dropped {name}")
+        print("\n✅ Migration completed successfully!")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            for name, cols in SUPERSEDED.items():
+                if not _index_exists(conn, TABLE, name):
+                    conn.execute(text(f"CREATE INDEX {name} ON {TABLE}{cols}"))
+                    print(f"  ✓ Created {name}")
+            for name in INDEXES:
+                if _index_exists(conn, TABLE, name):
+                    conn.execute(text(f"DROP INDEX {name} ON {TABLE}"))
+                    print(f"  ✓ Dropped {name}")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
@@ -0,0 +1,85 @@
+"""Unique key on finance_recurring_occurrences (recurring_id, due_date).
+
+Automatic posting of recurring rules relies on it: a rule's due date can be
+posted at most once, however many times (or from however many processes) the
+job runs. Duplicates already present must be resolved by hand first; the
+migration lists them and stops.
+
+This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+
+TABLE = "finance_recurring_occurrences"
+INDEX = "uq_finance_occurrence_rule_due"
+
+
+def _index_exists(conn, table_name: str, index_name: str) -> bool:
+    result = conn.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+              AND INDEX_NAME = :index_name
+            """
+        ),
+        {"table_name": table_name, "index_name": index_name},
+    )
+    return (result.scalar() or 0) > 0
+
+
+def upgrade() -> int:
+    print("Running migration: create_finance_occurrence_unique_key")
+    try:
+        with engine.begin() as conn:
+            if _index_exists(conn, TABLE, INDEX):
+                print(f"  ✓ {INDEX} exists")
+                return 0
+            duplicates = conn.execute(text(
+                f"""
+                SELECT recurring_id, due_date, COUNT(*) AS n
+                FROM {TABLE}
+                GROUP BY recurring_id, due_date
+                HAVING COUNT(*) > 1
+                """
+            )).all()
+            if duplicates:
+                print(f"\n❌ {len(duplicates)} duplicate (recurring_id, due_date) pairs; resolve them first:")
+                for recurring_id, due_date, n in duplicates[:50]:
+                    print(f"    rule {recurring_id} on {due_date}: {n} rows")
+                return 1
+            conn.execute(text(f"CREATE UNIQUE INDEX {INDEX} ON {TABLE}(recurring_id, due_date)"))
+            print(f"  ✓ Created {INDEX}")
+        print("\n✅ Migration completed successfully!")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            if _index_exists(conn, TABLE, INDEX):
+                conn.execute(text(f"DROP INDEX {INDEX} ON {TABLE}"))
+                print(f"  ✓ Dropped {INDEX}")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
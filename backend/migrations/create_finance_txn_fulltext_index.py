@@ -0,0 +1,69 @@
+"""FULLTEXT index on finance_transactions.description for word-prefix search.
+
+The index is declared on FinanceTransaction, so MySQL tables created by
+create_all already have it; this adds it to existing tables.
+
+InnoDB maintains the index on every insert/update, so no application-side
+bookkeeping is needed. This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+
+INDEX_NAME = "ft_finance_txn_description"
+
+
+def _index_exists(conn) -> bool:
+    result = conn.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = 'finance_transactions'
+              AND INDEX_NAME = :index_name
+            """
+        ),
+        {"index_name": INDEX_NAME},
+    )
+    return (result.scalar() or 0) > 0
+
+
+def upgrade() -> int:
+    print("Running migration: create_finance_txn_fulltext_index")
+    try:
+        with engine.begin() as conn:
+            if _index_exists(conn):
+                print(f"  ✓ {INDEX_NAME} exists")
+            else:
+                conn.execute(text(f"CREATE FULLTEXT INDEX {INDEX_NAME} ON finance_transactions(description)"))
+                print(f"  ✓ Created {INDEX_NAME}")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            if _index_exists(conn):
+                conn.execute(text(f"DROP INDEX {INDEX_NAME} ON finance_transactions"))
+                print(f"  ✓ Dropped {INDEX_NAME}")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
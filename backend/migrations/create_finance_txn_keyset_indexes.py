@@ -0,0 +1,79 @@
+"""Composite indexes for keyset pagination of finance_transactions.
+
+Listings are ordered by (transacted_at DESC, id DESC), optionally filtered by
+txn_type or category. Each index leads with the equality column and ends
+with the sort key so every page is a bounded range scan.
+
+The indexes are declared on FinanceTransaction, so tables created by
+create_all already have them; this adds them to existing MySQL tables.
+
+This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+
+INDEXES = {
+    "idx_finance_txn_date_id": "(transacted_at, id)",
+    "idx_finance_txn_type_date_id": "(txn_type, transacted_at, id)",
+    "idx_finance_txn_category_date_id": "(category, transacted_at, id)",
+}
+
+
+def _index_exists(conn, table_name: str, index_name: str) -> bool:
+    result = conn.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+              AND INDEX_NAME = :index_name
+            """
+        ),
+        {"table_name": table_name, "index_name": index_name},
+    )
+    return (result.scalar() or 0) > 0
+
+
+def upgrade() -> int:
+    print("Running migration: create_finance_txn_keyset_indexes")
+    try:
+        with engine.begin() as conn:
+            for name, cols in INDEXES.items():
+                if _index_exists(conn, "finance_transactions", name):
+                    print(f"  ✓ {name} exists")
+                    continue
+                conn.execute(text(f"CREATE INDEX {name} ON finance_transactions{cols}"))
+                print(f"  ✓ Created {name}")
+        print("\n✅ Migration completed successfully!")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            for name in INDEXES:
+                if _index_exists(conn, "finance_transactions", name):
+                    conn.execute(text(f"DROP INDEX {name} ON finance_transactions"))
+                    print(f"  ✓ Dropped {name}")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
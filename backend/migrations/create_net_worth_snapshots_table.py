@@ -0,0 +1,81 @@
+"""Create net_worth_snapshots: one row of closing asset / liability totals per day.
+
+The primary key on snapshot_date makes a day writable once and serves the
+range reads of /expense/net-worth/history. Rows are filled (and backfilled
+from finance_transactions) by the daily net worth job, see
+app/services/net_worth.py.
+
+This migration is idempotent (safe to run multiple times).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+
+# Add parent directory to path so we can import from app
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.session import engine
+
+TABLE = "net_worth_snapshots"
+
+
+def _table_exists(conn, table_name: str) -> bool:
+    result = conn.execute(
+        text(
+            """
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table_name
+            """
+        ),
+        {"table_name": table_name},
+    )
+    return (result.scalar() or 0) > 0
+
+
+def upgrade() -> int:
+    print("Running migration: create_net_worth_snapshots_table")
+    try:
+        with engine.begin() as conn:
+            if _table_exists(conn, TABLE):
+                print(f"  ✓ {TABLE} exists")
+            else:
+                conn.execute(
+                    text(
+                        f"""
+                        CREATE TABLE {TABLE} (
+                            snapshot_date DATE NOT NULL PRIMARY KEY,
+                            total_assets DECIMAL(16,2) NOT NULL DEFAULT 0,
+                            total_liabilities DECIMAL(16,2) NOT NULL DEFAULT 0,
+                            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                        ) ENGINE=InnoDB;
+                        """
+                    )
+                )
+                print(f"  ✓ Created {TABLE}")
+        print("\n✅ Migration completed successfully!")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Migration failed: {exc}")
+        return 1
+
+
+def downgrade() -> int:
+    try:
+        with engine.begin() as conn:
+            if _table_exists(conn, TABLE):
+                conn.execute(text(f"DROP TABLE {TABLE}"))
+                print(f"  ✓ Dropped {TABLE}")
+        return 0
+    except Exception as exc:
+        print(f"\n❌ Downgrade failed: {exc}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(upgrade())
@@ -0,0 +1,84 @@
+"""Concurrent writers against one finance account must not lose balance updates.
+
+Runs N threads that each post, edit and delete transactions on the same
+account through the API at the same time, then checks that the account's
+balance equals its opening balance plus the net of the transactions that
+remain, and that /finance/reconcile reports no drift for it.
+
+Needs a running server (uvicorn app.main:app); the account it creates is
+deleted at the end.
+
+    python test_concurrent_balance.py [--threads 8] [--per-thread 25] [--api URL]
+"""
+import argparse
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_BASE = "http://localhost:8000/api"
+OPENING = 1000.0
+
+
+def writer(api: str, account_id: int, n: int, seed: int) -> float:
+    """Post *n* transactions (editing every 3rd, deleting every 5th); returns
+    the net balance effect of the ones left."""
+    rng = random.Random(seed)
+    session = requests.Session()
+    net = 0.0
+    for i in range(n):
+        txn_type = rng.choice(["income", "expense"])
+        amount = rng.randrange(1, 10000) / 100
+        body = {"amount": amount, "txn_type": txn_type, "account_id": account_id, "notes": f"concurrency {seed}/{i}"}
+        r = session.post(f"{api}/finance/transactions", json=body)
+        r.raise_for_status()
+        txn_id = r.json()["id"]
+        if i % 5 == 4:
+            session.delete(f"{api}/finance/transactions/{txn_id}").raise_for_status()
+            continue
+        if i % 3 == 2:
+            amount = rng.randrange(1, 10000) / 100
+            session.patch(f"{api}/finance/transactions/{txn_id}", json={**body, "amount": amount}).raise_for_status()
+        net += amount if txn_type == "income" else -amount
+    return net
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--per-thread", type=int, default=25)
+    parser.add_argument("--api", default=API_BASE)
+    args = parser.parse_args()
+    api = args.api.rstrip("/")
+
+    r = requests.post(f"{api}/finance/accounts", json={"name": "Concurrency test", "balance": OPENING})
+    r.raise_for_status()
+    account_id = r.json()["id"]
+    print(f"Account {account_id}: {args.threads} writers x {args.per_thread} transactions...")
+
+    try:
+        with ThreadPoolExecutor(args.threads) as pool:
+            nets = list(pool.map(lambda seed: writer(api, account_id, args.per_thread, seed), range(args.threads)))
+
+        expected = round(OPENING + sum(nets), 2)
+        account = next(a for a in requests.get(f"{api}/finance/accounts").json() if a["id"] == account_id)
+        balance = round(account["balance"], 2)
+        drifted = [d for d in requests.get(f"{api}/finance/reconcile").json()["drifted"]
+                   if d.get("ledger") == "fin_accounts" and d.get("id") == account_id]
+
+        print(f"  balance:  {balance}")
+        print(f"  expected: {expected}")
+        assert abs(balance - expected) < 0.005, f"balance {balance} != expected {expected}"
+        assert not drifted, f"reconcile reports drift: {drifted}"
+        print("\n✅ No lost updates: balance matches opening + posted amounts")
+        return 0
+    except AssertionError as exc:
+        print(f"\n❌ {exc}")
+        return 1
+    finally:
+        requests.delete(f"{api}/finance/accounts/{account_id}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
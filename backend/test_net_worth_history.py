@@ -0,0 +1,94 @@
+"""Request-level check of GET /expense/net-worth/history.
+
+Posts a back-dated income transaction through the legacy /expense API and
+checks that the history endpoint is mounted, that today's point equals the
+live asset/liability totals, that every stored day from the transaction's
+date on moved by its amount (and no earlier day did), that period
+granularities return one closing point per period, and that an unknown
+granularity is rejected. The transaction is deleted at the end and the
+history must return to where it started.
+
+Needs a running server (uvicorn app.main:app).
+
+    python test_net_worth_history.py [--days-back 10] [--api URL]
+"""
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import requests
+
+API_BASE = "http://localhost:8000/api"
+AMOUNT = Decimal("123.45")
+
+
+def history(api: str, **params) -> dict[str, Decimal]:
+    r = requests.get(f"{api}/expense/net-worth/history", params=params)
+    assert r.status_code == 200, f"GET /expense/net-worth/history -> {r.status_code}: {r.text}"
+    return {p["date"]: Decimal(str(p["net_worth"])) for p in r.json()}
+
+
+def live_net_worth(api: str) -> Decimal:
+    assets = sum(Decimal(str(a["balance"])) for a in requests.get(f"{api}/expense/assets").json())
+    liabilities = sum(Decimal(str(l["balance"])) for l in requests.get(f"{api}/expense/liabilities").json())
+    return assets - liabilities
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days-back", type=int, default=10)
+    parser.add_argument("--api", default=API_BASE)
+    args = parser.parse_args()
+    api = args.api.rstrip("/")
+
+    txn_id = None
+    try:
+        before = history(api)
+        today = max(before)  # the server's (UTC) today: the live point
+        print(f"History: {len(before)} points, today {today}")
+        assert before[today] == live_net_worth(api), "today's point differs from the live totals"
+        print("✅ Route mounted; today's point equals live assets - liabilities")
+
+        day = date.fromisoformat(today) - timedelta(days=args.days_back)
+        r = requests.post(f"{api}/expense/transactions", json={
+            "txn_type": "income",
+            "amount": str(AMOUNT),
+            "category": "Other",
+            "description": "net worth history check",
+            "transacted_at": datetime.combine(day, datetime.min.time()).replace(hour=12).isoformat(),
+        })
+        assert r.status_code == 201, f"POST /expense/transactions -> {r.status_code}: {r.text}"
+        txn_id = r.json()["id"]
+
+        after = history(api, start_date=(day - timedelta(days=3)).isoformat())
+        for d, nw in after.items():
+            if d in before:
+                expected = before[d] + (AMOUNT if d >= day.isoformat() else 0)
+                assert nw == expected, f"{d}: {nw} != {expected}"
+        print(f"✅ Income dated {day}: {len(after)} points shifted from that day on only")
+
+        for g in ("week", "month", "quarter"):
+            dates = list(history(api, granularity=g))
+            assert dates == sorted(set(dates)) and dates[-1] == today, f"{g}: {dates}"
+        print("✅ week/month/quarter return one closing point per period, ending today")
+
+        r = requests.get(f"{api}/expense/net-worth/history", params={"granularity": "year"})
+        assert r.status_code == 422, f"granularity=year -> {r.status_code}"
+        print("✅ Unknown granularity rejected (422)")
+
+        requests.delete(f"{api}/expense/transactions/{txn_id}").raise_for_status()
+        txn_id = None
+        assert history(api) == before, "history differs from the start after deleting the transaction"
+        print("✅ Deleting the transaction restores the history")
+        return 0
+    except AssertionError as exc:
+        print(f"\n❌ {exc}")
+        return 1
+    finally:
+        if txn_id is not None:
+            requests.delete(f"{api}/expense/transactions/{txn_id}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())